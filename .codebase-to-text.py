@@ -2,10 +2,41 @@ from pathlib import Path
 import threading
 import customtkinter as ctk
 from PIL import Image, ImageDraw
-from collections import Counter
+from collections import Counter, OrderedDict, namedtuple
 import time
 import tkinter.filedialog as filedialog
 import tkinter.messagebox as messagebox
+import tkinter as tk
+import argparse
+import atexit
+import json
+import os
+import heapq
+import bisect
+import concurrent.futures
+import mmap
+import ast
+import re
+import fnmatch
+import stat
+import sys
+import struct
+import subprocess
+import shlex
+import shutil
+import tempfile
+import http.server
+import hmac
+import secrets
+import urllib.parse
+import urllib.request
+import urllib.error
+import io
+import array
+import zipfile
+import tarfile
+import zlib
+from xml.sax.saxutils import escape as xml_escape, quoteattr as xml_quoteattr
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
@@ -22,6 +53,33 @@ IGNORED_FILES = {}
 IGNORED_DIR_PREFIXES = ['.', '_']
 # Files starting with these characters will be ignored
 IGNORED_FILE_PREFIXES = ['.']
+# Lockfiles, minified bundles, source maps and generated code are flagged in
+# the tree and left out of the bundle unless generated files are included.
+# Names are matched case-insensitively; files of at least
+# GENERATED_SNIFF_MIN_SIZE bytes are also checked for GENERATED_FILE_MARKERS
+# in their first GENERATED_MARKER_BYTES and for lines averaging more than
+# MINIFIED_LINE_LENGTH characters over their first MINIFIED_SNIFF_BYTES.
+INCLUDE_GENERATED_FILES = False
+GENERATED_FILE_PATTERNS = {
+    "package-lock.json": "lockfile", "npm-shrinkwrap.json": "lockfile", "yarn.lock": "lockfile",
+    "pnpm-lock.yaml": "lockfile", "bun.lockb": "lockfile", "poetry.lock": "lockfile",
+    "pipfile.lock": "lockfile", "uv.lock": "lockfile", "pdm.lock": "lockfile",
+    "cargo.lock": "lockfile", "composer.lock": "lockfile", "gemfile.lock": "lockfile",
+    "go.sum": "lockfile", "packages.lock.json": "lockfile", "pubspec.lock": "lockfile",
+    "*.min.js": "minified", "*.min.mjs": "minified", "*.min.css": "minified", "*-min.js": "minified",
+    "*.map": "source map",
+    "*_pb2.py": "generated", "*_pb2.pyi": "generated", "*_pb2_grpc.py": "generated",
+    "*.pb.go": "generated", "*.pb.cc": "generated", "*.pb.h": "generated",
+    "*_pb.js": "generated", "*_pb.d.ts": "generated", "*_grpc_pb.js": "generated",
+    "*.g.dart": "generated", "*.freezed.dart": "generated", "*.designer.cs": "generated",
+    "*.g.cs": "generated",
+}
+GENERATED_FILE_MARKERS = ("@generated", "do not edit", "code generated by", "auto-generated",
+                          "autogenerated", "generated by the protocol buffer compiler")
+GENERATED_SNIFF_MIN_SIZE = 16 * 1024  # Smaller files are classified by name only
+GENERATED_MARKER_BYTES = 1024
+MINIFIED_SNIFF_BYTES = 8 * 1024
+MINIFIED_LINE_LENGTH = 300
 LIGHT_NESTED_BG = "#3c3c3c"
 DARK_NESTED_BG = "#303030"
 INDICATOR_WIDTH = 18
@@ -34,11 +92,193 @@ INDENT_SIZE = 20  # Width for each indentation level
 MAX_FILES_TO_SHOW_ALL = 25  # Show all files if count is <= this number
 TREE_SHOW_FIRST_FILES = 10  # Number of first files to show when truncating
 TREE_SHOW_LAST_FILES = 3   # Number of last files to show when truncating
+# Directory tree in the bundle header:
+#   "full"     - every non-ignored file of the project
+#   "selected" - only the folders leading to selected files and what they directly
+#                hold, with single-child folder chains collapsed ("a/b/c/")
+TREE_MODES = {"full": "Full tree", "selected": "Selected tree"}
+TREE_MODE = "full"
+TREE_LINE_BUDGET = 300  # Lines a "selected" tree may use; the rest is summarised as "N dirs, M files"
 # Performance limits
 # Max files to scan per directory to avoid performance issues
 MAX_FILES_PER_DIR_SCAN = 100
 MAX_INITIAL_SCAN_DEPTH = 2    # Max depth for initial extension scanning
+# Walks enter every real folder at most once, so symlink loops and links to
+# "/" cannot blow up a scan. Symlinked folders are followed unless
+# FOLLOW_SYMLINKS is off; ONE_FILESYSTEM keeps walks off other mounts.
+# Folders left out are listed in the tree as skipped.
+FOLLOW_SYMLINKS = True
+ONE_FILESYSTEM = False
 LARGE_DIR_THRESHOLD = 50     # Directories with more files are considered "large"
+# Bundle generation
+READ_CHUNK_SIZE = 64 * 1024  # Characters read at a time so cancel stays responsive
+PROGRESS_UPDATE_INTERVAL = 0.1  # Minimum seconds between progress updates
+# Large-file policies for files bigger than "max_size" bytes:
+#   "skip"      - leave the file out of the bundle
+#   "head_tail" - keep the first "head_lines" and last "tail_lines" lines
+#   "max_bytes" - keep the first "max_bytes" bytes
+#   "outline"   - keep imports, signatures and docstring first lines (see OUTLINE_POLICY)
+# Truncated files are read partially, never in full. Extension entries
+# replace the default policy for that extension.
+LARGE_FILE_POLICY = {"max_size": 512 * 1024, "mode": "head_tail",
+                     "head_lines": 200, "tail_lines": 50}
+LARGE_FILE_POLICIES = {
+    ".log": {"max_size": 64 * 1024, "mode": "head_tail", "head_lines": 20, "tail_lines": 200},
+    ".csv": {"max_size": 64 * 1024, "mode": "head_tail", "head_lines": 50, "tail_lines": 0},
+    ".tsv": {"max_size": 64 * 1024, "mode": "head_tail", "head_lines": 50, "tail_lines": 0},
+    ".json": {"max_size": 256 * 1024, "mode": "max_bytes", "max_bytes": 64 * 1024},
+    ".sql": {"max_size": 256 * 1024, "mode": "max_bytes", "max_bytes": 64 * 1024},
+}
+# Python and C-like source files (OUTLINE_LANGUAGES) without an extension
+# entry above are outlined instead once they are over this size; None keeps
+# them whole up to LARGE_FILE_POLICY. Files that fail to parse fall back to it.
+OUTLINE_POLICY = {"max_size": 64 * 1024, "mode": "outline"}
+OUTLINE_LANGUAGES = ("python", "javascript", "typescript", "tsx", "jsx", "java", "c", "cpp",
+                     "csharp", "php", "go", "rust", "swift", "kotlin", "scala")
+# Jupyter notebooks are bundled as their cell sources instead of raw JSON
+# (base64 images and all), whatever their size
+SLIM_NOTEBOOKS = True
+NOTEBOOK_OUTPUT_MAX_LINES = 10  # Text output lines kept per code cell (0 drops outputs)
+LARGE_FILE_PREVIEW_LINES = 10  # Files listed in the confirmation shown before generating
+# Tracing: set this environment variable (or pass --trace) to a file path to
+# record stage timings as a Chrome trace (open in chrome://tracing or Perfetto)
+TRACE_ENV_VAR = "CODECLIP_TRACE"
+# Directory selection dialog
+DIALOG_LIST_PAGE_SIZE = 300  # Rows rendered before a "show more" row is added
+DIALOG_LISTING_CACHE_SIZE = 64  # Recently listed directories kept for instant navigation
+# File finder
+FINDER_MAX_RESULTS = 12  # Ranked matches shown under the search box
+FINDER_DEBOUNCE_MS = 120  # Pause in typing before a search runs
+# Content search ("Select by Content")
+CONTENT_SEARCH_WORKERS = max(1, min(8, (os.cpu_count() or 2) - 1))
+CONTENT_SEARCH_BATCH_SIZE = 64  # Files per worker task; smaller batches cancel faster
+CONTENT_SEARCH_CANCEL_POLL = 0.1  # Seconds between cancel checks while waiting on workers
+# Symbol-level selection: regexes matching the first line of a top-level
+# definition, keyed by the language names of get_language_from_extension.
+# Each needs a "name" group; add entries here to support more languages.
+_JS_SYMBOLS = [
+    ("function", r"^(?:export\s+)?(?:default\s+)?(?:async\s+)?function\*?\s+(?P<name>[\w$]+)"),
+    ("class", r"^(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(?P<name>[\w$]+)"),
+    ("const", r"^(?:export\s+)?(?:const|let|var)\s+(?P<name>[\w$]+)\s*=\s*(?:async\s+)?(?:function|\([^)]*\)\s*=>|[\w$]+\s*=>)"),
+]
+_TS_SYMBOLS = _JS_SYMBOLS + [
+    ("interface", r"^(?:export\s+)?interface\s+(?P<name>\w+)"),
+    ("type", r"^(?:export\s+)?type\s+(?P<name>\w+)"),
+    ("enum", r"^(?:export\s+)?(?:const\s+)?enum\s+(?P<name>\w+)"),
+]
+_C_SYMBOLS = [
+    ("struct", r"^(?:typedef\s+)?(?:struct|union|enum|class)\s+(?P<name>\w+)[^;]*$"),
+    ("function", r"^(?!(?:if|for|while|switch|return|else)\b)[A-Za-z_][\w\s\*&:<>,]*?\b(?P<name>[A-Za-z_][\w:~]*)\s*\([^;]*$"),
+]
+SYMBOL_PATTERNS = {
+    "javascript": _JS_SYMBOLS,
+    "jsx": _JS_SYMBOLS,
+    "typescript": _TS_SYMBOLS,
+    "tsx": _TS_SYMBOLS,
+    "go": [
+        ("func", r"^func\s+(?:\([^)]*\)\s*)?(?P<name>\w+)"),
+        ("type", r"^type\s+(?P<name>\w+)"),
+    ],
+    "rust": [
+        ("fn", r"^(?:pub(?:\([^)]*\))?\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?fn\s+(?P<name>\w+)"),
+        ("struct", r"^(?:pub(?:\([^)]*\))?\s+)?struct\s+(?P<name>\w+)"),
+        ("enum", r"^(?:pub(?:\([^)]*\))?\s+)?enum\s+(?P<name>\w+)"),
+        ("trait", r"^(?:pub(?:\([^)]*\))?\s+)?trait\s+(?P<name>\w+)"),
+        ("impl", r"^impl(?:<[^>]*>)?\s+(?P<name>[\w:]+(?:<[^>]*>)?(?:\s+for\s+[\w:]+)?)"),
+    ],
+    "java": [
+        ("class", r"^(?:public\s+|final\s+|abstract\s+)*(?:class|interface|enum|record)\s+(?P<name>\w+)"),
+    ],
+    "csharp": [
+        ("class", r"^\s*(?:public\s+|internal\s+|static\s+|sealed\s+|abstract\s+|partial\s+)*(?:class|interface|struct|enum|record)\s+(?P<name>\w+)"),
+    ],
+    "kotlin": [
+        ("fun", r"^(?:\w+\s+)*fun\s+(?:<[^>]*>\s*)?(?P<name>[\w.]+)"),
+        ("class", r"^(?:\w+\s+)*(?:class|interface|object)\s+(?P<name>\w+)"),
+    ],
+    "swift": [
+        ("func", r"^(?:\w+\s+)*func\s+(?P<name>\w+)"),
+        ("type", r"^(?:\w+\s+)*(?:class|struct|enum|protocol|extension)\s+(?P<name>\w+)"),
+    ],
+    "php": [
+        ("function", r"^function\s+(?P<name>\w+)"),
+        ("class", r"^(?:abstract\s+|final\s+)*(?:class|interface|trait)\s+(?P<name>\w+)"),
+    ],
+    "ruby": [
+        ("def", r"^def\s+(?P<name>[\w.?!]+)"),
+        ("class", r"^(?:class|module)\s+(?P<name>[\w:]+)"),
+    ],
+    "c": _C_SYMBOLS,
+    "cpp": _C_SYMBOLS,
+}
+# Multi-root projects: roots are scanned concurrently by at most this many threads
+ROOT_SCAN_WORKERS = 4
+# Archives that can be opened as read-only project roots (members are streamed, never extracted)
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+# Per-project state (caches, saved settings) lives in this hidden folder
+PROJECT_STATE_DIR = ".codeclip"
+# "Select with dependencies" for Python files
+IMPORT_CLOSURE_MAX_DEPTH = 3  # Import hops followed from the clicked file
+IMPORT_SOURCE_ROOTS = ("", "src")  # Where absolute imports are looked up
+IMPORT_PARSE_WORKERS = CONTENT_SEARCH_WORKERS
+OUTLINE_WORKERS = CONTENT_SEARCH_WORKERS  # Processes outlining big files before a bundle is written
+# Local daemon (--serve): keeps projects scanned and file contents cached for --client calls
+DAEMON_HOST = "127.0.0.1"  # Only ever listens on the loopback interface
+DAEMON_PORT = 7878
+# Seconds between checks of the watched directories (--poll-interval); each
+# check stats every watched directory, so shorter intervals cost more CPU
+DAEMON_POLL_INTERVAL = 1.0
+# Token of the running daemon that --client sends, readable by its owner only
+DAEMON_TOKEN_FILE = os.path.join("~", PROJECT_STATE_DIR, "daemon-{port}.token")
+DAEMON_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Decoded text kept across requests
+DAEMON_CACHE_MAX_FILE_BYTES = 2 * 1024 * 1024  # Bigger files are always read from disk
+
+BYTES_PER_TOKEN = 4  # Rough estimate used for the token counts shown before generating
+HEAT_COLORS = [  # (selected bytes, colour) for folder names, heaviest first
+    (10 * 1024 * 1024, "#E74C3C"),
+    (1024 * 1024, "#E67E22"),
+    (256 * 1024, "#F1C40F"),
+]
+LINE_COUNT_MAX_BYTES = 4 * 1024 * 1024  # Bigger files are not read just to count their lines
+
+REDACT_SECRETS = True  # Replace secrets in file contents with [REDACTED:kind] placeholders
+# (kind, anchors, regex): the regex only runs on lines containing one of the
+# anchors (looked up in lower-cased text when the regex ignores case), or
+# from the first such line on for (?s) patterns. Short anchors shared by
+# several rules keep the number of passes over the text low. A "secret"
+# group limits the placeholder to that part of the match.
+REDACTION_RULES = [
+    ("private-key", ["-----BEGIN"],
+     r"(?s)-----BEGIN[A-Z ]*PRIVATE KEY-----.*?-----END[A-Z ]*PRIVATE KEY-----"),
+    ("aws-access-key", ["IA"], r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b"),
+    ("github-token", ["gh", "github_pat_"], r"\b(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{22,})"),
+    ("slack-token", ["xox"], r"\bxox[abprs]-[A-Za-z0-9-]{10,}"),
+    ("stripe-key", ["k_live_"], r"\b[sr]k_live_[0-9A-Za-z]{16,}"),
+    ("api-key", ["sk-"], r"\bsk-(?:ant-|proj-)?[A-Za-z0-9_-]{20,}"),
+    ("google-api-key", ["AIza"], r"\bAIza[0-9A-Za-z_-]{35}\b"),
+    ("jwt", ["eyJ"], r"\beyJ[A-Za-z0-9_-]{10,}\.eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}"),
+    ("url-password", ["://"], r"\b[a-z][a-z0-9+.-]*://[^\s:/@]+:(?P<secret>[^\s/@]{3,})@"),
+    # .env style lines: FOO_SECRET=value
+    ("env-secret", ["passw", "secret", "token", "api", "access", "credential"],
+     r"(?m)^[ \t]*(?:export[ \t]+)?[A-Z0-9_]*(?:PASSWORD|PASSWD|SECRET|TOKEN|API_?KEY"
+     r"|ACCESS_KEY|CREDENTIALS?)[A-Z0-9_]*[ \t]*=[ \t]*(['\"]?)"
+     r"(?![A-Za-z_]\w*\.[A-Za-z_][\w.]*[ \t]*$)"  # Not a dotted name (token.ERRORTOKEN)
+     r"(?P<secret>[^\s'\"()\[\]{}$]{6,})\1[ \t]*$"),
+    # Quoted values in code and config: "password": "...", api_key = '...'
+    ("password", ["passw", "secret", "token", "api", "access"],
+     r"(?i)(?:password|passwd|secret|token|api[_-]?key|access[_-]?key)(?:[_-]?(?:key|token))?['\"]?"
+     r"[ \t]*[:=][ \t]*(['\"])(?!\[REDACTED:)(?P<secret>[^'\"\s]{8,})\1"),
+]
+REDACTION_MAX_CARRY = 1024 * 1024  # Longest line (or key block) held back to be scanned whole
+
+CLIPBOARD_ENV_VAR = "CODECLIP_CLIPBOARD"  # Helper command reading the bundle on stdin; empty uses Tk
+CLIPBOARD_HELPERS = [  # (display variable it needs, command), first one on PATH wins
+    ("WAYLAND_DISPLAY", ["wl-copy"]),
+    ("DISPLAY", ["xclip", "-selection", "clipboard", "-in"]),
+    ("DISPLAY", ["xsel", "--clipboard", "--input"]),
+    (None, ["pbcopy"]),
+]
+CLIPBOARD_HELPER_TIMEOUT = 10  # Seconds the helper may take after the last byte
 # --- End Configuration ---
 
 
@@ -76,6 +316,65 @@ def is_ignored_file(name):
     return any(name.startswith(prefix) for prefix in IGNORED_FILE_PREFIXES)
 
 
+_GENERATED_NAME_REASONS = list(GENERATED_FILE_PATTERNS.values())
+_GENERATED_NAME_RE = re.compile("|".join(
+    f"({fnmatch.translate(pattern)})" for pattern in GENERATED_FILE_PATTERNS), re.IGNORECASE)
+# The literal end of every pattern; names ending otherwise skip the regex
+_GENERATED_NAME_TAILS = tuple(re.split(r"[*?\]]", pattern.lower())[-1]
+                              for pattern in GENERATED_FILE_PATTERNS)
+
+
+def generated_name_reason(name):
+    """Why a file name marks a generated file ("lockfile", "minified", ...), or None."""
+    if not name.lower().endswith(_GENERATED_NAME_TAILS):
+        return None
+    match = _GENERATED_NAME_RE.match(name)
+    return _GENERATED_NAME_REASONS[match.lastindex - 1] if match else None
+
+
+def sniff_generated_file(file_path):
+    """Why a file's first bytes mark it as generated or minified, or None."""
+    try:
+        with open_project_file(file_path) as f:
+            head = f.read(MINIFIED_SNIFF_BYTES)
+    except OSError:
+        return None
+    marker_text = head[:GENERATED_MARKER_BYTES].decode("utf-8", errors="ignore").lower()
+    if any(marker in marker_text for marker in GENERATED_FILE_MARKERS):
+        return "generated"
+    if len(head) / (head.count(b"\n") + 1) > MINIFIED_LINE_LENGTH:
+        return "minified"
+    return None
+
+
+def classify_generated_file(name, size, file_path=None):
+    """Reason a file counts as generated (see GENERATED_FILE_PATTERNS), or None.
+
+    Big enough files at file_path are also sniffed (see sniff_generated_file).
+    """
+    reason = generated_name_reason(name)
+    if reason is None and file_path is not None and size >= GENERATED_SNIFF_MIN_SIZE:
+        reason = sniff_generated_file(file_path)
+    return reason
+
+
+def split_generated_files(file_paths):
+    """Split file paths into ``(kept, generated)``, generated as [(path, reason, size)]."""
+    kept = []
+    generated = []
+    for file_path in file_paths:
+        try:
+            size = stat_project_file(file_path).st_size
+        except OSError:
+            size = 0
+        reason = classify_generated_file(os.path.basename(file_path), size, file_path)
+        if reason:
+            generated.append((file_path, reason, size))
+        else:
+            kept.append(file_path)
+    return kept, generated
+
+
 def path_contains_ignored_dir(path):
     path_parts = _normalized_parts(path)
     if not path_parts:
@@ -101,9 +400,316 @@ def path_contains_ignored_dir(path):
     return False
 
 
+# --- Tracing ---
+
+
+class _NullSpan:
+    """Span returned while tracing is off; every operation is a no-op."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add(self, counter, value=1):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """A timed stage with counters, recorded when the block exits."""
+
+    def __init__(self, tracer, name, counters):
+        self.tracer = tracer
+        self.name = name
+        self.counters = counters
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.start,
+                           time.perf_counter() - self.start, self.counters)
+        return False
+
+    def add(self, counter, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+
+class Tracer:
+    """Records stage spans for a Chrome trace and a summary table.
+
+    While disabled, span() hands out a shared no-op span so instrumented code
+    pays a single attribute check.
+    """
+
+    IGNORE_MATCHERS = ("is_ignored_dir", "is_ignored_file",
+                       "path_contains_ignored_dir")
+
+    def __init__(self):
+        self.enabled = False
+        self.output_path = None
+        self.events = []
+        self.ignore_calls = 0
+        self.ignore_seconds = 0.0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self, output_path):
+        """Start recording and write the trace to output_path on finish()."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.output_path = output_path
+        self._origin = time.perf_counter()
+        self._instrument_ignore_matchers()
+
+    def span(self, name, **counters):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, counters)
+
+    def record(self, name, start, duration, counters):
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": dict(counters),
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def _instrument_ignore_matchers(self):
+        """Wrap the ignore checks so their total cost shows up in the summary.
+
+        The wrappers are only installed once tracing is enabled, so the
+        matchers stay untouched otherwise.
+        """
+        module_globals = globals()
+        for func_name in self.IGNORE_MATCHERS:
+            module_globals[func_name] = self._timed_matcher(
+                module_globals[func_name])
+
+    def _timed_matcher(self, func):
+        def timed(*args):
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.ignore_calls += 1
+                    self.ignore_seconds += elapsed
+        return timed
+
+    def summary_table(self):
+        """Return per-stage call counts, times and summed counters as text."""
+        stages = {}
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            stage = stages.setdefault(
+                event["name"], {"calls": 0, "total": 0.0, "max": 0.0, "counters": Counter()})
+            stage["calls"] += 1
+            stage["total"] += event["dur"] / 1000
+            stage["max"] = max(stage["max"], event["dur"] / 1000)
+            for key, value in event["args"].items():
+                if isinstance(value, (int, float)):
+                    stage["counters"][key] += value
+
+        lines = [f"{'stage':<22} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}  counters"]
+        for name, stage in sorted(stages.items(), key=lambda item: -item[1]["total"]):
+            counters = ", ".join(f"{key}={value}"
+                                 for key, value in sorted(stage["counters"].items()))
+            lines.append(f"{name:<22} {stage['calls']:>7} {stage['total']:>10.1f} "
+                         f"{stage['total'] / stage['calls']:>9.2f} {stage['max']:>9.2f}  {counters}")
+        if self.ignore_calls:
+            lines.append(f"{'ignore_match':<22} {self.ignore_calls:>7} "
+                         f"{self.ignore_seconds * 1000:>10.1f} "
+                         f"{self.ignore_seconds * 1000 / self.ignore_calls:>9.4f} {'':>9}  (aggregated)")
+        return "\n".join(lines)
+
+    def finish(self):
+        """Write the Chrome trace file and print the summary table to stderr.
+
+        stdout stays free for the bundle itself (--output -).
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            events = list(self.events)
+        if self.ignore_calls:
+            events.append({
+                "name": "ignore_match", "ph": "C",
+                "ts": (time.perf_counter() - self._origin) * 1e6,
+                "pid": os.getpid(), "tid": threading.get_ident(),
+                "args": {"calls": self.ignore_calls,
+                         "ms": round(self.ignore_seconds * 1000, 3)},
+            })
+        try:
+            with open(self.output_path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": events,
+                          "displayTimeUnit": "ms"}, f)
+            print(f"Trace written to {self.output_path}", file=sys.stderr)
+        except OSError as e:
+            print(f"Could not write trace to {self.output_path}: {e}", file=sys.stderr)
+        print(self.summary_table(), file=sys.stderr)
+
+
+TRACER = Tracer()
+
+
+# --- File finder index ---
+
+
+class PathIndex:
+    """Trigram index over relative file paths for ranked fuzzy lookup.
+
+    Queries of three or more characters are narrowed to paths sharing all of
+    their trigrams; when that finds nothing (or the query is shorter) the
+    query is matched as a subsequence, e.g. "pyrfnd" finds
+    "src/payments/refund_service.py". Paths can be added and removed one at a
+    time so the index follows the tree without a rebuild.
+    """
+
+    def __init__(self, paths=()):
+        self._paths = []           # id -> lowercase path, None once removed
+        self._display = []         # id -> path as given
+        self._ids = {}             # path -> id
+        self._trigrams = {}        # trigram -> set of ids
+        self._blob = None          # all paths joined by newlines, for subsequence scans
+        self._blob_offsets = []    # id -> offset of its path in _blob
+        for path in paths:
+            self.add(path)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    @staticmethod
+    def _trigrams_of(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, path):
+        if path in self._ids:
+            return
+        path_id = len(self._paths)
+        lower = path.lower()
+        self._paths.append(lower)
+        self._display.append(path)
+        self._ids[path] = path_id
+        self._blob = None
+        for trigram in self._trigrams_of(lower):
+            self._trigrams.setdefault(trigram, set()).add(path_id)
+
+    def remove(self, path):
+        path_id = self._ids.pop(path, None)
+        if path_id is None:
+            return
+        for trigram in self._trigrams_of(self._paths[path_id]):
+            ids = self._trigrams.get(trigram)
+            if ids is not None:
+                ids.discard(path_id)
+                if not ids:
+                    del self._trigrams[trigram]
+        self._paths[path_id] = None
+        self._display[path_id] = None
+        self._blob = None
+
+    def _substring_candidates(self, query):
+        candidates = None
+        # Rarest trigrams first keeps the intersections small
+        for trigram in sorted(self._trigrams_of(query),
+                              key=lambda t: len(self._trigrams.get(t, ()))):
+            ids = self._trigrams.get(trigram)
+            if not ids:
+                return set()
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return candidates
+        return candidates or set()
+
+    @staticmethod
+    def _score(lower_path, query, start, end):
+        """Higher is better: basename hits, tight matches and short paths win."""
+        basename_start = lower_path.rfind("/") + 1
+        score = 100.0 - (end - start - len(query)) * 2
+        if start >= basename_start:
+            score += 50
+            if start == basename_start:
+                score += 25
+        elif start == 0 or lower_path[start - 1] in "/_-.":
+            score += 10
+        return score - len(lower_path) * 0.1
+
+    def search(self, query, limit=FINDER_MAX_RESULTS):
+        """Return up to limit paths matching query, best first."""
+        query = "".join(query.lower().split())
+        if not query:
+            return []
+
+        matches = []
+        if len(query) >= 3:
+            for path_id in self._substring_candidates(query):
+                lower_path = self._paths[path_id]
+                # Prefer an occurrence in the file name over one in a folder
+                start = lower_path.rfind(query)
+                if start >= 0:
+                    matches.append((self._score(
+                        lower_path, query, start, start + len(query)), path_id))
+
+        if not matches:
+            matches = self._subsequence_matches(query)
+
+        best = heapq.nlargest(limit, matches)
+        return [self._display[path_id] for _, path_id in best]
+
+    def _subsequence_matches(self, query):
+        """Match query as a subsequence with one regex scan over all paths."""
+        if self._blob is None:
+            self._blob_offsets = []
+            offset = 0
+            for lower_path in self._paths:
+                self._blob_offsets.append(offset)
+                offset += len(lower_path or "") + 1
+            self._blob = "\n".join(lower_path or "" for lower_path in self._paths)
+
+        # Each gap skips only characters other than the next wanted one, which
+        # finds the earliest embedding without backtracking and never crosses
+        # into the next path
+        fuzzy = re.compile(re.escape(query[0]) + "".join(
+            f"[^\\n{re.escape(char)}]*{re.escape(char)}" for char in query[1:]))
+        matches = []
+        last_id = -1
+        for match in fuzzy.finditer(self._blob):
+            path_id = bisect.bisect_right(self._blob_offsets, match.start()) - 1
+            if path_id == last_id:
+                continue
+            last_id = path_id
+            offset = self._blob_offsets[path_id]
+            matches.append((self._score(self._paths[path_id], query,
+                                        match.start() - offset, match.end() - offset), path_id))
+        return matches
+
+
 class DirectorySelectionDialog(ctk.CTkToplevel):
     """Custom directory selection dialog with beautiful UI matching the main theme."""
 
+    # Shared by all dialogs so reopening "Change Project" is instant too;
+    # listing workers fill it, so it is only touched under the lock
+    _listing_cache = OrderedDict()
+    _listing_cache_lock = threading.Lock()
+
     def __init__(self, parent, initial_path, is_startup=False):
         super().__init__(parent)
 
@@ -295,6 +901,21 @@ class DirectorySelectionDialog(ctk.CTkToplevel):
             row=2, column=0, sticky="nsew", padx=20, pady=(0, 15))
         self.directory_list.grid_columnconfigure(0, weight=1)
 
+        # Row widgets are recycled between listings instead of recreated
+        self._row_pool = []
+        self._listing_dirs = []
+        self._visible_rows = 0
+        self._listing_token = 0
+        self.list_message_label = ctk.CTkLabel(self.directory_list, text="")
+        self.show_more_btn = ctk.CTkButton(
+            self.directory_list,
+            text="",
+            height=28,
+            fg_color=("gray70", "gray30"),
+            hover_color=("gray60", "gray40"),
+            command=self.show_more_rows
+        )
+
     def create_footer_buttons(self, parent):
         """Create the footer buttons section."""
         footer_frame = ctk.CTkFrame(parent, fg_color="transparent")
@@ -351,115 +972,173 @@ class DirectorySelectionDialog(ctk.CTkToplevel):
         accept_btn.pack(side="right")
 
     def populate_directory_list(self):
-        """Populate the directory listing."""
-        # Clear existing items
-        for widget in self.directory_list.winfo_children():
-            widget.destroy()
-
-        # Reset scroll position to top
-        if hasattr(self.directory_list, '_parent_canvas'):
-            self.directory_list._parent_canvas.yview_moveto(0)
-
+        """Populate the directory listing, from cache or a background scan."""
         # Update address bar (temporarily enable to update, then disable)
         self.address_entry.configure(state="normal")
         self.address_entry.delete(0, "end")
         self.address_entry.insert(0, str(self.current_path))
         self.address_entry.configure(state="readonly")
 
-        # Force update before scanning directory
-        self.update_idletasks()
+        # Update back button state
+        if hasattr(self, 'back_btn'):
+            if self.current_path.parent != self.current_path:
+                self.back_btn.configure(state="normal")
+            else:
+                self.back_btn.configure(state="disabled")
 
-        try:
-            # Add directories (no need for parent '..' item since we have back button)
-            directories = []
-            files = []
-
-            # Ensure path exists and is accessible
-            if not self.current_path.exists():
-                raise FileNotFoundError(
-                    f"Path does not exist: {self.current_path}")
-
-            if not self.current_path.is_dir():
-                raise NotADirectoryError(
-                    f"Path is not a directory: {self.current_path}")
-
-            for item in sorted(self.current_path.iterdir()):
-                if item.is_dir() and not is_ignored_dir(item.name):
-                    directories.append(item)
-                elif item.is_file():
-                    files.append(item)
-
-            # Add directories first
-            for directory in directories:
-                self.add_directory_item(f"📁 {directory.name}", directory)
-
-            # Force refresh of the scrollable frame
-            self.directory_list.update_idletasks()
-
-            # Update file count in footer
-            file_count = len(files)
-            if hasattr(self, 'file_count_label'):
-                if file_count > 0:
-                    self.file_count_label.configure(
-                        text=f"📄 {file_count} file{'s' if file_count != 1 else ''}")
-                else:
-                    self.file_count_label.configure(text="📄 No files")
+        # Results from a previous navigation are dropped when they arrive
+        self._listing_token += 1
+        token = self._listing_token
 
-            # Update back button state
-            if hasattr(self, 'back_btn'):
-                if self.current_path.parent != self.current_path:
-                    self.back_btn.configure(state="normal")
-                else:
-                    self.back_btn.configure(state="disabled")
+        cached = self._get_cached_listing(self.current_path)
+        if cached is not None:
+            self._show_listing(token, self.current_path, cached, None)
+            return
 
-        except PermissionError:
-            error_label = ctk.CTkLabel(
-                self.directory_list,
-                text="❌ Access denied to this directory",
-                text_color="red"
-            )
-            error_label.pack(pady=20)
-        except (FileNotFoundError, NotADirectoryError) as e:
-            error_label = ctk.CTkLabel(
-                self.directory_list,
-                text=f"❌ {str(e)}",
-                text_color="red"
-            )
-            error_label.pack(pady=20)
+        self._show_list_message("Loading...", text_color=("gray40", "gray60"))
+        self.file_count_label.configure(text="")
+        worker = threading.Thread(
+            target=self._list_directory_worker,
+            args=(token, self.current_path),
+        )
+        worker.daemon = True
+        worker.start()
+
+    def _get_cached_listing(self, path):
+        """Return the cached listing for path if the directory is unchanged."""
+        cache = DirectorySelectionDialog._listing_cache
+        with DirectorySelectionDialog._listing_cache_lock:
+            entry = cache.get(str(path))
+        if entry is None:
+            return None
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        if entry["mtime_ns"] != mtime_ns:
+            return None
+        with DirectorySelectionDialog._listing_cache_lock:
+            if str(path) in cache:
+                cache.move_to_end(str(path))
+        return entry
+
+    def _list_directory_worker(self, token, path):
+        """Scan path off the UI thread and hand the result back via after()."""
+        try:
+            entry = list_directory(path)
+            cache = DirectorySelectionDialog._listing_cache
+            with DirectorySelectionDialog._listing_cache_lock:
+                cache[str(path)] = entry
+                cache.move_to_end(str(path))
+                while len(cache) > DIALOG_LISTING_CACHE_SIZE:
+                    cache.popitem(last=False)
+            result, error = entry, None
         except Exception as e:
-            error_label = ctk.CTkLabel(
-                self.directory_list,
-                text=f"❌ Error: {str(e)}",
-                text_color="red"
-            )
-            error_label.pack(pady=20)
+            result, error = None, e
+        try:
+            self.after(0, lambda: self._show_listing(
+                token, path, result, error))
+        except Exception:
+            # The dialog was closed while the scan was running
+            pass
+
+    def _show_listing(self, token, path, listing, error):
+        """Render a finished listing if it still belongs to the current path."""
+        if token != self._listing_token or not self.winfo_exists():
+            return
+
+        if error is not None:
+            if isinstance(error, PermissionError):
+                message = "❌ Access denied to this directory"
+            elif isinstance(error, (FileNotFoundError, NotADirectoryError)):
+                message = f"❌ {str(error)}"
+            else:
+                message = f"❌ Error: {str(error)}"
+            self._show_list_message(message, text_color="red")
+            self.file_count_label.configure(text="")
+            return
+
+        self._listing_dirs = [path / name for name in listing["dirs"]]
+        self._visible_rows = min(
+            len(self._listing_dirs), DIALOG_LIST_PAGE_SIZE)
+        self._hide_list_message()
+        self._render_rows()
+
+        # Reset scroll position to top
+        if hasattr(self.directory_list, '_parent_canvas'):
+            self.directory_list._parent_canvas.yview_moveto(0)
 
-    def add_directory_item(self, text, path, is_parent=False):
-        """Add a directory item to the list."""
+        # Update file count in footer
+        file_count = listing["file_count"]
+        if file_count > 0:
+            self.file_count_label.configure(
+                text=f"📄 {file_count} file{'s' if file_count != 1 else ''}")
+        else:
+            self.file_count_label.configure(text="📄 No files")
+
+    def _render_rows(self):
+        """Show the visible directories using pooled row widgets."""
+        for index, directory in enumerate(self._listing_dirs[:self._visible_rows]):
+            row = self._get_pooled_row(index)
+            row["path"] = directory
+            row["label"].configure(text=f"📁 {directory.name}")
+            if not row["packed"]:
+                # Reduced padding for thinner items
+                row["frame"].pack(fill="x", padx=3, pady=1)
+                row["packed"] = True
+
+        # Hide rows left over from a longer listing
+        for row in self._row_pool[self._visible_rows:]:
+            if row["packed"]:
+                row["frame"].pack_forget()
+                row["packed"] = False
+
+        # Keep the "show more" row last
+        remaining = len(self._listing_dirs) - self._visible_rows
+        self.show_more_btn.pack_forget()
+        if remaining > 0:
+            self.show_more_btn.configure(
+                text=f"Show {min(remaining, DIALOG_LIST_PAGE_SIZE)} more ({remaining} not shown)")
+            self.show_more_btn.pack(fill="x", padx=3, pady=(4, 1))
+
+        # Force refresh of the scrollable frame
+        self.directory_list.update_idletasks()
+
+    def show_more_rows(self):
+        """Render the next page of a long listing."""
+        self._visible_rows = min(len(self._listing_dirs),
+                                 self._visible_rows + DIALOG_LIST_PAGE_SIZE)
+        self._render_rows()
+
+    def _get_pooled_row(self, index):
+        """Return the row widget for index, creating it only the first time."""
+        while len(self._row_pool) <= index:
+            self._row_pool.append(self._create_directory_row())
+        return self._row_pool[index]
+
+    def _create_directory_row(self):
+        """Create a reusable directory row; its target path is set per listing."""
         item_frame = ctk.CTkFrame(self.directory_list)
-        # Reduced padding for thinner items
-        item_frame.pack(fill="x", padx=3, pady=1)
         item_frame.grid_columnconfigure(0, weight=1)
 
         label = ctk.CTkLabel(
             item_frame,
-            text=text,
+            text="",
             anchor="w",
             font=("Arial", 11)  # Slightly smaller font
         )
         label.grid(row=0, column=0, sticky="ew",
                    padx=10, pady=6)  # Reduced padding
 
+        row = {"frame": item_frame, "label": label,
+               "path": None, "packed": False}
+
         # Make the entire frame clickable
         def on_click(event=None):
-            if path.exists() and path.is_dir():
-                self.current_path = path
+            if row["path"] is not None:
+                self.current_path = row["path"]
                 # Use after_idle to ensure proper UI update
                 self.after_idle(self.populate_directory_list)
-            else:
-                # Handle case where directory might not exist or be accessible
-                messagebox.showerror(
-                    "Error", f"Cannot access directory: {path}")
 
         item_frame.bind("<Button-1>", on_click)
         label.bind("<Button-1>", on_click)
@@ -475,6 +1154,20 @@ class DirectorySelectionDialog(ctk.CTkToplevel):
         item_frame.bind("<Leave>", on_leave)
         label.bind("<Enter>", on_enter)
         label.bind("<Leave>", on_leave)
+        return row
+
+    def _show_list_message(self, text, text_color):
+        """Replace the rows with a single loading or error message."""
+        for row in self._row_pool:
+            if row["packed"]:
+                row["frame"].pack_forget()
+                row["packed"] = False
+        self.show_more_btn.pack_forget()
+        self.list_message_label.configure(text=text, text_color=text_color)
+        self.list_message_label.pack(pady=20)
+
+    def _hide_list_message(self):
+        self.list_message_label.pack_forget()
 
     def browse_directory(self):
         """Open system directory browser."""
@@ -532,7 +1225,8 @@ class DirectorySelectionDialog(ctk.CTkToplevel):
 
 
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, output_format="markdown", tracked_only=False, tree_mode=TREE_MODE,
+                 redact=REDACT_SECRETS, include_generated=INCLUDE_GENERATED_FILES):
         super().__init__()
         self.title("Codebase to Clipboard")
         self.geometry("800x700")
@@ -553,6 +1247,17 @@ class App(ctk.CTk):
             return
 
         self.limited_extensions = set()  # Track extensions that hit scanning limits
+        self.processing_thread = None  # Running generation, if any
+        self.cancel_event = threading.Event()
+        self.output_format_var = ctk.StringVar(value=output_format)
+        self.tree_mode_var = ctk.StringVar(value=tree_mode)
+        self.redact_var = ctk.BooleanVar(value=redact)
+        # Lockfiles, minified and generated files only reach the bundle when ticked here
+        self.include_generated_var = ctk.BooleanVar(value=include_generated)
+        # Further project roots loaded next to current_dir ("Add Root")
+        self.extra_roots = []
+        # List git repositories from their index instead of walking the disk
+        self.tracked_only_var = ctk.BooleanVar(value=tracked_only)
 
         self.initialize_project_data()
 
@@ -570,6 +1275,18 @@ class App(ctk.CTk):
         self.file_type_checkboxes = {}
         self.folder_widget_refs = {}
         self.folder_states = {}  # Tracks open/closed state {folder_rel_path: bool}
+        # Symbol-level selection {(folder_rel_path, file): {(kind, name): BooleanVar}}
+        self.symbol_vars = {}
+        self.file_symbol_refs = {}
+        self.symbol_cache = {}  # {full_path: (mtime_ns, symbols)}
+        # Row images are repainted in batches: {(folder_rel_path, file or None)}
+        self.dirty_rows = set()
+        self.hidden_dirty_rows = {}  # {collapsed folder: rows to repaint on expand}
+        self.row_flush_id = None
+        self.file_index = PathIndex()  # Fuzzy finder index, synced lazily
+        self.file_index_stale = True
+        self.selection_heat = SelectionHeat(self.folder_parent)
+        self.line_count_requests = set()  # Folders whose files' lines were counted
 
         self.create_checkbox_images()
 
@@ -586,7 +1303,7 @@ class App(ctk.CTk):
         folder_section_container.grid(
             row=0, column=0, sticky="nsew", pady=(0, 5))
         folder_section_container.grid_columnconfigure(0, weight=1)
-        folder_section_container.grid_rowconfigure(1, weight=1)
+        folder_section_container.grid_rowconfigure(2, weight=1)
 
         folder_header = ctk.CTkFrame(
             folder_section_container, fg_color="transparent")
@@ -598,10 +1315,15 @@ class App(ctk.CTk):
 
         # Directory info label
         self.current_dir_label = ctk.CTkLabel(
-            folder_header, text=f"Project: {self.current_dir.name}",
+            folder_header, text=self.project_title(),
             anchor="w", font=("Arial", 12, "italic"))
         self.current_dir_label.pack(side="left", padx=(10, 0))
 
+        tracked_only_checkbox = ctk.CTkCheckBox(
+            folder_header, text="Git tracked only", variable=self.tracked_only_var,
+            command=self.toggle_tracked_only, checkbox_width=18, checkbox_height=18)
+        tracked_only_checkbox.pack(side="left", padx=(10, 0))
+
         folder_button_frame = ctk.CTkFrame(
             folder_header, fg_color="transparent")
         folder_button_frame.pack(side="right")
@@ -610,6 +1332,10 @@ class App(ctk.CTk):
             folder_button_frame, text="Change Project", width=120, height=28, command=self.change_directory)
         change_dir_btn.pack(side="right", padx=(5, 0))
 
+        self.add_root_btn = ctk.CTkButton(
+            folder_button_frame, text="Add Root ▾", width=100, height=28, command=self.show_add_root_menu)
+        self.add_root_btn.pack(side="right", padx=(5, 0))
+
         folder_deselect_all_btn = ctk.CTkButton(
             folder_button_frame, text="Deselect All", width=100, height=28, command=self.deselect_all_folders)
         folder_deselect_all_btn.pack(side="right", padx=(5, 0))
@@ -618,15 +1344,31 @@ class App(ctk.CTk):
             folder_button_frame, text="Select All", width=100, height=28, command=self.select_all_folders)
         folder_select_all_btn.pack(side="right", padx=0)
 
+        content_search_btn = ctk.CTkButton(
+            folder_button_frame, text="Select by Content", width=130, height=28,
+            command=self.select_by_content)
+        content_search_btn.pack(side="right", padx=(0, 5))
+
+        self.profiles_btn = ctk.CTkButton(
+            folder_button_frame, text="Profiles ▾", width=90, height=28,
+            command=self.show_profiles_menu)
+        self.profiles_btn.pack(side="right", padx=(0, 5))
+
+        # File finder: fuzzy search over every file in the tree
+        self.create_file_finder(folder_section_container)
+
         self.folder_container = ctk.CTkScrollableFrame(
             folder_section_container)
         self.folder_container.grid(
-            row=1, column=0, sticky="nsew", padx=5, pady=(0, 5))
+            row=2, column=0, sticky="nsew", padx=5, pady=(0, 5))
         self.folder_container.grid_columnconfigure(0, weight=1)
 
         # --- Build Tree UI ---
-        self.create_folder_ui(
-            self.folder_tree, self.folder_container, parent_rel_path="", level=-1)
+        with TRACER.span("widget_creation") as span:
+            self.create_folder_ui(
+                self.folder_tree, self.folder_container, parent_rel_path="", level=-1)
+            span.add("folders", len(self.folder_vars))
+        self.request_line_counts("")
 
         # ── File Type Section ───────────────────────────────────────────
         type_section_container = ctk.CTkFrame(main_frame)
@@ -647,6 +1389,11 @@ class App(ctk.CTk):
             type_header, text="Select file types to include:", anchor="w")
         filetype_label.pack(side="left", padx=(0, 10))
 
+        # What the bundle will hold, kept current by update_file_type_counts
+        self.selection_summary_label = ctk.CTkLabel(
+            type_header, text="", anchor="w", font=("Arial", 12, "italic"))
+        self.selection_summary_label.pack(side="left", padx=(10, 0))
+
         type_button_frame = ctk.CTkFrame(type_header, fg_color="transparent")
         type_button_frame.pack(side="right")
 
@@ -658,6 +1405,11 @@ class App(ctk.CTk):
             type_button_frame, text="Select All", width=100, height=28, command=self.select_all_filetypes)
         filetype_select_all_btn.pack(side="right", padx=0)
 
+        include_generated_checkbox = ctk.CTkCheckBox(
+            type_button_frame, text="Include generated", variable=self.include_generated_var,
+            command=self.update_file_type_counts)
+        include_generated_checkbox.pack(side="right", padx=(0, 10))
+
         # Fixed-height container for the scrollable frame
         type_scroll_container = ctk.CTkFrame(
             type_section_container, height=FILE_TYPE_SECTION_MAX_HEIGHT)
@@ -697,14 +1449,40 @@ class App(ctk.CTk):
         # ── Footer Section ──────────────────────────────────────────────
         footer_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
         footer_frame.grid(row=2, column=0, sticky="ew", padx=5, pady=(5, 0))
-        footer_frame.grid_columnconfigure(1, weight=1)
+        footer_frame.grid_columnconfigure(4, weight=1)
 
-        process_btn = ctk.CTkButton(
+        self.process_btn = ctk.CTkButton(
             footer_frame, text="Generate Text and Copy to Clipboard", height=32, command=self.process_folders)
-        process_btn.grid(row=0, column=0, padx=(0, 10), pady=5, sticky="w")
+        self.process_btn.grid(row=0, column=0, padx=(0, 10), pady=5, sticky="w")
+
+        format_menu = ctk.CTkOptionMenu(
+            footer_frame, values=list(BUNDLE_FORMATS), variable=self.output_format_var,
+            width=110, height=32)
+        format_menu.grid(row=0, column=1, padx=(0, 5), pady=5, sticky="w")
+
+        # Shows the mode's label; tree_mode_var keeps its TREE_MODES key
+        tree_menu = ctk.CTkOptionMenu(
+            footer_frame, values=list(TREE_MODES.values()), width=120, height=32,
+            command=lambda text: self.tree_mode_var.set(
+                next(mode for mode, label in TREE_MODES.items() if label == text)))
+        tree_menu.set(TREE_MODES[self.tree_mode_var.get()])
+        tree_menu.grid(row=0, column=2, padx=(0, 5), pady=5, sticky="w")
+
+        redact_checkbox = ctk.CTkCheckBox(
+            footer_frame, text="Redact secrets", variable=self.redact_var,
+            checkbox_width=18, checkbox_height=18)
+        redact_checkbox.grid(row=0, column=3, padx=(5, 0), pady=5, sticky="w")
 
         self.status_label = ctk.CTkLabel(footer_frame, text="", anchor="w")
-        self.status_label.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        self.status_label.grid(row=0, column=4, padx=5, pady=5, sticky="ew")
+
+        # Only shown while a generation is running
+        self.cancel_btn = ctk.CTkButton(
+            footer_frame, text="Cancel", width=80, height=32,
+            fg_color=("gray70", "gray30"), hover_color=("gray60", "gray40"),
+            command=self.cancel_processing)
+        self.cancel_btn.grid(row=0, column=5, padx=(5, 0), pady=5, sticky="e")
+        self.cancel_btn.grid_remove()
 
         # --- Set Initial State ---
         self.select_all_folders()
@@ -733,15 +1511,105 @@ class App(ctk.CTk):
         """Allow user to change the project directory from the main window."""
         new_dir = self.show_directory_dialog()
         if new_dir and new_dir != self.current_dir:
-            # Update current directory
+            # Update current directory; added roots belong to the old project
             self.current_dir = new_dir
+            self.extra_roots = []
             self.update_status("Loading new project directory...")
 
             # Reinitialize project data
             self.after(100, self._reload_project)
 
-    def _reload_project(self):
-        """Reload project data after directory change."""
+    def show_add_root_menu(self):
+        menu = tk.Menu(self, tearoff=0)
+        menu.add_command(label="Folder...", command=self.add_project_root)
+        menu.add_command(label="Archive (zip/tar)...", command=self.add_project_archive)
+        try:
+            menu.tk_popup(self.add_root_btn.winfo_rootx(),
+                          self.add_root_btn.winfo_rooty() + self.add_root_btn.winfo_height())
+        finally:
+            menu.grab_release()
+
+    def add_project_archive(self):
+        """Load a zip or tar archive as another root, read in place without extracting."""
+        archive_path = filedialog.askopenfilename(
+            title="Add Archive", initialdir=self.current_dir,
+            filetypes=[("Archives", " ".join("*" + suffix for suffix in ARCHIVE_SUFFIXES)),
+                       ("All files", "*")])
+        if archive_path:
+            self.add_project_root(archive_path)
+
+    def add_project_root(self, new_dir=None):
+        """Load another project next to the current ones, keeping the current selection."""
+        new_dir = new_dir or self.show_directory_dialog()
+        if not new_dir:
+            return
+        new_dir = Path(new_dir)
+        if new_dir in self.roots.values():
+            self.update_status(f"{new_dir.name} is already loaded.")
+            return
+        selection = self.selection_to_profile()
+        previous = (dict(self.roots), set(self.file_type_vars))
+        self.extra_roots.append(new_dir)
+        self.update_status(f"Adding {new_dir.name}...")
+        self.after(100, lambda: self._reload_project(selection, *previous))
+
+    def toggle_tracked_only(self):
+        """Reload the tree from the git index (or the disk), keeping the selection."""
+        selection = self.selection_to_profile()
+        previous = (dict(self.roots), set(self.file_type_vars))
+        self.update_status("Reloading file list...")
+        self.after(100, lambda: self._reload_project(selection, *previous))
+
+    def remove_project_root(self, label):
+        root = self.roots.get(label)
+        if root is None:
+            return
+        selection = self.selection_to_profile()
+        previous = (dict(self.roots), set(self.file_type_vars))
+        if root == self.current_dir:
+            # The first added root takes over as the primary project
+            self.current_dir = self.extra_roots.pop(0)
+        else:
+            self.extra_roots.remove(root)
+        self.update_status(f"Removing {label}...")
+        self.after(100, lambda: self._reload_project(selection, *previous))
+
+    def show_root_menu(self, event, label):
+        menu = tk.Menu(self, tearoff=0)
+        menu.add_command(label=f"Remove {label} from the bundle",
+                         command=lambda: self.remove_project_root(label))
+        try:
+            menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            menu.grab_release()
+
+    def _carry_selection(self, selection, previous_roots, previous_extensions):
+        """Re-key a selection_to_profile() result after the set of roots changed.
+
+        Paths keep pointing at the same files; roots that were just added are
+        selected in full, as are file types that only they contain.
+        """
+        new_labels = {root: label for label, root in self.roots.items()}
+        paths = []
+        for path in selection["paths"]:
+            old_label, rest = ("", path) if "" in previous_roots else path.partition("/")[::2]
+            label = new_labels.get(previous_roots.get(old_label))
+            if label is not None:
+                paths.append("/".join(part for part in (label, rest) if part))
+        for root, label in new_labels.items():
+            if root not in previous_roots.values():
+                paths.append(label)
+        extensions = selection["extensions"] + [
+            ext for ext in self.file_type_vars if ext not in previous_extensions]
+        return dict(selection, paths=paths, extensions=extensions)
+
+    def _reload_project(self, selection=None, previous_roots=None, previous_extensions=()):
+        """Reload project data after directory change.
+
+        With selection (from selection_to_profile) and the roots and file
+        types it was taken under, the selection is carried over instead of
+        selecting everything.
+        """
         try:
             # Clear existing data
             self.clear_ui_data()
@@ -754,11 +1622,19 @@ class App(ctk.CTk):
             self.rebuild_ui()
 
             # Set initial state
-            self.select_all_folders()
+            if selection is not None:
+                self._apply_profile(self._carry_selection(
+                    selection, previous_roots, previous_extensions))
+            else:
+                self.select_all_folders()
             self.update_file_type_counts()
             self.after(10, self.collapse_all_folders)
 
-            self.update_status(f"Loaded project: {self.current_dir.name}")
+            status = f"Loaded {self.project_title()}"
+            if self.tracked_only_var.get() and not any(
+                    find_git_dir(root) for root in self.roots.values()):
+                status += " (not a git repository - showing all files)"
+            self.update_status(status)
 
         except Exception as e:
             messagebox.showerror(
@@ -766,23 +1642,52 @@ class App(ctk.CTk):
             self.update_status("Error loading directory")
 
     def initialize_project_data(self):
-        """Initialize project data for the current directory."""
-        self.file_extension_counts_initial = self.scan_file_extensions(
-            self.current_dir)
+        """Initialize project data for the current directory and any added roots."""
+        self.roots = label_project_roots([self.current_dir] + self.extra_roots)
+        tracked_only = self.tracked_only_var.get()
+        if len(self.roots) == 1 and not tracked_only and not is_archive_path(self.current_dir):
+            with TRACER.span("walk") as span:
+                self.file_extension_counts_initial = self.scan_file_extensions(
+                    self.current_dir)
+                span.add("extensions", len(self.file_extension_counts_initial))
+            with TRACER.span("tree_build"):
+                self.folder_tree = self.build_folder_tree(self.current_dir)
+        else:
+            with TRACER.span("walk", roots=len(self.roots)):
+                (self.file_extension_counts_initial, self.limited_extensions,
+                 self.folder_tree) = scan_project_roots(self.roots, tracked_only=tracked_only)
         self.sorted_extensions = sorted(self.file_extension_counts_initial.keys(),
                                         key=lambda ext: self.file_extension_counts_initial[ext],
                                         reverse=True)
 
-        self.folder_tree = self.build_folder_tree(self.current_dir)
+        # Each root keeps its own import cache in its own state folder
+        self.import_caches = {label: ImportGraphCache(root)
+                              for label, root in self.roots.items()}
+
+    def project_title(self):
+        if not self.extra_roots:
+            return f"Project: {self.current_dir.name}"
+        return "Projects: " + ", ".join(root.name for root in [self.current_dir] + self.extra_roots)
+
+    def resolve_tree_path(self, rel_path):
+        """Map a tree path to disk; with several roots its first part names the root."""
+        label, root, rest = self.split_tree_path(rel_path)
+        return root / rest
+
+    def split_tree_path(self, rel_path):
+        """Return (root label, root dir, path inside that root) for a tree path."""
+        if "" in self.roots:
+            return "", self.roots[""], rel_path
+        label, _, rest = str(rel_path).replace("\\", "/").partition("/")
+        return label, self.roots[label], rest
 
     def update_current_dir_label(self):
         """Update the current directory label and window title."""
         if hasattr(self, 'current_dir_label'):
-            self.current_dir_label.configure(
-                text=f"Project: {self.current_dir.name}")
+            self.current_dir_label.configure(text=self.project_title())
 
         # Update window title to show current project
-        self.title(f"Codebase to Clipboard - {self.current_dir.name}")
+        self.title(f"Codebase to Clipboard - {self.project_title().split(': ', 1)[1]}")
 
     def clear_ui_data(self):
         """Clear existing UI data before reloading."""
@@ -796,6 +1701,18 @@ class App(ctk.CTk):
         # Don't clear file_type_vars and file_type_checkboxes here - let rebuild method handle it
         self.folder_widget_refs.clear()
         self.folder_states.clear()
+        self.symbol_vars.clear()
+        self.file_symbol_refs.clear()
+        self.symbol_cache.clear()
+        self.dirty_rows.clear()
+        self.hidden_dirty_rows.clear()
+        # A new object, so line counts still running for the old tree are dropped
+        self.selection_heat = SelectionHeat(self.folder_parent)
+        self.line_count_requests.clear()
+
+        # The finder index is re-synced against the new tree on next search
+        self.file_index_stale = True
+        self.clear_file_finder()
 
         # Clear folder container
         if hasattr(self, 'folder_container'):
@@ -805,8 +1722,11 @@ class App(ctk.CTk):
     def rebuild_ui(self):
         """Rebuild the UI components after directory change."""
         # Rebuild folder tree UI
-        self.create_folder_ui(
-            self.folder_tree, self.folder_container, parent_rel_path="", level=-1)
+        with TRACER.span("widget_creation") as span:
+            self.create_folder_ui(
+                self.folder_tree, self.folder_container, parent_rel_path="", level=-1)
+            span.add("folders", len(self.folder_vars))
+        self.request_line_counts("")
 
         # Rebuild file type checkboxes
         self.rebuild_file_type_checkboxes()
@@ -851,138 +1771,13 @@ class App(ctk.CTk):
 
     # --- Scan extensions ---
     def scan_file_extensions(self, base_path):
-        base_path = Path(base_path)
-        if is_ignored_dir(base_path.name) or path_contains_ignored_dir(str(base_path)):
-            return Counter()
-
-        extension_counts = Counter()
         # Track extensions that hit limits for special handling
         self.limited_extensions = set()
-
-        def scan_directory(directory_path, current_depth=0):
-            """Recursively scan directory using pathlib"""
-            if current_depth > MAX_INITIAL_SCAN_DEPTH:
-                return
-
-            if path_contains_ignored_dir(str(directory_path)):
-                return
-
-            try:
-                # Get all files and subdirectories
-                all_files = []
-                subdirs = []
-
-                for item in directory_path.iterdir():
-                    if item.is_file() and not is_ignored_file(item.name):
-                        all_files.append(item.name)
-                    elif item.is_dir() and not is_ignored_dir(item.name):
-                        subdirs.append(item)
-
-                # Process files in current directory
-                if len(all_files) > MAX_FILES_PER_DIR_SCAN:
-                    # For very large directories, sample files to estimate extensions
-                    sampled_files = all_files[:MAX_FILES_PER_DIR_SCAN //
-                                              2] + all_files[-MAX_FILES_PER_DIR_SCAN//2:]
-                    multiplier = len(all_files) / len(sampled_files)
-                    # Mark that we hit a limit in this directory
-                    for file in sampled_files:
-                        ext = Path(file).suffix
-                        if ext:
-                            self.limited_extensions.add(ext.lower())
-                else:
-                    sampled_files = all_files
-                    multiplier = 1
-
-                for file in sampled_files:
-                    ext = Path(file).suffix
-                    if ext:
-                        extension_counts[ext.lower()] += int(multiplier)
-
-                # Recursively scan subdirectories
-                for subdir in subdirs:
-                    scan_directory(subdir, current_depth + 1)
-
-            except (OSError, PermissionError):
-                pass
-
-        scan_directory(base_path)
-        return extension_counts
+        return scan_file_extensions(base_path, self.limited_extensions)
 
     def _get_language_from_extension(self, ext):
         """Map file extensions to language identifiers for markdown code blocks."""
-        ext = ext.lower()
-
-        # Programming languages
-        language_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.ts': 'typescript',
-            '.tsx': 'tsx',
-            '.jsx': 'jsx',
-            '.java': 'java',
-            '.c': 'c',
-            '.cpp': 'cpp',
-            '.cc': 'cpp',
-            '.cxx': 'cpp',
-            '.h': 'c',
-            '.hpp': 'cpp',
-            '.cs': 'csharp',
-            '.php': 'php',
-            '.rb': 'ruby',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.swift': 'swift',
-            '.kt': 'kotlin',
-            '.scala': 'scala',
-            '.sh': 'bash',
-            '.bash': 'bash',
-            '.zsh': 'zsh',
-            '.fish': 'fish',
-            '.ps1': 'powershell',
-            '.bat': 'batch',
-            '.cmd': 'batch',
-
-            # Web technologies
-            '.html': 'html',
-            '.htm': 'html',
-            '.xml': 'xml',
-            '.css': 'css',
-            '.scss': 'scss',
-            '.sass': 'sass',
-            '.less': 'less',
-
-            # Data formats
-            '.json': 'json',
-            '.yaml': 'yaml',
-            '.yml': 'yaml',
-            '.toml': 'toml',
-            '.ini': 'ini',
-            '.cfg': 'ini',
-            '.conf': 'conf',
-
-            # Documentation
-            '.md': 'markdown',
-            '.markdown': 'markdown',
-            '.rst': 'rst',
-            '.txt': 'text',
-
-            # Database
-            '.sql': 'sql',
-
-            # Other
-            '.dockerfile': 'dockerfile',
-            '.gitignore': 'gitignore',
-            '.env': 'bash',
-            '.r': 'r',
-            '.m': 'matlab',
-            '.pl': 'perl',
-            '.lua': 'lua',
-            '.vim': 'vim',
-            '.asm': 'assembly',
-            '.s': 'assembly',
-        }
-
-        return language_map.get(ext, '')
+        return get_language_from_extension(ext)
 
     # --- Create checkbox images ---
     def create_checkbox_images(self):
@@ -1063,66 +1858,18 @@ class App(ctk.CTk):
 
     # --- Build folder tree ---
     def build_folder_tree(self, base_path, max_depth=None, current_depth=0):
-        base_path = Path(base_path)
-        if is_ignored_dir(base_path.name):
-            return {"subfolders": {}, "files": [], "is_large": False}
-        tree = {"subfolders": {}, "files": [], "is_large": False}
-        if path_contains_ignored_dir(str(base_path)):
-            return tree
-
-        # Stop recursion if we've reached max depth (for performance)
-        if max_depth is not None and current_depth >= max_depth:
-            tree["lazy_load"] = True
-            return tree
-
-        try:
-            dirs = []
-            files_in_dir = []
-            file_count = 0
-
-            for entry in base_path.iterdir():
-                name = entry.name
-                if path_contains_ignored_dir(str(entry)) or is_ignored_dir(name):
-                    continue
-                if entry.is_dir():
-                    dirs.append(entry)
-                elif entry.is_file() and not is_ignored_file(name):
-                    file_count += 1
-                    # For performance, limit the number of files we process
-                    if file_count <= MAX_FILES_PER_DIR_SCAN:
-                        # Include ALL non-ignored files, not just those with known extensions
-                        # This ensures __init__.py and other files are always shown
-                        files_in_dir.append(name)
-                    elif file_count == MAX_FILES_PER_DIR_SCAN + 1:
-                        # Mark as large directory
-                        tree["is_large"] = True
-
-            tree["files"] = sorted(files_in_dir, key=str.lower)
-            dirs.sort(key=lambda e: e.name.lower())
-
-            # For performance, limit recursion depth for initial build
-            next_max_depth = 3 if max_depth is None else max_depth  # Initial build depth limit
-
-            for entry in dirs:
-                sub_tree = self.build_folder_tree(
-                    entry, next_max_depth, current_depth + 1)
-                # Always include directories, even if empty
-                tree["subfolders"][entry.name] = sub_tree
-        except OSError:
-            pass
-        return tree
+        return build_folder_tree(base_path, max_depth, current_depth)
 
     # --- Create UI for Each Folder/File Item ---
     def create_folder_ui(self, tree_node, parent_frame, parent_rel_path="", level=0):
         item_level = level + 1
         item_indent = item_level * self.indent_size
 
-        if "subfolders" in tree_node:
-            for folder, sub_tree_node in sorted(tree_node["subfolders"].items()):
-                folder_rel_path = str(
-                    Path(parent_rel_path) / folder) if parent_rel_path else folder
-                has_children = bool(sub_tree_node.get(
-                    "subfolders") or sub_tree_node.get("files"))
+        if tree_node.subfolders:
+            for folder, sub_tree_node in sorted(tree_node.subfolders.items()):
+                # Same result as str(Path(parent) / folder) for the plain names in the tree
+                folder_rel_path = parent_rel_path + os.sep + folder if parent_rel_path else folder
+                has_children = sub_tree_node.has_children()
 
                 self.folder_children.setdefault(folder_rel_path, [])
                 self.folder_parent[folder_rel_path] = parent_rel_path
@@ -1178,6 +1925,10 @@ class App(ctk.CTk):
 
                 folder_label.bind(
                     "<Button-1>", lambda e, frp=folder_rel_path: self.on_folder_label_click(frp))
+                if self.extra_roots and parent_rel_path == "":
+                    # Top-level rows are project roots
+                    for button in ("<Button-3>", "<Button-2>"):
+                        folder_label.bind(button, lambda e, label=folder: self.show_root_menu(e, label))
                 if has_children:
                     dropdown_indicator.bind(
                         "<Button-1>", lambda e, frp=folder_rel_path: self.toggle_folder_by_path(frp))
@@ -1187,11 +1938,28 @@ class App(ctk.CTk):
                 self.create_folder_ui(
                     sub_tree_node, contents_container, folder_rel_path, level=item_level)
 
-        if "files" in tree_node and tree_node["files"]:
+        # Folders the walk refused (symlinks, loops, other filesystems) are shown but not selectable
+        for folder, reason in sorted((tree_node.skipped or {}).items()):
+            skipped_line = ctk.CTkFrame(parent_frame, fg_color="transparent")
+            skipped_line.pack(anchor="w", fill="x", pady=(1, 0),
+                              padx=0 if parent_frame is self.folder_container else (self.indent_size, 0))
+            ctk.CTkLabel(skipped_line, text=" " * 3, width=self.indicator_width,
+                         anchor="w", padx=0).pack(side="left")
+            ctk.CTkLabel(skipped_line, text=f"{folder}/  (skipped: {reason})",
+                         text_color=("gray45", "gray60"), padx=5,
+                         anchor="w").pack(side="left", pady=1, fill="x", expand=True)
+
+        if tree_node.files:
             self.file_vars.setdefault(parent_rel_path, {})
             self.file_labels.setdefault(parent_rel_path, {})
-
-            for file in sorted(tree_node["files"]):
+            sizes = tree_node.sizes
+            if sizes is None:
+                sizes = [self._stat_size(os.path.join(parent_rel_path, file))
+                         for file in tree_node.files]
+            self.selection_heat.add_files(parent_rel_path, tree_node.files, sizes,
+                                          tree_node.generated)
+
+            for file in sorted(tree_node.files):
                 file_var = ctk.BooleanVar(value=False)
                 file_line = ctk.CTkFrame(parent_frame, fg_color="transparent")
                 if parent_frame is self.folder_container:
@@ -1200,22 +1968,440 @@ class App(ctk.CTk):
                     file_line.pack(anchor="w", fill="x", padx=(
                         self.indent_size, 0), pady=(1, 0))
 
+                # Files whose top-level symbols can be listed get an expander
+                can_expand = supports_symbols(file)
                 file_placeholder = ctk.CTkLabel(
-                    file_line, text=" " * 3, width=self.indicator_width, anchor="w", padx=0)
+                    file_line, text="▸ " if can_expand else " " * 3,
+                    width=self.indicator_width, anchor="w", padx=0)
                 file_placeholder.pack(side="left")
+                if can_expand:
+                    file_placeholder.bind(
+                        "<Button-1>", lambda e, frp=parent_rel_path, f=file, line=file_line,
+                        ind=file_placeholder: self.toggle_file_symbols(frp, f, line, ind))
 
                 file_label = ctk.CTkLabel(
-                    file_line, text=file, image=self.unchecked_image, compound="left",
+                    file_line, text=self._file_row_text(parent_rel_path, file),
+                    image=self.unchecked_image, compound="left",
                     padx=5, anchor="w"
                 )
+                if (parent_rel_path, file) in self.selection_heat.generated:
+                    file_label.configure(text_color=("gray45", "gray60"))
                 file_label.pack(side="left", pady=1, fill="x", expand=True)
 
                 file_label.bind("<Button-1>", lambda e, frp=parent_rel_path,
                                 f=file: self.on_file_label_click(frp, f))
+                # Right-click (Button-2 on macOS) opens per-file actions
+                for button in ("<Button-3>", "<Button-2>"):
+                    file_label.bind(button, lambda e, frp=parent_rel_path,
+                                    f=file: self.show_file_menu(e, frp, f))
 
                 self.file_vars[parent_rel_path][file] = file_var
                 self.file_labels[parent_rel_path][file] = file_label
 
+    # --- File Symbols ---
+    def toggle_file_symbols(self, folder_rel_path, file, file_line, indicator):
+        """Expand or collapse the top-level symbols listed under a file row."""
+        key = (folder_rel_path, file)
+        refs = self.file_symbol_refs.get(key)
+        if refs is None:
+            symbols = self._load_file_symbols(folder_rel_path, file)
+            if symbols is None:
+                return
+            refs = self._create_symbol_rows(key, symbols, file_line, indicator)
+            self.file_symbol_refs[key] = refs
+
+        if refs["open"]:
+            refs["frame"].pack_forget()
+            indicator.configure(text="▸ ")
+        else:
+            refs["frame"].pack(fill="x", padx=(self.indent_size * 2, 0),
+                               after=file_line)
+            indicator.configure(text="▾ ")
+        refs["open"] = not refs["open"]
+
+    def _load_file_symbols(self, folder_rel_path, file):
+        """Parse a file's top-level symbols, reusing the cache while its mtime holds."""
+        full_path = self.resolve_tree_path(folder_rel_path) / file
+        try:
+            mtime_ns = stat_project_file(full_path).st_mtime_ns
+            cached = self.symbol_cache.get(str(full_path))
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1]
+            with TRACER.span("symbol_parse"):
+                with open_project_text(full_path) as f:
+                    text = f.read()
+                symbols = extract_symbols(
+                    text, get_language_from_extension(full_path.suffix))
+        except OSError as e:
+            self.update_status(f"Cannot read {file}: {e}")
+            return None
+        self.symbol_cache[str(full_path)] = (mtime_ns, symbols)
+        if not symbols:
+            self.update_status(f"No top-level definitions found in {file}.")
+        return symbols
+
+    def _create_symbol_rows(self, key, symbols, file_line, indicator):
+        symbols_frame = ctk.CTkFrame(file_line.master, fg_color="transparent")
+        symbol_vars = self.symbol_vars.setdefault(key, {})
+        for symbol in symbols:
+            symbol_key = (symbol["kind"], symbol["name"])
+            var = symbol_vars.setdefault(symbol_key, ctk.BooleanVar(value=False))
+            label = ctk.CTkLabel(
+                symbols_frame,
+                text=f"{symbol['kind']} {symbol['name']}  (L{symbol['start']}-{symbol['end']})",
+                image=self.checked_image if var.get() else self.unchecked_image,
+                compound="left", padx=5, anchor="w", font=("Consolas", 11))
+            label.pack(anchor="w", fill="x", pady=(1, 0))
+            label.bind("<Button-1>", lambda e, sk=symbol_key,
+                       lbl=label: self.on_symbol_click(key, sk, lbl))
+        return {"frame": symbols_frame, "open": False}
+
+    def on_symbol_click(self, key, symbol_key, label):
+        """Toggle one definition; ticking any symbol also ticks its file."""
+        folder_rel_path, file = key
+        var = self.symbol_vars[key][symbol_key]
+        var.set(not var.get())
+        label.configure(image=self.checked_image if var.get() else self.unchecked_image)
+
+        file_var = self.file_vars.get(folder_rel_path, {}).get(file)
+        if file_var is not None and var.get() and not file_var.get():
+            file_var.set(True)
+            self._update_parent_folder_state_up(folder_rel_path)
+            self.update_file_type_counts()
+        self.update_file_image(folder_rel_path, file)
+
+    def _selected_symbols(self, folder_rel_path, file):
+        symbol_vars = self.symbol_vars.get((folder_rel_path, file))
+        if not symbol_vars:
+            return set()
+        return {symbol_key for symbol_key, var in symbol_vars.items() if var.get()}
+
+    # --- File Context Menu ---
+    def show_file_menu(self, event, folder_rel_path, file):
+        """Pop up the actions available for a single file row."""
+        menu = tk.Menu(self, tearoff=0)
+        if Path(file).suffix.lower() == ".py":
+            menu.add_command(
+                label=f"Select with dependencies (depth {IMPORT_CLOSURE_MAX_DEPTH})",
+                command=lambda: self.select_with_dependencies(folder_rel_path, file))
+            menu.add_command(
+                label="Select with all dependencies",
+                command=lambda: self.select_with_dependencies(folder_rel_path, file, None))
+        if menu.index("end") is None:
+            return
+        try:
+            menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            menu.grab_release()
+
+    # --- Selection Profiles ---
+    def show_profiles_menu(self):
+        """Pop up the saved selection profiles under the Profiles button."""
+        profiles = load_selection_profiles(self.current_dir)
+        menu = tk.Menu(self, tearoff=0)
+        for name in sorted(profiles):
+            menu.add_command(label=f"Apply \"{name}\"",
+                             command=lambda n=name: self.apply_selection_profile(n))
+        if profiles:
+            menu.add_separator()
+        menu.add_command(label="Save current selection as profile...",
+                         command=self.save_selection_profile)
+        if profiles:
+            delete_menu = tk.Menu(menu, tearoff=0)
+            for name in sorted(profiles):
+                delete_menu.add_command(
+                    label=name, command=lambda n=name: self.delete_selection_profile(n))
+            menu.add_cascade(label="Delete profile", menu=delete_menu)
+        try:
+            menu.tk_popup(self.profiles_btn.winfo_rootx(),
+                          self.profiles_btn.winfo_rooty() + self.profiles_btn.winfo_height())
+        finally:
+            menu.grab_release()
+
+    def save_selection_profile(self):
+        dialog = ctk.CTkInputDialog(
+            text="Name for the current selection:", title="Save Profile")
+        name = dialog.get_input()
+        if not name or not name.strip():
+            return
+        name = name.strip()
+        profiles = load_selection_profiles(self.current_dir)
+        profiles[name] = self.selection_to_profile()
+        try:
+            save_selection_profiles(self.current_dir, profiles)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save profile: {e}")
+            return
+        self.update_status(f"Saved profile \"{name}\".")
+
+    def delete_selection_profile(self, name):
+        profiles = load_selection_profiles(self.current_dir)
+        if profiles.pop(name, None) is None:
+            return
+        try:
+            save_selection_profiles(self.current_dir, profiles)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not delete profile: {e}")
+            return
+        self.update_status(f"Deleted profile \"{name}\".")
+
+    def selection_to_profile(self):
+        """Describe the current selection compactly: fully ticked folders, stray files, file types."""
+        paths = []
+        stack = [""]
+        while stack:
+            folder_rel_path = stack.pop()
+            if folder_rel_path and self.folder_vars[folder_rel_path].get() == 1:
+                paths.append(folder_rel_path.replace("\\", "/"))
+                continue
+            prefix = folder_rel_path.replace("\\", "/") + "/" if folder_rel_path else ""
+            for file, var in self.file_vars.get(folder_rel_path, {}).items():
+                if var.get():
+                    paths.append(prefix + file)
+            for child_path in self.folder_children.get(folder_rel_path, []):
+                if child_path in self.folder_vars and self.folder_vars[child_path].get() != 0:
+                    stack.append(child_path)
+        extensions = [ext for ext, var in self.file_type_vars.items() if var.get()]
+        return {"paths": sorted(paths), "extensions": sorted(extensions)}
+
+    def apply_selection_profile(self, name):
+        profile = load_selection_profiles(self.current_dir).get(name)
+        if profile is None:
+            self.update_status(f"Profile \"{name}\" not found.")
+            return
+        try:
+            selected = self._apply_profile(profile)
+        except re.error as e:
+            messagebox.showerror("Invalid Profile", f"Invalid glob in profile \"{name}\": {e}")
+            return
+        self.update_status(f"Applied profile \"{name}\": {selected} files selected.")
+
+    def _apply_profile(self, profile):
+        """Replace the selection with a profile's in one pass, refreshing the UI once.
+
+        Returns the number of selected files.
+        """
+        with TRACER.span("apply_profile") as span:
+            matches = compile_selection_profile(profile)
+            changed_files = []
+            selected = 0
+            for folder_rel_path, files in self.file_vars.items():
+                prefix = folder_rel_path.replace("\\", "/") + "/" if folder_rel_path else ""
+                for file, var in files.items():
+                    wanted = matches(prefix + file)
+                    selected += wanted
+                    if var.get() != wanted:
+                        var.set(wanted)
+                        changed_files.append((folder_rel_path, file, wanted))
+            changed_folders = self._recalculate_all_folder_states()
+
+            if profile.get("extensions"):
+                wanted_exts = {normalize_extension(ext) for ext in profile["extensions"]}
+                for ext, var in self.file_type_vars.items():
+                    var.set(ext in wanted_exts)
+
+            # Single refresh of only the rows whose state changed
+            for folder_rel_path, file, wanted in changed_files:
+                self.update_file_image(folder_rel_path, file, wanted)
+            for folder_rel_path in changed_folders:
+                self.update_folder_image(folder_rel_path)
+            self.update_file_type_counts()
+            span.add("files_changed", len(changed_files))
+        return selected
+
+    def _recalculate_all_folder_states(self):
+        """Recompute every folder's state bottom-up; returns the folders that changed."""
+        changed = []
+        deepest_first = sorted(self.folder_vars,
+                               key=lambda p: p.count("/") + p.count("\\"), reverse=True)
+        for folder_rel_path in deepest_first:
+            var = self.folder_vars[folder_rel_path]
+            new_state = self._recalculate_folder_state(folder_rel_path)
+            if var.get() != new_state:
+                var.set(new_state)
+                changed.append(folder_rel_path)
+        return changed
+
+    # --- Dependency Selection ---
+    def select_with_dependencies(self, folder_rel_path, file, max_depth=IMPORT_CLOSURE_MAX_DEPTH):
+        """Tick a Python file plus the project modules it imports, transitively."""
+        if self.is_busy():
+            self.update_status(
+                "Already busy - wait for the current task to finish or cancel it.")
+            return
+        start_rel = (Path(folder_rel_path) / file).as_posix()
+        self.update_status(f"Resolving imports of {start_rel}...")
+        self._begin_background_task(
+            self._dependency_thread, (start_rel, max_depth))
+
+    def _dependency_thread(self, start_rel, max_depth, cancel_event):
+        try:
+            # Imports are resolved within the file's own root
+            label, root, inner_rel = self.split_tree_path(start_rel)
+            import_cache = self.import_caches[label]
+            with TRACER.span("import_closure") as span:
+                closure = python_import_closure(
+                    root, [inner_rel], max_depth, import_cache, cancel_event)
+                span.add("modules", len(closure))
+            import_cache.save()
+            if label:
+                closure = {f"{label}/{rel_path}" for rel_path in closure}
+            if cancel_event.is_set():
+                self.after(0, lambda: self._update_after_processing(
+                    "", "Dependency selection cancelled."))
+                return
+            self.after(0, lambda: self._apply_dependency_selection(
+                start_rel, closure))
+        except Exception as e:
+            print(f"Error resolving imports: {e}")
+            self.after(0, lambda: self._update_after_processing("", f"Error: {e}"))
+
+    def _apply_dependency_selection(self, start_rel, closure):
+        """Tick the resolved modules and report how much they add to the bundle."""
+        self._end_background_task()
+        added_files = 0
+        added_bytes = 0
+        outside_tree = 0
+        touched_folders = set()
+        for rel_path in sorted(closure):
+            rel = Path(rel_path)
+            folder_rel_path = "" if str(rel.parent) == "." else str(rel.parent)
+            file_var = self.file_vars.get(folder_rel_path, {}).get(rel.name)
+            if file_var is None:
+                outside_tree += 1
+                continue
+            if not file_var.get():
+                file_var.set(True)
+                self.update_file_image(folder_rel_path, rel.name)
+                touched_folders.add(folder_rel_path)
+                if rel_path != start_rel:
+                    added_files += 1
+                try:
+                    added_bytes += self.resolve_tree_path(rel_path).stat().st_size
+                except OSError:
+                    pass
+        for folder_rel_path in touched_folders:
+            self._update_parent_folder_state_up(folder_rel_path)
+        self.update_file_type_counts()
+
+        dependency_count = len(closure) - 1
+        status = (f"{start_rel}: {dependency_count} project dependencies, "
+                  f"{added_files} newly selected (+{format_size(added_bytes)})")
+        if outside_tree:
+            status += f", {outside_tree} not shown in the tree"
+        self.update_status(status + ".")
+
+    # --- File Finder ---
+    def create_file_finder(self, parent):
+        """Create the search box and its result rows above the folder tree."""
+        finder_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        finder_frame.grid(row=1, column=0, sticky="ew", padx=5, pady=(0, 5))
+        finder_frame.grid_columnconfigure(0, weight=1)
+
+        self.finder_entry = ctk.CTkEntry(
+            finder_frame, placeholder_text="🔍 Find files (type part of a path, e.g. pay/refund)...",
+            height=28)
+        self.finder_entry.grid(row=0, column=0, sticky="ew")
+        self.finder_entry.bind("<KeyRelease>", self._on_finder_key)
+        self.finder_entry.bind("<Escape>", lambda e: self.clear_file_finder())
+        self.finder_entry.bind("<Return>", lambda e: self._toggle_finder_result(0))
+
+        self.finder_results_frame = ctk.CTkFrame(finder_frame)
+        self.finder_results_frame.grid_columnconfigure(0, weight=1)
+        self.finder_result_labels = []
+        self.finder_results = []
+        self._finder_after_id = None
+
+    def _on_finder_key(self, event=None):
+        """Debounce typing so a search runs once the user pauses."""
+        if event is not None and event.keysym in ("Escape", "Return"):
+            return
+        if self._finder_after_id is not None:
+            self.after_cancel(self._finder_after_id)
+        self._finder_after_id = self.after(
+            FINDER_DEBOUNCE_MS, self.run_file_finder)
+
+    def sync_file_index(self):
+        """Bring the finder index in line with the tree, touching only changed paths."""
+        current = {}
+        for folder_rel_path, files in self.file_vars.items():
+            for file in files:
+                display_path = str(Path(folder_rel_path) / file).replace("\\", "/") \
+                    if folder_rel_path else file
+                current[display_path] = (folder_rel_path, file)
+
+        with TRACER.span("index_sync") as span:
+            indexed = set(self.file_index)
+            for display_path in indexed - current.keys():
+                self.file_index.remove(display_path)
+                span.add("removed")
+            for display_path in current.keys() - indexed:
+                self.file_index.add(display_path)
+                span.add("added")
+        self.finder_targets = current
+        self.file_index_stale = False
+
+    def run_file_finder(self):
+        """Search the index for the current query and show ranked matches."""
+        self._finder_after_id = None
+        query = self.finder_entry.get().strip()
+        if not query:
+            self._show_finder_results([])
+            return
+        if self.file_index_stale:
+            self.sync_file_index()
+        with TRACER.span("finder_search", query_length=len(query)):
+            matches = self.file_index.search(query, FINDER_MAX_RESULTS)
+        self._show_finder_results(matches)
+
+    def _show_finder_results(self, matches):
+        self.finder_results = matches
+        if not matches:
+            self.finder_results_frame.grid_forget()
+            if self.finder_entry.get().strip():
+                self.update_status("No matching files.")
+            return
+
+        while len(self.finder_result_labels) < len(matches):
+            index = len(self.finder_result_labels)
+            label = ctk.CTkLabel(
+                self.finder_results_frame, text="", image=self.unchecked_image,
+                compound="left", padx=5, anchor="w")
+            label.bind("<Button-1>", lambda e,
+                       i=index: self._toggle_finder_result(i))
+            self.finder_result_labels.append(label)
+
+        for index, label in enumerate(self.finder_result_labels):
+            if index < len(matches):
+                label.grid(row=index, column=0, sticky="ew", padx=5)
+            else:
+                label.grid_forget()
+        self._refresh_finder_images()
+        self.finder_results_frame.grid(
+            row=1, column=0, sticky="ew", pady=(2, 0))
+
+    def _refresh_finder_images(self):
+        for display_path, label in zip(self.finder_results, self.finder_result_labels):
+            folder_rel_path, file = self.finder_targets[display_path]
+            selected = self.file_vars[folder_rel_path][file].get()
+            label.configure(
+                text=display_path,
+                image=self.checked_image if selected else self.unchecked_image)
+
+    def _toggle_finder_result(self, index):
+        """Tick or untick a finder match directly in the tree selection."""
+        if index >= len(self.finder_results):
+            return
+        folder_rel_path, file = self.finder_targets[self.finder_results[index]]
+        self.on_file_label_click(folder_rel_path, file)
+        self._refresh_finder_images()
+
+    def clear_file_finder(self):
+        if not hasattr(self, 'finder_entry'):
+            return
+        self.finder_entry.delete(0, "end")
+        self._show_finder_results([])
+
     # --- Toggle Folder ---
     def toggle_folder_by_path(self, folder_rel_path):
         refs = self.folder_widget_refs.get(folder_rel_path)
@@ -1238,6 +2424,8 @@ class App(ctk.CTk):
                                after=header_frame)
             indicator_label.configure(text="▼ ")
             self.folder_states[folder_rel_path] = True
+            self._requeue_hidden_rows(folder_rel_path)
+            self.request_line_counts(folder_rel_path)
 
     # --- Collapse All Folders ---
     def collapse_all_folders(self):
@@ -1274,7 +2462,7 @@ class App(ctk.CTk):
             for file, file_var in self.file_vars[folder_rel_path].items():
                 if file_var.get() != is_checked:
                     file_var.set(is_checked)
-                    self.update_file_image(folder_rel_path, file)
+                    self.update_file_image(folder_rel_path, file, is_checked)
 
         for child_path in self.folder_children.get(folder_rel_path, []):
             if child_path in self.folder_vars:
@@ -1348,6 +2536,11 @@ class App(ctk.CTk):
         return 2
 
     def update_folder_image(self, folder_rel_path):
+        """Queue a folder row's checkbox image for the next idle refresh."""
+        self.dirty_rows.add((folder_rel_path, None))
+        self._schedule_row_flush()
+
+    def _paint_folder_row(self, folder_rel_path):
         if folder_rel_path not in self.folder_labels or folder_rel_path not in self.folder_vars:
             return
         label = self.folder_labels[folder_rel_path]
@@ -1358,8 +2551,13 @@ class App(ctk.CTk):
             img = self.checked_image
         else:
             img = self.indeterminate_image
+        # The name carries the folder's share of the bundle, coloured by weight
+        name = os.path.basename(folder_rel_path)
+        size = self.selection_heat.folder_bytes.get(folder_rel_path, 0)
+        text = f"{name}   {format_size(size)} · {format_tokens(size)}" if size else name
+        text_color = heat_color(size) or ctk.ThemeManager.theme["CTkLabel"]["text_color"]
         if label.winfo_exists():
-            label.configure(image=img)
+            label.configure(image=img, text=text, text_color=text_color)
 
     # --- File Selection Logic ---
     def on_file_label_click(self, folder_rel_path, file):
@@ -1371,7 +2569,76 @@ class App(ctk.CTk):
         self._update_parent_folder_state_up(folder_rel_path)
         self.update_file_type_counts()
 
-    def update_file_image(self, folder_rel_path, file):
+    def update_file_image(self, folder_rel_path, file, selected=None):
+        """Queue a file row's checkbox image for the next idle refresh.
+
+        Also moves the file in or out of the selection totals; the folder
+        rows showing them are repainted once the totals settle. Callers that
+        just set the file's variable pass its value as selected.
+        """
+        if selected is None:
+            var = self.file_vars.get(folder_rel_path, {}).get(file)
+            selected = var is not None and var.get()
+        self.selection_heat.update(folder_rel_path, file, selected)
+        self.dirty_rows.add((folder_rel_path, file))
+        self._schedule_row_flush()
+
+    def _settle_selection_heat(self):
+        """Bring the folder totals up to date and queue the rows showing them."""
+        changed = self.selection_heat.settle()
+        if changed:
+            self.dirty_rows.update((folder, None) for folder in changed)
+            self._schedule_row_flush()
+
+    def _file_row_text(self, folder_rel_path, file):
+        size = self.selection_heat.size(folder_rel_path, file)
+        text = f"{file}   {format_size(size)}"
+        lines = self.selection_heat.line_counts.get((folder_rel_path, file))
+        if lines is not None:
+            text += f" · {lines:,} lines"
+        reason = self.selection_heat.generated.get((folder_rel_path, file))
+        if reason:
+            text += f"   ({reason})"
+        return text
+
+    def _stat_size(self, rel_path):
+        try:
+            return stat_project_file(self.resolve_tree_path(rel_path)).st_size
+        except OSError:
+            return 0
+
+    # --- Line Counts ---
+    def request_line_counts(self, folder_rel_path):
+        """Count the lines of a folder's files in the background, once per folder."""
+        if folder_rel_path in self.line_count_requests or folder_rel_path not in self.file_vars:
+            return
+        self.line_count_requests.add(folder_rel_path)
+        info = self.selection_heat.file_info.get(folder_rel_path, {})
+        jobs = [(file, self.resolve_tree_path(os.path.join(folder_rel_path, file)))
+                for file, (size, ext) in info.items() if size <= LINE_COUNT_MAX_BYTES]
+        threading.Thread(target=self._line_count_thread,
+                         args=(self.selection_heat, folder_rel_path, jobs), daemon=True).start()
+
+    def _line_count_thread(self, heat, folder_rel_path, jobs):
+        counts = {}
+        for file, path in jobs:
+            try:
+                counts[file] = count_lines(path)
+            except OSError:
+                pass
+        self.after(0, lambda: self._show_line_counts(heat, folder_rel_path, counts))
+
+    def _show_line_counts(self, heat, folder_rel_path, counts):
+        if heat is not self.selection_heat:
+            return  # The project was reloaded meanwhile
+        labels = self.file_labels.get(folder_rel_path, {})
+        for file, lines in counts.items():
+            heat.line_counts[(folder_rel_path, file)] = lines
+            label = labels.get(file)
+            if label is not None and label.winfo_exists():
+                label.configure(text=self._file_row_text(folder_rel_path, file))
+
+    def _paint_file_row(self, folder_rel_path, file):
         if (folder_rel_path not in self.file_labels
                 or file not in self.file_labels[folder_rel_path]
                 or folder_rel_path not in self.file_vars
@@ -1379,17 +2646,79 @@ class App(ctk.CTk):
             return
         label = self.file_labels[folder_rel_path][file]
         var = self.file_vars[folder_rel_path][file]
-        img = self.checked_image if var.get() else self.unchecked_image
+        if not var.get():
+            img = self.unchecked_image
+        elif self._selected_symbols(folder_rel_path, file):
+            # Only some definitions of this file go into the bundle
+            img = self.indeterminate_image
+        else:
+            img = self.checked_image
         if label.winfo_exists():
             label.configure(image=img)
 
+    # --- Coalesced Row Refresh ---
+    def _schedule_row_flush(self):
+        if self.row_flush_id is None:
+            self.row_flush_id = self.after_idle(self.flush_row_images)
+
+    def flush_row_images(self):
+        """Repaint every queued row once per idle tick.
+
+        Rows inside collapsed folders are not mapped, so they are parked in
+        hidden_dirty_rows and repainted when their folder is expanded.
+        """
+        self.row_flush_id = None
+        self.dirty_rows.update((folder, None) for folder in self.selection_heat.settle())
+        rows, self.dirty_rows = self.dirty_rows, set()
+        shown = {"": True}
+        painted = 0
+        with TRACER.span("row_flush", queued=len(rows)) as span:
+            for folder_rel_path, file in rows:
+                if file is None:
+                    container = self.folder_parent.get(folder_rel_path, "")
+                else:
+                    container = folder_rel_path
+                if not self._is_folder_content_shown(container, shown):
+                    self.hidden_dirty_rows.setdefault(
+                        container, set()).add((folder_rel_path, file))
+                    continue
+                if file is None:
+                    self._paint_folder_row(folder_rel_path)
+                else:
+                    self._paint_file_row(folder_rel_path, file)
+                painted += 1
+            span.add("painted", painted)
+
+    def _is_folder_content_shown(self, folder_rel_path, shown):
+        """True if the folder and all its ancestors are expanded (memoised in shown)."""
+        chain = []
+        while folder_rel_path not in shown:
+            if not self.folder_states.get(folder_rel_path, False):
+                shown[folder_rel_path] = False
+                break
+            chain.append(folder_rel_path)
+            folder_rel_path = self.folder_parent.get(folder_rel_path, "")
+        result = shown[folder_rel_path]
+        for folder in chain:
+            shown[folder] = result
+        return result
+
+    def _requeue_hidden_rows(self, folder_rel_path):
+        """Queue rows parked under a folder that was just expanded."""
+        prefix = folder_rel_path + os.sep
+        for container in [c for c in self.hidden_dirty_rows
+                          if c == folder_rel_path or c.startswith(prefix)]:
+            self.dirty_rows.update(self.hidden_dirty_rows.pop(container))
+        if self.dirty_rows:
+            self._schedule_row_flush()
+
     # --- Buttons: Select/Deselect All ---
     def select_all_folders(self):
         if "" in self.file_vars:
             for file, file_var in self.file_vars[""].items():
                 if not file_var.get():
                     file_var.set(True)
-                    self.update_file_image("", file)
+                    self.update_file_image("", file, True)
 
         for folder_rel_path in self.folder_vars:
             if self.folder_parent.get(folder_rel_path) == "":
@@ -1402,7 +2731,7 @@ class App(ctk.CTk):
             for file, file_var in self.file_vars[""].items():
                 if file_var.get():
                     file_var.set(False)
-                    self.update_file_image("", file)
+                    self.update_file_image("", file, False)
 
         for folder_rel_path in self.folder_vars:
             if self.folder_parent.get(folder_rel_path) == "":
@@ -1430,32 +2759,159 @@ class App(ctk.CTk):
 
     # --- Update File Type Counts ---
     def update_file_type_counts(self):
-        current_counts = Counter()
-        # Count ALL files in selected folders, regardless of file type selection
-        for folder_path, files_dict in self.file_vars.items():
-            for file, var in files_dict.items():
-                if var.get():  # Only count files in selected folders/files
-                    ext = Path(file).suffix
-                    if ext:
-                        current_counts[ext.lower()] += 1
-
+        """Refresh the file type labels and the bundle summary from selection_heat.
+
+        The per-file bookkeeping happens in update_file_image; here only the
+        file type filter is synced, so this costs one step per extension.
+        """
+        heat = self.selection_heat
+        # Types without a checkbox are left out of the bundle, like unticked ones
+        for ext in list(heat.ext_keys):
+            var = self.file_type_vars.get(ext)
+            heat.set_extension(ext, var is not None and var.get())
+        heat.set_generated(self.include_generated_var.get())
+        self._settle_selection_heat()
+
+        # Counts cover ALL ticked files, regardless of file type selection
         for ext, checkbox in self.file_type_checkboxes.items():
-            count = current_counts.get(ext, 0)
+            count = heat.ext_files.get(ext, 0)
             # Only show 'many' if we know there are files but they were limited during scanning
             if (count == 0 and
                 hasattr(self, 'limited_extensions') and
                     ext in self.limited_extensions):
                 label_text = f"{ext} files (many)"
+            elif count:
+                label_text = f"{ext} files ({count}, {format_size(heat.ext_bytes[ext])})"
             else:
                 label_text = f"{ext} files ({count})"
             if checkbox.winfo_exists():
                 checkbox.configure(text=label_text)
 
+        total = heat.folder_bytes.get("", 0)
+        summary = (f"Bundle: {heat.folder_files.get('', 0)} files, "
+                   f"{format_size(total)}, {format_tokens(total)}")
+        if heat.generated_files and not heat.include_generated:
+            summary += (f" · {heat.generated_files} generated left out "
+                        f"({format_size(heat.generated_bytes)})")
+        self.selection_summary_label.configure(text=summary)
+
+    # --- Content Search ---
+    def select_by_content(self):
+        """Ask for a regex and tick every file whose contents match it."""
+        if self.is_busy():
+            self.update_status(
+                "Already busy - wait for the current task to finish or cancel it.")
+            return
+
+        dialog = ctk.CTkInputDialog(
+            text="Select every file whose contents match this regular expression:",
+            title="Select by Content")
+        pattern = dialog.get_input()
+        if not pattern:
+            return
+        try:
+            re.compile(pattern.encode("utf-8"), re.MULTILINE)
+        except re.error as e:
+            messagebox.showerror("Invalid Pattern", f"Invalid regular expression: {e}")
+            return
+
+        targets = {}
+        for folder_rel_path, files in self.file_vars.items():
+            for file in files:
+                full_path = str(self.resolve_tree_path(folder_rel_path) / file)
+                targets[full_path] = (folder_rel_path, file)
+        if not targets:
+            self.update_status("No files to search.")
+            return
+
+        self.update_status(f"Searching {len(targets)} files...")
+        self._begin_background_task(
+            self._content_search_thread, (pattern, targets))
+
+    def _content_search_thread(self, pattern, targets, cancel_event):
+        start_time = time.time()
+        try:
+            files_done = 0
+            match_count = 0
+            last_report = 0.0
+            with TRACER.span("content_search", files=len(targets)) as span:
+                for batch_done, matches in search_files_by_content(
+                        pattern, list(targets), cancel_event):
+                    files_done += batch_done
+                    match_count += len(matches)
+                    if matches:
+                        hits = [targets[path] for path in matches]
+                        self.after(0, lambda hits=hits: self._select_content_matches(hits))
+                    now = time.time()
+                    if now - last_report >= PROGRESS_UPDATE_INTERVAL:
+                        last_report = now
+                        message = (f"Searching... {files_done}/{len(targets)} files, "
+                                   f"{match_count} matches")
+                        self.after(0, lambda m=message: self.update_status(m))
+                span.add("matches", match_count)
+
+            duration = time.time() - start_time
+            if cancel_event.is_set():
+                status_msg = (f"Content search cancelled after {files_done} files "
+                              f"({match_count} matches selected).")
+            else:
+                status_msg = (f"Selected {match_count} matching files out of "
+                              f"{len(targets)} in {duration:.2f}s.")
+        except Exception as e:
+            print(f"Error during content search: {e}")
+            status_msg = f"Error: {e}"
+        self.after(0, lambda: self._update_after_processing("", status_msg))
+
+    def _select_content_matches(self, hits):
+        """Tick a batch of matched files; runs on the UI thread."""
+        touched_folders = set()
+        for folder_rel_path, file in hits:
+            file_var = self.file_vars.get(folder_rel_path, {}).get(file)
+            if file_var is not None and not file_var.get():
+                file_var.set(True)
+                self.update_file_image(folder_rel_path, file)
+                touched_folders.add(folder_rel_path)
+        for folder_rel_path in touched_folders:
+            self._update_parent_folder_state_up(folder_rel_path)
+        if touched_folders:
+            self.update_file_type_counts()
+
     # --- Processing ---
+    def is_busy(self):
+        """Return True while a generation or content search is running."""
+        return self.processing_thread is not None and self.processing_thread.is_alive()
+
+    def _begin_background_task(self, target, args):
+        """Run target on a worker thread with the footer Cancel button shown."""
+        self.process_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal")
+        self.cancel_btn.grid()
+        self.update_idletasks()
+
+        self.cancel_event = threading.Event()
+        thread = threading.Thread(
+            target=target, args=args + (self.cancel_event,))
+        thread.daemon = True
+        self.processing_thread = thread
+        thread.start()
+
+    def _end_background_task(self):
+        self.processing_thread = None
+        self.process_btn.configure(state="normal")
+        self.cancel_btn.grid_remove()
+
     def process_folders(self):
+        # Never start a second generation while one is still running
+        if self.is_busy():
+            self.update_status(
+                "Already busy - wait for the current task to finish or cancel it.")
+            return
+
         include_exts = {ext.lower()
                         for ext, var in self.file_type_vars.items() if var.get()}
+        generated = {} if self.include_generated_var.get() else self.selection_heat.generated
         selected_files_paths = []
+        symbol_selection = {}  # {full_path: {(kind, name)}} for partly selected files
         q = [""]
         visited_folders = set()
 
@@ -1467,11 +2923,15 @@ class App(ctk.CTk):
 
             if current_folder_path in self.file_vars:
                 for file, var in self.file_vars[current_folder_path].items():
-                    if var.get():
+                    if var.get() and (current_folder_path, file) not in generated:
                         ext = Path(file).suffix
                         if ext and ext.lower() in include_exts:
-                            full_path = self.current_dir / current_folder_path / file
+                            full_path = self.resolve_tree_path(current_folder_path) / file
                             selected_files_paths.append(str(full_path))
+                            symbols = self._selected_symbols(
+                                current_folder_path, file)
+                            if symbols:
+                                symbol_selection[str(full_path)] = symbols
 
             if current_folder_path in self.folder_children:
                 for subfolder_path in self.folder_children[current_folder_path]:
@@ -1485,58 +2945,96 @@ class App(ctk.CTk):
                 text="No files selected or matching selected file types.")
             return
 
-        self.status_label.configure(text="Processing... please wait.")
-        self.update_idletasks()
-
-        thread = threading.Thread(
-            target=self._process_thread,
-            # Fixed: Added comma to make it a proper tuple
-            args=(sorted(selected_files_paths),),
-        )
-        thread.daemon = True
-        thread.start()
+        if not self.confirm_large_files(selected_files_paths, symbol_selection):
+            self.update_status("Generation cancelled.")
+            return
 
-    def _process_thread(self, selected_files_paths):
+        self.status_label.configure(text="Processing... please wait.")
+        self._begin_background_task(
+            self._process_thread, (sorted(selected_files_paths), self.roots, symbol_selection,
+                                   self.output_format_var.get(), self.tree_mode_var.get(),
+                                   self.redact_var.get()))
+
+    def confirm_large_files(self, selected_files_paths, symbol_selection):
+        """Preview which files the large-file policies will cut, from stat sizes only."""
+        with TRACER.span("large_file_preview", files=len(selected_files_paths)):
+            plan = plan_large_files(selected_files_paths, exclude=symbol_selection)
+        if not plan:
+            return True
+
+        lines = []
+        for file_path, size, policy in plan[:LARGE_FILE_PREVIEW_LINES]:
+            relative_path = root_relative_path(file_path, self.roots)
+            lines.append(f"• {relative_path} ({format_size(size)}): "
+                         f"{describe_large_file_policy(policy)}")
+        if len(plan) > LARGE_FILE_PREVIEW_LINES:
+            lines.append(f"... and {len(plan) - LARGE_FILE_PREVIEW_LINES} more")
+        saved = sum(size for _, size, _ in plan)
+        return messagebox.askokcancel(
+            "Large Files",
+            f"{len(plan)} selected file(s) ({format_size(saved)}) exceed the size "
+            "limits and will be shortened:\n\n" + "\n".join(lines) + "\n\nContinue?")
+
+    def cancel_processing(self):
+        """Ask the running generation or content search to stop."""
+        if self.is_busy():
+            self.cancel_event.set()
+            self.cancel_btn.configure(state="disabled")
+            self.update_status("Cancelling...")
+
+    def _report_progress(self, files_done, files_total, bytes_done, bytes_total, elapsed):
+        """Show generation progress; called on the UI thread."""
+        status = (f"Processing {files_done}/{files_total} files "
+                  f"({format_size(bytes_done)} of {format_size(bytes_total)})")
+        if 0 < bytes_done < bytes_total and elapsed > 0.5:
+            remaining = elapsed * (bytes_total - bytes_done) / bytes_done
+            status += f", about {remaining:.0f}s left"
+        self.update_status(status + "...")
+
+    def _process_thread(self, selected_files_paths, roots, symbol_selection, output_format,
+                        tree_mode, redact, cancel_event):
         start_time = time.time()
         try:
-            # Generate directory tree with ALL non-ignored files, not just selected types
-            directory_tree = get_tree_filtered_string(
-                self.current_dir, allowed_extensions=None)  # None means show all files
-            combined_text = "PROJECT DIRECTORY STRUCTURE:\n" + directory_tree + \
-                "\n\n" + "=" * 20 + " FILE CONTENTS " + "=" * 20 + "\n\n"
-
-            file_count = 0
-            total_size = 0
-            errors = []
-
-            for file_path in selected_files_paths:
+            def on_progress(*args):
+                self.after(0, lambda: self._report_progress(
+                    *args, time.time() - start_time))
+
+            bundle_args = dict(progress_callback=on_progress, cancel_event=cancel_event,
+                               symbol_selection=symbol_selection, output_format=output_format,
+                               roots=roots, tree_mode=tree_mode, redact=redact)
+            # Stream into a clipboard helper when there is one, so a large
+            # bundle never passes through Tk; combined_text stays None then
+            combined_text = None
+            helper = find_clipboard_helper()
+            if helper:
                 try:
-                    file_path_obj = Path(file_path)
-                    relative_path = str(file_path_obj.relative_to(
-                        self.current_dir)).replace("\\", "/")
-                    with file_path_obj.open("r", encoding="utf-8", errors="ignore") as f:
-                        content = f.read()
-
-                    # Get file extension for syntax highlighting
-                    ext = file_path_obj.suffix
-                    language = self._get_language_from_extension(ext)
-
-                    combined_text += f"## {relative_path}\n\n```{language}\n{content}\n```\n\n"
-                    file_count += 1
-                    total_size += len(content.encode('utf-8'))
-                except Exception as e:
-                    error_msg = f"Error reading {Path(file_path).relative_to(self.current_dir)}: {e}"
-                    errors.append(error_msg)
-                    print(error_msg)
-
-            end_time = time.time()
-            duration = end_time - start_time
-            kb_size = total_size / 1024
-            mb_size = kb_size / 1024
-            size_str = f"{mb_size:.2f} MB" if mb_size >= 1 else f"{kb_size:.1f} KB"
-            status_msg = f"Copied {file_count} files ({size_str}) in {duration:.2f}s."
-            if errors:
-                status_msg += f" ({len(errors)} errors occurred - check console)"
+                    stats = copy_bundle(helper, self.current_dir, selected_files_paths,
+                                        **bundle_args)
+                except OSError as e:
+                    print(f"Clipboard helper {helper[0]} failed ({e}); using Tk instead.")
+                    helper = None
+            if not helper:
+                combined_text, stats = generate_bundle(
+                    self.current_dir, selected_files_paths, **bundle_args)
+
+            duration = time.time() - start_time
+            if stats["cancelled"]:
+                combined_text = ""
+                status_msg = f"Cancelled after {stats['files']} of {len(selected_files_paths)} files."
+            else:
+                size_str = format_size(stats["bytes"])
+                status_msg = f"Copied {stats['files']} files ({size_str}) in {duration:.2f}s."
+                if stats["outlined"] or stats["truncated"] or stats["skipped"]:
+                    status_msg += (f" {stats['outlined']} outlined, {stats['truncated']} truncated, "
+                                   f"{stats['skipped']} skipped by size limits.")
+                if stats["notebooks"]["files"]:
+                    status_msg += f" {format_notebook_savings(stats['notebooks'])}."
+                if stats["redactions"]:
+                    status_msg += f" {format_redactions(stats['redactions'])} - check console."
+                    for line in redaction_report(stats["redactions"]):
+                        print("Redacted in " + line)
+                if stats["errors"]:
+                    status_msg += f" ({len(stats['errors'])} errors occurred - check console)"
 
             self.after(0, lambda: self._update_after_processing(
                 combined_text, status_msg))
@@ -1544,30 +3042,1737 @@ class App(ctk.CTk):
             import traceback
             print(f"Error during processing thread: {e}")
             traceback.print_exc()
-            self.after(0, lambda: self.status_label.configure(
-                text=f"Error: {e}"))
+            self.after(0, lambda: self._update_after_processing(
+                "", f"Error: {e}"))
 
     def _update_after_processing(self, combined_text, status_msg):
-        if combined_text:
+        """Copy combined_text through Tk (None: a helper already copied it)."""
+        self._end_background_task()
+        if combined_text is None:
+            self.status_label.configure(text=status_msg)
+        elif combined_text:
             try:
-                self.clipboard_clear()
-                self.clipboard_append(combined_text)
+                with TRACER.span("clipboard", chars=len(combined_text)):
+                    self.clipboard_clear()
+                    self.clipboard_append(combined_text)
                 self.status_label.configure(text=status_msg)
             except Exception as e:
                 error_txt = f"Error copying to clipboard: {e}. Text generated but not copied."
                 print(error_txt)
                 print("Length of text:", len(combined_text))
                 self.status_label.configure(text=error_txt)
+        elif status_msg:
+            self.status_label.configure(text=status_msg)
         else:
             self.status_label.configure(text="No content generated.")
 
-# --- Helper get_tree_filtered_string ---
-
+# --- Helper search_files_by_content ---
 
-def get_tree_filtered_string(start_path, allowed_extensions=(), indent_char="    ", prefix=""):
-    start_path = Path(start_path)
-    if path_contains_ignored_dir(str(start_path)):
-        return ""
+
+def _search_file_batch(pattern, flags, paths):
+    """Return the paths whose contents match pattern (runs in a worker process)."""
+    regex = re.compile(pattern.encode("utf-8"), flags)
+    matches = []
+    for path in paths:
+        try:
+            with open_project_file(path) as f:
+                try:
+                    fileno = f.fileno()
+                except io.UnsupportedOperation:
+                    # Archive members cannot be mapped, so they are read whole
+                    if regex.search(f.read()):
+                        matches.append(path)
+                    continue
+                if os.fstat(fileno).st_size == 0:
+                    continue
+                with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+                    # search() stops at the first hit, so the rest of the file is never paged in
+                    if regex.search(mapped):
+                        matches.append(path)
+        except (OSError, ValueError) + ARCHIVE_READ_ERRORS:
+            continue
+    return matches
+
+
+def search_files_by_content(pattern, paths, cancel_event=None, flags=re.MULTILINE):
+    """Search paths for pattern in a process pool, yielding results as they finish.
+
+    Yields ``(files_searched, matching_paths)`` per batch. The cancel event
+    is checked every CONTENT_SEARCH_CANCEL_POLL seconds even while no batch
+    finishes; batches not yet started are then dropped and the ones running
+    are left to finish in the background.
+    """
+    batches = [paths[i:i + CONTENT_SEARCH_BATCH_SIZE]
+               for i in range(0, len(paths), CONTENT_SEARCH_BATCH_SIZE)]
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=CONTENT_SEARCH_WORKERS)
+    futures = {executor.submit(_search_file_batch, pattern, flags, batch): len(batch)
+               for batch in batches}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, timeout=CONTENT_SEARCH_CANCEL_POLL,
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield futures[future], future.result()
+            if cancel_event is not None and cancel_event.is_set():
+                return
+    finally:
+        # Also runs when the caller stops early; never waits on running batches
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# --- Symbol extraction ---
+
+
+def supports_symbols(file_name):
+    """Return True if top-level definitions can be listed for this file."""
+    language = get_language_from_extension(Path(file_name).suffix)
+    return language == "python" or language in SYMBOL_PATTERNS
+
+
+def _python_symbols(text):
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return []
+    symbols = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            kind = "class" if isinstance(node, ast.ClassDef) else "def"
+            symbols.append({"kind": kind, "name": node.name, "start": start, "end": node.end_lineno})
+    return symbols
+
+
+def _regex_symbols(text, language):
+    """Find top-level definitions with SYMBOL_PATTERNS, ending them at the
+    matching closing brace or, failing that, right before the next one."""
+    patterns = [(kind, re.compile(pattern))
+                for kind, pattern in SYMBOL_PATTERNS[language]]
+    lines = text.splitlines()
+    starts = []
+    for line_number, line in enumerate(lines, 1):
+        for kind, pattern in patterns:
+            match = pattern.match(line)
+            if match:
+                starts.append((line_number, kind, match.group("name")))
+                break
+
+    symbols = []
+    for index, (start, kind, name) in enumerate(starts):
+        limit = starts[index + 1][0] - 1 if index + 1 < len(starts) else len(lines)
+        end = limit
+        depth = 0
+        opened = False
+        for line_number in range(start, limit + 1):
+            line = lines[line_number - 1]
+            depth += line.count("{") - line.count("}")
+            opened = opened or "{" in line
+            if opened and depth <= 0:
+                end = line_number
+                break
+            if not opened and line.rstrip().endswith(";"):
+                end = line_number
+                break
+        # Drop blank lines between this definition and the next
+        while end > start and not lines[end - 1].strip():
+            end -= 1
+        symbols.append({"kind": kind, "name": name, "start": start, "end": end})
+    return symbols
+
+
+def extract_symbols(text, language):
+    """List top-level definitions as dicts with kind, name and 1-based start/end lines.
+
+    Python uses ast; other languages fall back to the regexes in
+    SYMBOL_PATTERNS, keyed by the language from get_language_from_extension.
+    """
+    if language == "python":
+        return _python_symbols(text)
+    if language in SYMBOL_PATTERNS:
+        return _regex_symbols(text, language)
+    return []
+
+
+def write_symbol_sections(writer, relative_path, content, language, wanted_symbols):
+    """Write only the wanted (kind, name) definitions of a file, one entry each.
+
+    Returns the number of bytes written.
+    """
+    lines = content.splitlines()
+    chosen = [symbol for symbol in extract_symbols(content, language)
+              if (symbol["kind"], symbol["name"]) in wanted_symbols]
+    if not chosen:
+        writer.skipped_file(
+            relative_path, "none of the selected definitions were found in the current file")
+        return 0
+    written = 0
+    for symbol in chosen:
+        body = "\n".join(lines[symbol["start"] - 1:symbol["end"]])
+        writer.begin_file(relative_path, language,
+                          note=f"{symbol['kind']} {symbol['name']}, "
+                               f"lines {symbol['start']}-{symbol['end']}")
+        writer.write_content(body)
+        writer.end_file()
+        written += len(body.encode("utf-8"))
+    return written
+
+
+# --- Outlines ---
+
+
+def _docstring_line(node):
+    docstring = ast.get_docstring(node)
+    return docstring.strip().splitlines()[0] if docstring and docstring.strip() else None
+
+
+def _docstring_literal(indent, line):
+    if '"""' in line or line.endswith(('"', "\\")):
+        return indent + repr(line)
+    return f'{indent}"""{line}"""'
+
+
+def _python_outline(text):
+    """Imports, class and def signatures and docstring first lines of Python source.
+
+    Imports guarded by if and try statements are kept inside the headers of
+    their clauses; clauses without imports become "...".
+    """
+    tree = ast.parse(text)
+    lines = text.split("\n")
+    guards = (ast.If, ast.Try) + ((ast.TryStar,) if hasattr(ast, "TryStar") else ())
+    out = []
+    docstring = _docstring_line(tree)
+    if docstring:
+        out.append(_docstring_literal("", docstring))
+
+    def column(lineno, col_offset):
+        line = lines[lineno - 1]
+        if line.isascii():
+            return col_offset
+        # ast counts UTF-8 bytes, str slicing counts characters
+        return len(line.encode("utf-8")[:col_offset].decode("utf-8", errors="ignore"))
+
+    def code_line(index):
+        """Whether line index (0-based) holds more than blanks or a comment."""
+        stripped = lines[index].strip()
+        return bool(stripped) and not stripped.startswith("#")
+
+    def header(start, body):
+        """Add the header lines from line start up to body, the block's statements.
+
+        Returns the body's indent, or None when the body shares the
+        header's last line (which is then added cut before the body).
+        """
+        first = body[0]
+        first_line = min([first.lineno] + [d.lineno for d in getattr(first, "decorator_list", ())])
+        text = lines[first_line - 1]
+        if first_line == first.lineno:
+            cut = column(first.lineno, first.col_offset)
+        else:
+            cut = len(text) - len(text.lstrip())  # Decorated: starts at its first "@" line
+        if text[:cut].strip():
+            out.extend(lines[start - 1:first_line - 1])
+            out.append(text[:cut].rstrip())
+            return None
+        # Only blank and comment lines sit between the colon and the body
+        end = first_line - 1
+        while end > start and not code_line(end - 1):
+            end -= 1
+        out.extend(lines[start - 1:end])
+        return text[:cut]
+
+    def has_import(node):
+        return any(isinstance(child, (ast.Import, ast.ImportFrom)) for child in ast.walk(node))
+
+    def clauses(node):
+        """(clause keyword or None, statements) per clause of an if or try statement.
+
+        else and finally have no node of their own, so they get None.
+        """
+        if isinstance(node, ast.If):
+            found = [(node, node.body)]
+            while len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If) \
+                    and lines[node.orelse[0].lineno - 1].lstrip().startswith("elif"):
+                node = node.orelse[0]
+                found.append((node, node.body))
+            return found + ([(None, node.orelse)] if node.orelse else [])
+        return ([(node, node.body)] + [(handler, handler.body) for handler in node.handlers]
+                + [(None, body) for body in (node.orelse, node.finalbody) if body])
+
+    def visit(body):
+        for node in body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                out.extend(lines[node.lineno - 1:node.end_lineno])
+            elif isinstance(node, guards) and has_import(node):
+                previous = None
+                for keyword, clause_body in clauses(node):
+                    kept = [stmt for stmt in clause_body
+                            if isinstance(stmt, (ast.Import, ast.ImportFrom))
+                            or isinstance(stmt, guards) and has_import(stmt)]
+                    if keyword is not None:
+                        start = keyword.lineno
+                    else:
+                        # "else:" and "finally:" are the first code after the previous clause
+                        start = previous.end_lineno + 1
+                        while not code_line(start - 1):
+                            start += 1
+                    previous = clause_body[-1]
+                    indent = header(start, clause_body)
+                    if indent is None:
+                        # "try: import x" stays whole, "except ImportError: x = None" does not
+                        out[-1] = lines[clause_body[0].lineno - 1].rstrip() if kept else out[-1] + " ..."
+                    elif kept:
+                        visit(kept)
+                    else:
+                        out.append(f"{indent}...")
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                if node.col_offset == 0 and out:
+                    out.append("")
+                indent = header(start, node.body)
+                if indent is None:
+                    # One-liner such as "def f(): pass"
+                    out[-1] += " ..."
+                    continue
+                docstring = _docstring_line(node)
+                if docstring:
+                    out.append(_docstring_literal(indent, docstring))
+                before = len(out)
+                if isinstance(node, ast.ClassDef):
+                    visit(node.body)
+                if len(out) == before:
+                    out.append(f"{indent}...")
+    visit(tree.body)
+    return "\n".join(out)
+
+
+# Strings and comments (skipped), braces and semicolons; Rust quotes also
+# start lifetimes, so there a quote only opens a single-character literal
+_C_TOKEN_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''
+                         r'|`(?:\\.|[^`\\])*`|[{};]', re.DOTALL)
+_RUST_TOKEN_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.[^\']*|[^\\\'])\''
+                            r'|[{};]', re.DOTALL)
+_C_NOISE_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|`(?:\\.|[^`\\])*`', re.DOTALL)
+# Blocks opened after these keywords keep their contents (fields, method signatures)
+_C_CONTAINER_RE = re.compile(
+    r'\b(?:class|struct|interface|namespace|enum|union|trait|impl|mod|object|record'
+    r'|protocol|extension|module|extern)\b')
+
+
+def _c_like_outline(text, language):
+    """Source with the bodies of functions (and other non-type blocks) elided to "{ ... }".
+
+    Works on tokens rather than a grammar: strings and comments are skipped,
+    and a block is kept when the code before its "{" names a class, struct,
+    interface, namespace or similar container.
+    """
+    token_re = _RUST_TOKEN_RE if language == "rust" else _C_TOKEN_RE
+    out = []
+    pos = 0  # Text before this offset has been copied or elided
+    header_start = 0  # Start of the statement the next "{" belongs to
+    skip_depth = 0
+    for match in token_re.finditer(text):
+        token = match.group()
+        if len(token) != 1:
+            continue
+        if skip_depth:
+            if token == "{":
+                skip_depth += 1
+            elif token == "}":
+                skip_depth -= 1
+                if skip_depth == 0:
+                    out.append(" ... }")
+                    pos = header_start = match.end()
+        elif token == "{":
+            header = _C_NOISE_RE.sub("", text[header_start:match.start()])
+            if not _C_CONTAINER_RE.search(header):
+                out.append(text[pos:match.end()])
+                skip_depth = 1
+            header_start = match.end()
+        else:
+            header_start = match.end()
+    if not skip_depth:
+        out.append(text[pos:])
+    outline = "".join(out)
+    # Elided bodies leave runs of blank lines behind
+    return re.sub(r"\n[ \t]*(?:\n[ \t]*)+\n", "\n\n", outline)
+
+
+def outline_source(text, language):
+    """Outline source text (see OUTLINE_POLICY); Python raises SyntaxError if it does not parse."""
+    if language == "python":
+        return _python_outline(text)
+    return _c_like_outline(text, language)
+
+
+def outline_file(file_path):
+    """Outline a project file, or return None if it cannot be read or parsed (runs in a worker process)."""
+    try:
+        with open_project_text(file_path) as f:
+            text = f.read()
+        return outline_source(text, get_language_from_extension(Path(file_path).suffix))
+    except (OSError, SyntaxError, ValueError, RecursionError) + ARCHIVE_READ_ERRORS:
+        return None
+
+
+class OutlineJobs:
+    """Outlines files in a process pool while the bundle is written, so each
+    one is likely ready by the time the writer reaches it.
+
+    Archive members are outlined in this process when asked for, as they
+    are read through the archive opened here.
+    """
+
+    def __init__(self, file_paths):
+        self.executor = None
+        self.futures = {}
+        pooled = [file_path for file_path in file_paths if _archive_member(file_path) is None]
+        if len(pooled) > 1:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=OUTLINE_WORKERS)
+            self.futures = {file_path: self.executor.submit(outline_file, file_path)
+                            for file_path in pooled}
+
+    def get(self, file_path, cancel_event=None):
+        """Return the outline of file_path, or None if it does not parse or
+        cancel_event was set while waiting for it."""
+        future = self.futures.pop(file_path, None)
+        if future is None:
+            return outline_file(file_path)
+        while True:
+            try:
+                return future.result(timeout=PROGRESS_UPDATE_INTERVAL)
+            except concurrent.futures.TimeoutError:
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+            except Exception:
+                return None  # A worker died; the file gets the default policy
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# --- Selection profiles ---
+
+
+def normalize_extension(ext):
+    ext = ext.strip().lower()
+    return ext if ext.startswith(".") else "." + ext
+
+
+def _glob_to_regex(pattern):
+    """Translate a path glob: * and ? stay within one directory, **/ spans any
+    number of them, and patterns without a slash match the file name anywhere."""
+    pattern = pattern.strip().replace("\\", "/").strip("/")
+    out = [] if "/" in pattern else ["(?:.*/)?"]
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                out.append(fnmatch.translate(pattern[i:end + 1])[4:-3])
+                i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+def _compile_globs(patterns):
+    if not patterns:
+        return None
+    # One alternation per list keeps matching to a single regex call per path
+    return re.compile("(?:" + "|".join(_glob_to_regex(p) for p in patterns) + r")(?:/.*)?\Z")
+
+
+def compile_selection_profile(profile):
+    """Return a predicate telling whether a "/"-separated relative path is selected.
+
+    A file is selected if it is listed in "paths" (or sits in a listed folder)
+    or matches an "include" glob, and matches no "exclude" glob. A profile
+    with neither a "paths" nor an "include" key starts from every file.
+    "extensions" is not used here; it sets the file type filter.
+    """
+    explicit = {p.replace("\\", "/").strip("/") for p in profile.get("paths", [])}
+    include = _compile_globs(profile.get("include"))
+    exclude = _compile_globs(profile.get("exclude"))
+    select_everything = "paths" not in profile and "include" not in profile
+
+    def is_listed(rel_path):
+        if rel_path in explicit:
+            return True
+        cut = rel_path.rfind("/")
+        while cut > 0:
+            rel_path = rel_path[:cut]
+            if rel_path in explicit:
+                return True
+            cut = rel_path.rfind("/")
+        return False
+
+    def matches(rel_path):
+        if exclude is not None and exclude.match(rel_path):
+            return False
+        if select_everything:
+            return True
+        return bool((explicit and is_listed(rel_path))
+                    or (include is not None and include.match(rel_path)))
+
+    return matches
+
+
+def extend_selection_profile(profile, additions):
+    """Return a copy of profile with the pattern lists given in additions appended."""
+    profile = dict(profile or {})
+    for key in ("paths", "include", "exclude", "extensions"):
+        if additions.get(key) is not None:
+            profile[key] = list(profile.get(key, [])) + list(additions[key])
+    return profile
+
+
+def load_selection_profiles(base_dir):
+    """Return the project's saved profiles as {name: profile}."""
+    try:
+        with open(Path(base_dir) / PROJECT_STATE_DIR / "profiles.json", "r",
+                  encoding="utf-8") as f:
+            profiles = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return profiles if isinstance(profiles, dict) else {}
+
+
+def save_selection_profiles(base_dir, profiles):
+    state_dir = Path(base_dir) / PROJECT_STATE_DIR
+    state_dir.mkdir(exist_ok=True)
+    temp_path = state_dir / "profiles.json.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=2, sort_keys=True)
+    os.replace(temp_path, state_dir / "profiles.json")
+
+
+# --- Python import graph ---
+
+
+def parse_python_imports(path):
+    """Return ``(mtime_ns, imports)`` for a Python file (runs in a worker process).
+
+    Each import is a ``(module, level, names)`` tuple as found by ast; files
+    that do not parse yield no imports.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    with open(path, "rb") as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, filename=str(path))
+    except (SyntaxError, ValueError):
+        return mtime_ns, []
+
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append((alias.name, 0, []))
+        elif isinstance(node, ast.ImportFrom):
+            imports.append((node.module or "", node.level,
+                           [alias.name for alias in node.names]))
+    return mtime_ns, imports
+
+
+def resolve_python_import(base_dir, importer_rel, module, level, names):
+    """Map one import statement to project files (relative posix paths)."""
+    base_dir = Path(base_dir)
+    module_parts = module.split(".") if module else []
+    if level:
+        package = Path(importer_rel).parent
+        for _ in range(level - 1):
+            package = package.parent
+        roots = [package]
+    else:
+        roots = [Path(root) for root in IMPORT_SOURCE_ROOTS]
+
+    found = []
+    for root in roots:
+        package_dir = root.joinpath(*module_parts)
+        candidates = []
+        if module_parts:
+            candidates.append(package_dir.with_name(
+                module_parts[-1] + ".py"))
+            candidates.append(package_dir / "__init__.py")
+        # "from pkg import name" may name a submodule rather than an attribute
+        for name in names:
+            if name != "*":
+                candidates.append(package_dir / (name + ".py"))
+                candidates.append(package_dir / name / "__init__.py")
+        for candidate in candidates:
+            if (base_dir / candidate).is_file():
+                found.append(candidate.as_posix())
+        if found:
+            break
+    return found
+
+
+class ImportGraphCache:
+    """Parsed imports of a project's Python files, keyed by path and mtime.
+
+    Stored in the project's PROJECT_STATE_DIR so later sessions skip
+    re-parsing unchanged files.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir)
+        self.cache_path = self.base_dir / PROJECT_STATE_DIR / "import-cache.json"
+        self.entries = None
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.entries is not None:
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def imports_for(self, rel_paths, executor=None):
+        """Return {rel_path: imports}, parsing only new or modified files."""
+        with self._lock:
+            self._load()
+            result = {}
+            stale = []
+            for rel_path in rel_paths:
+                try:
+                    mtime_ns = (self.base_dir / rel_path).stat().st_mtime_ns
+                except OSError:
+                    continue
+                entry = self.entries.get(rel_path)
+                if entry is not None and entry["mtime_ns"] == mtime_ns:
+                    result[rel_path] = entry["imports"]
+                else:
+                    stale.append(rel_path)
+
+            full_paths = [str(self.base_dir / rel_path) for rel_path in stale]
+            if executor is not None and len(stale) > 1:
+                parsed = executor.map(parse_python_imports, full_paths)
+            else:
+                parsed = map(parse_python_imports, full_paths)
+            for rel_path, (mtime_ns, imports) in zip(stale, parsed):
+                self.entries[rel_path] = {"mtime_ns": mtime_ns,
+                                          "imports": [list(i) for i in imports]}
+                result[rel_path] = self.entries[rel_path]["imports"]
+                self.dirty = True
+            return result
+
+    def save(self):
+        """Write the cache back; projects that are not writable just skip it."""
+        with self._lock:
+            if not self.dirty or self.entries is None:
+                return
+            try:
+                self.cache_path.parent.mkdir(exist_ok=True)
+                temp_path = self.cache_path.with_suffix(".tmp")
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.entries, f)
+                os.replace(temp_path, self.cache_path)
+                self.dirty = False
+            except OSError as e:
+                print(f"Could not save import cache: {e}")
+
+
+def python_import_closure(base_dir, start_rel_paths, max_depth, cache, cancel_event=None):
+    """Return the start files plus the project modules they import, transitively.
+
+    ``max_depth`` limits how many import hops are followed (None for no
+    limit). Each level is parsed in one process pool batch.
+    """
+    closure = set(start_rel_paths)
+    frontier = list(start_rel_paths)
+    depth = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=IMPORT_PARSE_WORKERS) as executor:
+        while frontier and (max_depth is None or depth < max_depth):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            parsed = cache.imports_for(frontier, executor)
+            next_frontier = []
+            for rel_path in frontier:
+                for module, level, names in parsed.get(rel_path, []):
+                    for target in resolve_python_import(base_dir, rel_path, module, level, names):
+                        if target not in closure:
+                            closure.add(target)
+                            next_frontier.append(target)
+            frontier = next_frontier
+            depth += 1
+    return closure
+
+
+# --- Folder tree ---
+
+
+class FolderNode:
+    """One folder of the project tree.
+
+    Nodes use __slots__ and hold interned names (see intern_name), so trees
+    of a million files stay small. ``files`` is a sorted tuple of names,
+    ``subfolders`` maps names to nodes in display order, ``is_large`` marks
+    folders with more files than were kept and ``skipped`` maps folders the
+    walk refused to the reason (None if there are none). ``sizes`` holds the
+    byte size of each file in ``files`` as an array, or None if unknown, and
+    ``generated`` maps generated files to the reason (see
+    mark_generated_files), or is None.
+    """
+
+    __slots__ = ("subfolders", "files", "sizes", "is_large", "skipped", "generated")
+
+    def __init__(self, files=(), is_large=False, sizes=None):
+        self.subfolders = {}
+        self.files = files
+        self.sizes = sizes
+        self.is_large = is_large
+        self.skipped = None
+        self.generated = None
+
+    def has_children(self):
+        return bool(self.subfolders or self.files or self.skipped)
+
+    def to_dict(self):
+        """The tree as plain nested dicts, e.g. for JSON."""
+        tree = {"subfolders": {name: child.to_dict() for name, child in self.subfolders.items()},
+                "files": list(self.files), "is_large": self.is_large}
+        if self.skipped:
+            tree["skipped"] = dict(self.skipped)
+        if self.generated:
+            tree["generated"] = dict(self.generated)
+        return tree
+
+
+def mark_generated_files(node, directory=None):
+    """Fill node.generated from its file names, sniffing big files in directory if given."""
+    generated = None
+    sizes = node.sizes
+    for index, name in enumerate(node.files):
+        size = sizes[index] if sizes is not None else 0
+        reason = classify_generated_file(
+            name, size, os.path.join(directory, name) if directory is not None else None)
+        if reason:
+            if generated is None:
+                generated = {}
+            generated[name] = reason
+    node.generated = generated
+
+
+# Names repeat across folders (__init__.py, index.js, src, tests); one shared
+# string per distinct name is kept for the tree and the selection state
+intern_name = sys.intern
+
+
+# --- Selection heat ---
+
+
+class SelectionHeat:
+    """Bytes and file counts of the selection per folder and per extension.
+
+    Changes are recorded one file at a time (update) against the file's own
+    folder, and settle() carries them up the folder chains in one pass, so a
+    bulk change costs one walk per folder rather than per file.
+    ``folder_bytes``/``folder_files`` count ticked files of included types,
+    i.e. what the bundle will hold, summed over each folder's subtree ("" is
+    the whole bundle). ``ext_bytes``/``ext_files`` count ticked files per
+    extension whether or not the type is included, and
+    ``generated_bytes``/``generated_files`` the ticked generated files, which
+    only reach the bundle with include_generated.
+    """
+
+    def __init__(self, folder_parent):
+        self.folder_parent = folder_parent  # {folder: parent folder}, shared with the App
+        self.file_info = {}  # {folder: {file: (size, extension)}}
+        self.line_counts = {}  # {(folder, file): lines}, filled in lazily
+        self.ext_keys = {}  # {extension: [(folder, file)]}
+        self.excluded_exts = set()
+        self.generated = {}  # {(folder, file): reason}
+        self.include_generated = INCLUDE_GENERATED_FILES
+        self.generated_bytes = 0
+        self.generated_files = 0
+        self.ticked = set()
+        self.folder_bytes = Counter()
+        self.folder_files = Counter()
+        self.ext_bytes = Counter()
+        self.ext_files = Counter()
+        self._pending = {}  # {folder: [bytes, files]} not yet added to the folder chain
+
+    def add_files(self, folder, files, sizes, generated=None):
+        """Register a folder's files with their sizes (all unticked) and
+        which of them are generated ({file: reason})."""
+        info = self.file_info[folder] = {}
+        for file, size in zip(files, sizes):
+            ext = file_extension(file)
+            info[file] = (size, ext)
+            if ext:
+                self.ext_keys.setdefault(ext, []).append((folder, file))
+        for file, reason in (generated or {}).items():
+            self.generated[folder, file] = reason
+
+    def size(self, folder, file):
+        return self.file_info.get(folder, {}).get(file, (0, ""))[0]
+
+    def update(self, folder, file, ticked):
+        """Record a file's tick state (see settle)."""
+        key = (folder, file)
+        if (key in self.ticked) == ticked:
+            return
+        sign = 1 if ticked else -1
+        if ticked:
+            self.ticked.add(key)
+        else:
+            self.ticked.discard(key)
+        size, ext = self.file_info.get(folder, {}).get(file, (0, ""))
+        if not ext:
+            return  # Files without an extension never reach the bundle
+        self.ext_bytes[ext] += sign * size
+        self.ext_files[ext] += sign
+        if key in self.generated:
+            self.generated_bytes += sign * size
+            self.generated_files += sign
+            if not self.include_generated:
+                return
+        if ext not in self.excluded_exts:
+            self._queue(folder, sign * size, sign)
+
+    def set_extension(self, ext, included):
+        """Include or exclude a file type (see settle)."""
+        if (ext not in self.excluded_exts) == included:
+            return
+        sign = 1 if included else -1
+        if included:
+            self.excluded_exts.discard(ext)
+        else:
+            self.excluded_exts.add(ext)
+        for key in self.ext_keys.get(ext, ()):
+            if key in self.ticked and (self.include_generated or key not in self.generated):
+                folder, file = key
+                self._queue(folder, sign * self.file_info[folder][file][0], sign)
+
+    def set_generated(self, included):
+        """Include or exclude generated files (see settle)."""
+        if self.include_generated == included:
+            return
+        self.include_generated = included
+        sign = 1 if included else -1
+        for key in self.generated:
+            folder, file = key
+            size, ext = self.file_info[folder][file]
+            if key in self.ticked and ext and ext not in self.excluded_exts:
+                self._queue(folder, sign * size, sign)
+
+    def _queue(self, folder, size, files):
+        pending = self._pending.get(folder)
+        if pending is None:
+            self._pending[folder] = [size, files]
+        else:
+            pending[0] += size
+            pending[1] += files
+
+    def settle(self):
+        """Apply recorded changes to the folder totals; returns the folders that changed."""
+        changed = set()
+        pending, self._pending = self._pending, {}
+        for folder, (size, files) in pending.items():
+            while True:
+                self.folder_bytes[folder] += size
+                self.folder_files[folder] += files
+                if folder == "":
+                    break
+                changed.add(folder)
+                folder = self.folder_parent.get(folder, "")
+        return changed
+
+
+def file_extension(name):
+    """Lower-case extension of a file name ("" for none), as os.path.splitext finds it."""
+    dot = name.rfind(".")
+    if dot <= 0 or name[:dot].strip(".") == "":
+        return ""
+    return name[dot:].lower()
+
+
+def count_lines(path):
+    """Count the lines of a project file (see open_project_file)."""
+    lines = 0
+    last = b"\n"
+    with open_project_file(path) as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    return lines + (last != b"\n")
+
+
+# --- Helper list_directory ---
+
+
+def label_project_roots(root_dirs):
+    """Name each root for use as a tree prefix: {label: root}.
+
+    A single root gets the empty label, so paths stay unprefixed.
+    """
+    if len(root_dirs) == 1:
+        return {"": Path(root_dirs[0])}
+    roots = {}
+    for root in root_dirs:
+        root = Path(root)
+        label = root.name or str(root).strip("/\\:") or "root"
+        suffix = 2
+        while label in roots:
+            label = f"{root.name}-{suffix}"
+            suffix += 1
+        roots[label] = root
+    return roots
+
+
+def scan_project_root(root, tracked_only=False):
+    """Return ``(extension_counts, limited_extensions, folder_tree)`` for one root.
+
+    With tracked_only, git repositories are listed from their index in one
+    pass without opening the files, so generated files are only told by
+    name until bundle time (see split_generated_files); other directories
+    fall back to walking the disk. Zip and tar archives are listed from
+    their own member index.
+    """
+    if is_archive_path(root):
+        with TRACER.span("archive_index"):
+            return open_archive(root).scan()
+    if tracked_only:
+        sizes = {}
+        with TRACER.span("git_index") as span:
+            rel_paths = list_git_files(root, sizes)
+            span.add("paths", len(rel_paths or ()))
+        if rel_paths is not None:
+            with TRACER.span("tree_build_root"):
+                return build_tree_from_paths(rel_paths, sizes=sizes or None)
+    limited = set()
+    with TRACER.span("walk_root"):
+        counts = scan_file_extensions(root, limited)
+    with TRACER.span("tree_build_root"):
+        return counts, limited, build_folder_tree(root)
+
+
+def scan_project_roots(roots, max_workers=ROOT_SCAN_WORKERS, tracked_only=False):
+    """Scan several roots at once on one bounded thread pool.
+
+    Returns ``(extension_counts, limited_extensions, folder_tree)`` where the
+    tree holds each root as a top-level folder named by its label (a single
+    unlabelled root is returned as is).
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        scans = {label: pool.submit(scan_project_root, root, tracked_only)
+                 for label, root in roots.items()}
+        if "" in scans:
+            return scans[""].result()
+        extension_counts = Counter()
+        limited_extensions = set()
+        folder_tree = FolderNode()
+        for label in roots:
+            counts, limited, tree = scans[label].result()
+            extension_counts.update(counts)
+            limited_extensions |= limited
+            folder_tree.subfolders[intern_name(label)] = tree
+    return extension_counts, limited_extensions, folder_tree
+
+
+def root_relative_path(file_path, roots):
+    """Path of a file relative to its root, prefixed with the root's label."""
+    file_path = Path(file_path)
+    # Longest root first, so a root nested in another claims its own files
+    for label, root in sorted(roots.items(), key=lambda item: len(str(item[1])), reverse=True):
+        try:
+            relative_path = file_path.relative_to(root).as_posix()
+        except ValueError:
+            continue
+        return f"{label}/{relative_path}" if label else relative_path
+    raise ValueError(f"{file_path} is not inside any project root")
+
+
+# --- Git index ---
+
+
+def find_git_dir(repo_dir):
+    """Return the git directory of a repository root, or None."""
+    dot_git = Path(repo_dir) / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        # Worktrees and submodules point to their git directory with "gitdir: <path>"
+        try:
+            content = dot_git.read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        if content.startswith("gitdir:"):
+            git_dir = Path(repo_dir) / content[len("gitdir:"):].strip()
+            if git_dir.is_dir():
+                return git_dir
+    return None
+
+
+def _read_index_varint(data, pos):
+    """Decode the offset varint used for path prefixes in index version 4."""
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def read_git_index(index_path, sizes=None):
+    """Return the tracked paths stored in a git index file (versions 2 to 4).
+
+    Returns None when the index uses something not handled here (split or
+    sparse indexes), so the caller can ask git instead. ``sizes``, if given,
+    is filled with {path: size} from the index entries.
+    """
+    with open(index_path, "rb") as f:
+        data = f.read()
+    if data[:4] != b"DIRC":
+        return None
+    version, entry_count = struct.unpack_from(">II", data, 4)
+    if version not in (2, 3, 4):
+        return None
+
+    paths = []
+    pos = 12
+    name = b""
+    last_name = None
+    for _ in range(entry_count):
+        entry_start = pos
+        mode = struct.unpack_from(">I", data, pos + 24)[0]
+        flags = struct.unpack_from(">H", data, pos + 60)[0]
+        pos += 62
+        if version >= 3 and flags & 0x4000:
+            pos += 2  # Extended flags
+        if version == 4:
+            strip, pos = _read_index_varint(data, pos)
+            end = data.index(b"\0", pos)
+            name = name[:len(name) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            end = data.index(b"\0", pos)
+            name = data[pos:end]
+            # Entries are padded with NULs to a multiple of 8 bytes
+            pos = entry_start + ((end - entry_start + 8) & ~7)
+
+        object_type = mode & 0o170000
+        if object_type == 0o040000:
+            return None  # Sparse index directory entry
+        # Skip submodules, and the extra stages of conflicted paths
+        if object_type == 0o160000 or name == last_name:
+            continue
+        last_name = name
+        paths.append(os.fsdecode(name))
+        if sizes is not None:
+            sizes[paths[-1]] = struct.unpack_from(">I", data, entry_start + 36)[0]
+
+    # A split index keeps most entries in a shared file
+    while pos + 8 <= len(data) - 20:
+        signature = data[pos:pos + 4]
+        size = struct.unpack_from(">I", data, pos + 4)[0]
+        if signature == b"link":
+            return None
+        pos += 8 + size
+    return paths
+
+
+def list_git_files(repo_dir, sizes=None):
+    """List tracked files ("/"-separated) of a repository root, or None if it is not one.
+
+    Reads .git/index directly and falls back to ``git ls-files -z``. ``sizes``
+    is filled as in read_git_index (only when the index could be read).
+    """
+    git_dir = find_git_dir(repo_dir)
+    if git_dir is None:
+        return None
+    try:
+        paths = read_git_index(git_dir / "index", sizes)
+    except (OSError, ValueError, IndexError, struct.error):
+        paths = None
+    if paths is not None:
+        return paths
+    try:
+        result = subprocess.run(["git", "-C", str(repo_dir), "ls-files", "-z"],
+                                capture_output=True, timeout=60, check=True)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return [os.fsdecode(path) for path in result.stdout.split(b"\0") if path]
+
+
+def _is_listed_path_ignored(rel_path):
+    folder, _, name = rel_path.rpartition("/")
+    if is_ignored_file(name):
+        return True
+    return bool(folder) and (any(is_ignored_dir(part) for part in folder.split("/"))
+                             or path_contains_ignored_dir(folder))
+
+
+def build_tree_from_paths(rel_paths, rel_folders=(), sizes=None):
+    """Build the folder tree and extension counts from "/"-separated file paths.
+
+    Applies the same ignore rules and per-directory file limit as the disk
+    walk without touching the disk. ``rel_folders`` adds folders that may
+    hold no files and ``sizes`` ({path: size}) fills in the nodes' sizes.
+    Generated files are marked by name only (see mark_generated_files).
+    Returns ``(extension_counts, limited_extensions, folder_tree)`` like
+    scan_project_root.
+    """
+    def new_node():
+        # files (and sizes) stay lists until every path is in
+        return FolderNode([], sizes=[] if sizes is not None else None)
+
+    folder_tree = new_node()
+    nodes = {"": folder_tree}  # Folder path -> node, None for ignored folders
+    extension_counts = Counter()
+
+    def node_for(folder):
+        if folder in nodes:
+            return nodes[folder]
+        parent_folder, _, dir_name = folder.rpartition("/")
+        parent = node_for(parent_folder)
+        node = None
+        if parent is not None and not is_ignored_dir(dir_name) \
+                and not path_contains_ignored_dir(folder):
+            node = new_node()
+            parent.subfolders[intern_name(dir_name)] = node
+        nodes[folder] = node
+        return node
+
+    for folder in rel_folders:
+        node_for(folder)
+
+    ignored_names = {}  # File names repeat a lot across folders
+    for rel_path in rel_paths:
+        folder, _, name = rel_path.rpartition("/")
+        node = node_for(folder)
+        if node is None:
+            continue
+        ignored = ignored_names.get(name)
+        if ignored is None:
+            ignored = ignored_names[name] = is_ignored_file(name)
+        if ignored:
+            continue
+        dot = name.rfind(".")
+        if dot > 0:
+            extension_counts[name[dot:].lower()] += 1
+        if len(node.files) < MAX_FILES_PER_DIR_SCAN:
+            node.files.append(intern_name(name))
+            if sizes is not None:
+                node.sizes.append(sizes.get(rel_path, 0))
+        else:
+            node.is_large = True
+
+    for folder, node in nodes.items():
+        if node is not None:
+            if sizes is not None:
+                order = sorted(range(len(node.files)), key=lambda i: node.files[i].lower())
+                node.sizes = array.array("q", (node.sizes[i] for i in order))
+                node.files = tuple(node.files[i] for i in order)
+            else:
+                node.files = tuple(sorted(node.files, key=str.lower))
+            mark_generated_files(node)
+            if len(node.subfolders) > 1:
+                node.subfolders = dict(
+                    sorted(node.subfolders.items(), key=lambda item: item[0].lower()))
+    return extension_counts, set(), folder_tree
+
+
+# --- Archive roots ---
+
+
+ArchiveMemberStat = namedtuple("ArchiveMemberStat", "st_size st_mtime_ns")
+
+
+class _TarMemberStream(io.RawIOBase):
+    """Seekable stream over one tar member.
+
+    Members share the archive's file object, so every read and seek holds
+    the archive lock and restores its own position first.
+    """
+
+    def __init__(self, member_file, lock):
+        self._file = member_file
+        self._lock = lock
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        with self._lock:
+            self._file.seek(self._position)
+            data = self._file.read(len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        with self._lock:
+            self._position = self._file.seek(offset, whence)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+
+class ArchiveRoot:
+    """A zip or tar archive opened as a read-only project root.
+
+    Members are listed from the zip central directory or the tar headers;
+    their contents are streamed on demand, nothing is extracted.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.members = {}  # "/"-separated member path -> (info, ArchiveMemberStat)
+        self._lock = threading.Lock()
+        self._tree = None
+        self._zip = self._tar = None
+        if zipfile.is_zipfile(self.path):
+            self._zip = zipfile.ZipFile(self.path)
+            for info in self._zip.infolist():
+                if not info.is_dir():
+                    self._add(info.filename, info, info.file_size,
+                              time.mktime(info.date_time + (0, 0, -1)))
+        else:
+            self._tar = tarfile.open(self.path, "r:*")
+            for info in self._tar:
+                if info.isfile():
+                    self._add(info.name, info, info.size, info.mtime)
+
+    def _add(self, name, info, size, mtime):
+        name = name.replace("\\", "/").lstrip("/")
+        while name.startswith("./"):
+            name = name[2:]
+        # Never let a member name point outside the root
+        if name and ".." not in name.split("/"):
+            self.members[name] = (info, ArchiveMemberStat(size, int(mtime * 1e9)))
+
+    def _member(self, name):
+        try:
+            return self.members[name]
+        except KeyError:
+            raise FileNotFoundError(f"{name} is not in {self.path}") from None
+
+    def stat(self, name):
+        return self._member(name)[1]
+
+    def open(self, name):
+        """Open a member as a binary stream."""
+        info = self._member(name)[0]
+        if self._zip is not None:
+            return self._zip.open(info)  # ZipFile hands out independent streams
+        with self._lock:
+            member_file = self._tar.extractfile(info)
+        return io.BufferedReader(_TarMemberStream(member_file, self._lock), READ_CHUNK_SIZE)
+
+    def scan(self):
+        """Return ``(extension_counts, limited_extensions, folder_tree)`` for the members."""
+        if self._tree is None:
+            self._tree = build_tree_from_paths(
+                sorted(self.members),
+                sizes={name: st.st_size for name, (info, st) in self.members.items()})
+        return self._tree
+
+
+_OPEN_ARCHIVES = {}  # Absolute archive path -> ArchiveRoot, shared by all roots in this process
+_OPEN_ARCHIVES_LOCK = threading.Lock()
+# Raised by zip and tar streams on truncated or corrupt members
+ARCHIVE_READ_ERRORS = (EOFError, tarfile.TarError, zipfile.BadZipFile, zlib.error)
+
+
+def _forget_inherited_archives():
+    """Drop archives inherited by a forked worker so it reopens its own.
+
+    An inherited ArchiveRoot shares the parent's file offset and decompressor
+    state, so reads from both processes would race.
+    """
+    global _OPEN_ARCHIVES_LOCK
+    _OPEN_ARCHIVES_LOCK = threading.Lock()
+    _OPEN_ARCHIVES.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_inherited_archives)
+
+
+def is_archive_path(path):
+    path = os.fspath(path)
+    return path.lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def open_archive(path):
+    """Return the ArchiveRoot for an archive, opening it once per process."""
+    key = os.path.abspath(path)
+    with _OPEN_ARCHIVES_LOCK:
+        archive = _OPEN_ARCHIVES.get(key)
+        if archive is None:
+            archive = _OPEN_ARCHIVES[key] = ArchiveRoot(key)
+    return archive
+
+
+def _archive_member(file_path, discover=False):
+    """Return ``(archive, member name)`` if file_path lies inside an archive root.
+
+    With discover, archives not opened yet (as in worker processes) are found
+    by walking up the path.
+    """
+    file_path = os.fspath(file_path)
+    for archive_path, archive in list(_OPEN_ARCHIVES.items()):
+        if file_path.startswith(archive_path + os.sep):
+            return archive, file_path[len(archive_path) + 1:].replace(os.sep, "/")
+    if discover:
+        parent = os.path.dirname(file_path)
+        while parent != os.path.dirname(parent):
+            if is_archive_path(parent):
+                archive = open_archive(parent)
+                return archive, file_path[len(archive.path) + 1:].replace(os.sep, "/")
+            parent = os.path.dirname(parent)
+    return None
+
+
+def stat_project_file(file_path):
+    """os.stat for project files, including members of archive roots."""
+    member = _archive_member(file_path)
+    if member is None:
+        try:
+            return os.stat(file_path)
+        except NotADirectoryError:
+            member = _archive_member(file_path, discover=True)
+            if member is None:
+                raise
+    archive, name = member
+    return archive.stat(name)
+
+
+def open_project_file(file_path):
+    """Open a project file, or a member of an archive root, as a binary stream."""
+    member = _archive_member(file_path)
+    if member is None:
+        try:
+            return open(file_path, "rb")
+        except NotADirectoryError:
+            member = _archive_member(file_path, discover=True)
+            if member is None:
+                raise
+    archive, name = member
+    return archive.open(name)
+
+
+def open_project_text(file_path):
+    """Open a project file for reading as UTF-8 text, ignoring undecodable bytes."""
+    if _archive_member(file_path) is None:
+        try:
+            return open(file_path, "r", encoding="utf-8", errors="ignore")
+        except NotADirectoryError:
+            pass  # Inside an archive not opened in this process yet
+    return io.TextIOWrapper(open_project_file(file_path), encoding="utf-8", errors="ignore")
+
+
+def format_folder_tree(folder_tree, indent_char="    ", prefix=""):
+    """Render a folder tree dict the way get_tree_filtered_string renders a directory."""
+    lines = []
+    pointers = {"last": "└── ", "normal": "├── "}
+    extender = {"last": indent_char, "normal": "│" + indent_char[1:]}
+    dirs = list(folder_tree.subfolders.items())
+    if folder_tree.skipped:
+        dirs = sorted(dirs + [(name, f"skipped: {reason}")
+                              for name, reason in folder_tree.skipped.items()],
+                      key=lambda item: item[0].lower())
+    files = folder_tree.files
+
+    files_to_show = files
+    omitted_count = 0
+    if len(files) > MAX_FILES_TO_SHOW_ALL:
+        files_to_show = files[:TREE_SHOW_FIRST_FILES] + files[-TREE_SHOW_LAST_FILES:]
+        omitted_count = len(files) - len(files_to_show)
+    if folder_tree.is_large and files_to_show:
+        shown = (f"first {TREE_SHOW_FIRST_FILES} and last {TREE_SHOW_LAST_FILES}"
+                 if omitted_count else f"first {len(files)}")
+        lines.append(prefix + pointers["normal"] +
+                     f"... (directory too large, showing {shown} of {len(files)}+ files) ...")
+
+    entries = [(name, node) for name, node in dirs] + [(name, None) for name in files_to_show]
+    for i, (name, node) in enumerate(entries):
+        is_last_entry = i == len(entries) - 1
+        if omitted_count and i == len(dirs) + TREE_SHOW_FIRST_FILES:
+            lines.append(prefix + pointers["normal"] + f"... ({omitted_count} files omitted) ...")
+        pointer = pointers["last"] if is_last_entry else pointers["normal"]
+        if node is None:
+            lines.append(prefix + pointer + name)
+            continue
+        if isinstance(node, str):
+            lines.append(prefix + pointer + name + f"/ ({node})")
+            continue
+        lines.append(prefix + pointer + name + "/")
+        extend = extender["last"] if is_last_entry else extender["normal"]
+        subtree_str = format_folder_tree(node, indent_char, prefix + extend)
+        if subtree_str:
+            lines.append(subtree_str)
+    return "\n".join(lines)
+
+
+def render_root_tree(root, prefix=""):
+    """Directory tree text of a project root, listing all non-ignored files."""
+    if is_archive_path(root):
+        return format_folder_tree(open_archive(root).scan()[2], prefix=prefix)
+    return get_tree_filtered_string(root, allowed_extensions=None, prefix=prefix)
+
+
+def list_directory(path):
+    """List the visible subdirectories of path and count its files.
+
+    Uses os.scandir so entry types come from the directory read itself rather
+    than a stat call per entry. The directory mtime is returned for cache
+    validation.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    if not os.path.isdir(path):
+        raise NotADirectoryError(f"Path is not a directory: {path}")
+
+    dirs = []
+    file_count = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not is_ignored_dir(entry.name):
+                        dirs.append(entry.name)
+                elif entry.is_file():
+                    file_count += 1
+            except OSError:
+                continue
+    dirs.sort()
+    return {"dirs": dirs, "file_count": file_count, "mtime_ns": mtime_ns}
+
+
+# --- Walk guard ---
+
+
+class WalkGuard:
+    """Decides which folders one walk may enter.
+
+    Every real folder (by st_dev and st_ino) is entered at most once, so
+    symlink cycles end. A symlink to a folder the walk lists under its real
+    path anyway is refused whichever of the two comes first, so every walker
+    agrees on which name holds the files; links to the same outside folder
+    are claimed by the first in name order, as the walkers enter a folder's
+    children in that order before descending. Symlinked folders and, with
+    one_filesystem, folders on other filesystems can be refused too. Refused
+    folders are recorded in ``skipped`` as {path: reason}.
+    """
+
+    def __init__(self, root, follow_symlinks=None, one_filesystem=None):
+        self.follow_symlinks = FOLLOW_SYMLINKS if follow_symlinks is None else follow_symlinks
+        self.one_filesystem = ONE_FILESYSTEM if one_filesystem is None else one_filesystem
+        self.root_real = os.path.realpath(root)
+        self.visited = set()
+        self.skipped = {}
+        try:
+            st = os.stat(root)
+        except OSError:
+            self.root_dev = None
+        else:
+            self.root_dev = st.st_dev
+            self.visited.add((st.st_dev, st.st_ino))
+
+    def enter(self, path):
+        """Return whether the walk should descend into the folder at path."""
+        path = os.fspath(path)
+        try:
+            st = os.lstat(path)
+            is_link = stat.S_ISLNK(st.st_mode)
+            if is_link:
+                if not self.follow_symlinks:
+                    self.skipped[path] = "symlink not followed"
+                    return False
+                st = os.stat(path)
+        except OSError:
+            self.skipped[path] = "unreadable"
+            return False
+        if self.one_filesystem and st.st_dev != self.root_dev:
+            self.skipped[path] = "other filesystem"
+            return False
+        if is_link:
+            # A link to a folder holding the project (such as "/") would walk
+            # everything around it before reaching the project again
+            target = os.path.realpath(path)
+            if self.root_real == target or self.root_real.startswith(target.rstrip(os.sep) + os.sep):
+                self.skipped[path] = "link to a parent folder"
+                return False
+            if target.startswith(self.root_real.rstrip(os.sep) + os.sep):
+                rel_target = target[len(self.root_real.rstrip(os.sep)) + 1:]
+                if not path_contains_ignored_dir(rel_target) \
+                        and not any(is_ignored_dir(part) for part in rel_target.split(os.sep)):
+                    self.skipped[path] = "already listed"
+                    return False
+        key = (st.st_dev, st.st_ino)
+        if key in self.visited:
+            self.skipped[path] = "already listed"
+            return False
+        self.visited.add(key)
+        return True
+
+
+# --- Helper scan_file_extensions ---
+
+
+def scan_file_extensions(base_path, limited_extensions=None, guard=None):
+    """Count file extensions below base_path, sampling very large directories.
+
+    Extensions seen in sampled directories are added to ``limited_extensions``.
+    """
+    base_path = Path(base_path)
+    if is_ignored_dir(base_path.name) or path_contains_ignored_dir(str(base_path)):
+        return Counter()
+
+    extension_counts = Counter()
+    if limited_extensions is None:
+        limited_extensions = set()
+    guard = guard or WalkGuard(base_path)
+
+    def scan_directory(directory_path, current_depth=0):
+        """Recursively scan directory using pathlib"""
+        if current_depth > MAX_INITIAL_SCAN_DEPTH:
+            return
+
+        if path_contains_ignored_dir(str(directory_path)):
+            return
+
+        try:
+            # Get all files and subdirectories
+            all_files = []
+            subdirs = []
+
+            for item in directory_path.iterdir():
+                if item.is_file() and not is_ignored_file(item.name):
+                    all_files.append(item.name)
+                elif item.is_dir() and not is_ignored_dir(item.name):
+                    subdirs.append(item)
+            # Entered in name order, as the other walkers do
+            subdirs.sort(key=lambda item: item.name.lower())
+            subdirs = [item for item in subdirs if guard.enter(item)]
+
+            # Process files in current directory
+            if len(all_files) > MAX_FILES_PER_DIR_SCAN:
+                # For very large directories, sample files to estimate extensions
+                sampled_files = all_files[:MAX_FILES_PER_DIR_SCAN //
+                                          2] + all_files[-MAX_FILES_PER_DIR_SCAN//2:]
+                multiplier = len(all_files) / len(sampled_files)
+                # Mark that we hit a limit in this directory
+                for file in sampled_files:
+                    ext = Path(file).suffix
+                    if ext:
+                        limited_extensions.add(ext.lower())
+            else:
+                sampled_files = all_files
+                multiplier = 1
+
+            for file in sampled_files:
+                ext = Path(file).suffix
+                if ext:
+                    extension_counts[ext.lower()] += int(multiplier)
+
+            # Recursively scan subdirectories
+            for subdir in subdirs:
+                scan_directory(subdir, current_depth + 1)
+
+        except (OSError, PermissionError):
+            pass
+
+    scan_directory(base_path)
+    return extension_counts
+
+
+# --- Helper build_folder_tree ---
+
+
+def build_folder_tree(base_path, max_depth=None, current_depth=0, guard=None):
+    """Build the FolderNode tree shown in the UI.
+
+    Folders the walk guard refuses are listed in the node's skipped map.
+    """
+    base_path = Path(base_path)
+    tree = FolderNode()
+    if is_ignored_dir(base_path.name) or path_contains_ignored_dir(str(base_path)):
+        return tree
+
+    # Stop recursion if we've reached max depth (for performance)
+    if max_depth is not None and current_depth >= max_depth:
+        return tree
+
+    guard = guard or WalkGuard(base_path)
+    try:
+        dirs = []
+        files_in_dir = []
+        file_count = 0
+
+        for entry in base_path.iterdir():
+            name = entry.name
+            if path_contains_ignored_dir(str(entry)) or is_ignored_dir(name):
+                continue
+            # One stat answers both is_dir and is_file, and gives the size
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                dirs.append(entry)
+            elif stat.S_ISREG(st.st_mode) and not is_ignored_file(name):
+                file_count += 1
+                # For performance, limit the number of files we process
+                if file_count <= MAX_FILES_PER_DIR_SCAN:
+                    # Include ALL non-ignored files, not just those with known extensions
+                    # This ensures __init__.py and other files are always shown
+                    files_in_dir.append((intern_name(name), st.st_size))
+                elif file_count == MAX_FILES_PER_DIR_SCAN + 1:
+                    # Mark as large directory
+                    tree.is_large = True
+
+        files_in_dir.sort(key=lambda item: item[0].lower())
+        tree.files = tuple(name for name, size in files_in_dir)
+        tree.sizes = array.array("q", (size for name, size in files_in_dir))
+        mark_generated_files(tree, str(base_path))
+        dirs.sort(key=lambda e: e.name.lower())
+        # Entered in name order before descending, as the other walkers do
+        for entry in dirs:
+            if not guard.enter(entry):
+                if tree.skipped is None:
+                    tree.skipped = {}
+                tree.skipped[entry.name] = guard.skipped[str(entry)]
+        dirs = [entry for entry in dirs if str(entry) not in guard.skipped]
+
+        # For performance, limit recursion depth for initial build
+        next_max_depth = 3 if max_depth is None else max_depth  # Initial build depth limit
+
+        for entry in dirs:
+            sub_tree = build_folder_tree(
+                entry, next_max_depth, current_depth + 1, guard)
+            # Always include directories, even if empty
+            tree.subfolders[intern_name(entry.name)] = sub_tree
+    except OSError:
+        pass
+    return tree
+
+
+# --- Helper get_language_from_extension ---
+
+
+def get_language_from_extension(ext):
+    """Map file extensions to language identifiers for markdown code blocks."""
+    ext = ext.lower()
+
+    # Programming languages
+    language_map = {
+        '.py': 'python',
+        '.js': 'javascript',
+        '.ts': 'typescript',
+        '.tsx': 'tsx',
+        '.jsx': 'jsx',
+        '.java': 'java',
+        '.c': 'c',
+        '.cpp': 'cpp',
+        '.cc': 'cpp',
+        '.cxx': 'cpp',
+        '.h': 'c',
+        '.hpp': 'cpp',
+        '.cs': 'csharp',
+        '.php': 'php',
+        '.rb': 'ruby',
+        '.go': 'go',
+        '.rs': 'rust',
+        '.swift': 'swift',
+        '.kt': 'kotlin',
+        '.scala': 'scala',
+        '.sh': 'bash',
+        '.bash': 'bash',
+        '.zsh': 'zsh',
+        '.fish': 'fish',
+        '.ps1': 'powershell',
+        '.bat': 'batch',
+        '.cmd': 'batch',
+
+        # Web technologies
+        '.html': 'html',
+        '.htm': 'html',
+        '.xml': 'xml',
+        '.css': 'css',
+        '.scss': 'scss',
+        '.sass': 'sass',
+        '.less': 'less',
+
+        # Data formats
+        '.json': 'json',
+        '.yaml': 'yaml',
+        '.yml': 'yaml',
+        '.toml': 'toml',
+        '.ini': 'ini',
+        '.cfg': 'ini',
+        '.conf': 'conf',
+
+        # Documentation
+        '.md': 'markdown',
+        '.markdown': 'markdown',
+        '.rst': 'rst',
+        '.txt': 'text',
+
+        # Database
+        '.sql': 'sql',
+
+        # Other
+        '.dockerfile': 'dockerfile',
+        '.gitignore': 'gitignore',
+        '.env': 'bash',
+        '.r': 'r',
+        '.m': 'matlab',
+        '.pl': 'perl',
+        '.lua': 'lua',
+        '.vim': 'vim',
+        '.asm': 'assembly',
+        '.s': 'assembly',
+    }
+
+    return language_map.get(ext, '')
+
+
+# --- Helper get_tree_filtered_string ---
+
+
+def get_tree_filtered_string(start_path, allowed_extensions=(), indent_char="    ", prefix="",
+                             guard=None):
+    start_path = Path(start_path)
+    if path_contains_ignored_dir(str(start_path)):
+        return ""
+    guard = guard or WalkGuard(start_path)
 
     lines = []
     pointers = {"last": "└── ", "normal": "├── "}
@@ -1632,6 +4837,9 @@ def get_tree_filtered_string(start_path, allowed_extensions=(), indent_char="
             files_to_show = first_files + last_files
             omitted_count = len(files) - len(files_to_show)
 
+        # Enter every folder of this level before descending, as the other walkers do
+        entered = {entry for entry in dirs if guard.enter(entry)}
+
         # Combine directories first, then files
         all_entries = dirs + files_to_show
 
@@ -1656,9 +4864,13 @@ def get_tree_filtered_string(start_path, allowed_extensions=(), indent_char="
             extend = extender["last"] if is_last_entry else extender["normal"]
 
             if entry.is_dir():
+                if entry not in entered:
+                    lines.append(prefix + pointer + entry.name +
+                                 f"/ (skipped: {guard.skipped[str(entry)]})")
+                    continue
                 lines.append(prefix + pointer + entry.name + "/")
                 subtree_str = get_tree_filtered_string(
-                    entry, allowed_extensions, indent_char, prefix + extend
+                    entry, allowed_extensions, indent_char, prefix + extend, guard
                 )
                 if subtree_str:
                     lines.append(subtree_str)
@@ -1671,6 +4883,1886 @@ def get_tree_filtered_string(start_path, allowed_extensions=(), indent_char="
     return "\n".join(lines)
 
 
-if __name__ == "__main__":
-    app = App()
+def list_tree_dir(root, rel_dir):
+    """Return the visible (folder names, file names) directly inside a folder of a root."""
+    if is_archive_path(root):
+        node = open_archive(root).scan()[2]
+        for part in rel_dir.split("/") if rel_dir else ():
+            node = node.subfolders.get(part)
+            if node is None:
+                return [], []
+        return list(node.subfolders), list(node.files)
+    dirs = []
+    files = []
+    try:
+        with os.scandir(os.path.join(root, *rel_dir.split("/"))) as entries:
+            for entry in entries:
+                if path_contains_ignored_dir(entry.path):
+                    continue
+                if entry.is_dir():
+                    if not is_ignored_dir(entry.name):
+                        dirs.append(entry.name)
+                elif entry.is_file() and not is_ignored_file(entry.name):
+                    files.append(entry.name)
+    except OSError:
+        pass
+    return dirs, files
+
+
+def build_selection_tree(root, rel_paths):
+    """Pruned tree of a root holding the folders that lead to the selected files.
+
+    Each of those folders is listed once, so its other files and folders show
+    up as siblings. Nodes are ``{"dirs": {name: node or None}, "files":
+    {name: selected}}``; sibling folders are None as they are not expanded.
+    """
+    tree = {"dirs": {}, "files": {}}
+    nodes = {"": tree}
+    for rel_path in rel_paths:
+        folder, _, name = rel_path.rpartition("/")
+        node = tree
+        walked = ""
+        for part in folder.split("/") if folder else ():
+            walked = f"{walked}/{part}" if walked else part
+            if node["dirs"].get(part) is None:
+                node["dirs"][part] = nodes[walked] = {"dirs": {}, "files": {}}
+            node = node["dirs"][part]
+        node["files"][name] = True
+    for rel_dir, node in nodes.items():
+        dirs, files = list_tree_dir(root, rel_dir)
+        for name in dirs:
+            node["dirs"].setdefault(name, None)
+        for name in files:
+            node["files"].setdefault(name, False)
+    return tree
+
+
+def _prepare_tree(node):
+    """Turn a build_selection_tree node into the layout _budget_tree works on.
+
+    Entries are ``(label, child, essential)`` with folders first and
+    single-child folder chains collapsed ("a/b/c/"). Each level also records
+    the lines needed to show just the essential entries (folders leading to
+    selected files and the selected files) and how many folders and files it
+    holds.
+    """
+    entries = []
+    required = dirs = files = 0
+    for name in sorted(node["dirs"], key=str.lower):
+        child = node["dirs"][name]
+        while child is not None and not child["files"] and len(child["dirs"]) == 1:
+            (sub_name, sub_child), = child["dirs"].items()
+            if sub_child is None:
+                break
+            name, child = f"{name}/{sub_name}", sub_child
+        dirs += name.count("/") + 1
+        if child is not None:
+            child = _prepare_tree(child)
+            required += 1 + child["required"]
+            dirs += child["dirs"]
+            files += child["files"]
+        entries.append((name + "/", child, child is not None))
+    for name in sorted(node["files"], key=str.lower):
+        files += 1
+        required += node["files"][name]
+        entries.append((name, None, node["files"][name]))
+    if not all(essential for _, _, essential in entries):
+        required += 1  # Summary of the siblings
+    return {"entries": entries, "required": required, "dirs": dirs, "files": files}
+
+
+def _summarize_tree(dirs, files):
+    return f"{dirs} dirs, {files} files"
+
+
+def _budget_tree(tree, budget):
+    """Lay out a _prepare_tree result in at most budget lines.
+
+    Returns ``(items, lines)`` where items are ``(label, children)`` pairs and
+    children is None for leaves. The essential entries get their lines
+    first; sibling entries use whatever is left, deeper folders first, and
+    entries that do not fit are summarised as "N dirs, M files".
+    """
+    if budget < 1:
+        return [], 0
+    entries = tree["entries"]
+    pending = sum(1 + child["required"] if child is not None else 1
+                  for _, child, essential in entries if essential)
+    summary = 0 if all(essential for _, _, essential in entries) else 1
+
+    shown = {}  # Entry index -> item
+    lines = 0
+    for index, (label, child, essential) in enumerate(entries):
+        if not essential:
+            continue
+        need = 1 + child["required"] if child is not None else 1
+        pending -= need
+        # Keep a line for the summary while anything else may be left out
+        room = budget - lines - (1 if len(entries) - len(shown) > 1 else 0)
+        if room < 1:
+            break
+        if child is None:
+            shown[index] = (label, None)
+            lines += 1
+            continue
+        spare = budget - lines - need - pending - summary
+        children, child_lines = _budget_tree(
+            child, min(room, need + max(0, spare)) - 1)
+        if children:
+            shown[index] = (label, children)
+        else:
+            shown[index] = (f"{label} ({_summarize_tree(child['dirs'], child['files'])})", None)
+        lines += 1 + child_lines
+
+    left_out = [index for index in range(len(entries)) if index not in shown]
+    room = budget - lines
+    if len(left_out) > room or any(entries[index][2] for index in left_out):
+        room -= 1  # Line for the summary
+    for index in left_out:
+        if room < 1:
+            break
+        label, child, essential = entries[index]
+        if not essential:
+            shown[index] = (label, None)
+            lines += 1
+            room -= 1
+
+    items = [shown[index] for index in sorted(shown)]
+    dirs = files = 0
+    for index, (label, child, _) in enumerate(entries):
+        if index in shown:
+            continue
+        if label.endswith("/"):
+            dirs += label.count("/")
+            if child is not None:
+                dirs += child["dirs"]
+                files += child["files"]
+        else:
+            files += 1
+    if (dirs or files) and lines < budget:
+        items.append((f"... ({_summarize_tree(dirs, files)}) ...", None))
+        lines += 1
+    return items, lines
+
+
+def _format_tree_items(items, indent_char="    ", prefix=""):
+    lines = []
+    for i, (label, children) in enumerate(items):
+        is_last_entry = i == len(items) - 1
+        lines.append(prefix + ("└── " if is_last_entry else "├── ") + label)
+        if children:
+            lines.extend(_format_tree_items(
+                children, indent_char,
+                prefix + (indent_char if is_last_entry else "│" + indent_char[1:])))
+    return lines
+
+
+def get_selection_tree_string(roots, selected_files_paths, budget=TREE_LINE_BUDGET):
+    """Directory tree showing only where the selected files sit, in at most budget lines.
+
+    ``roots`` is {label: dir} as in label_project_roots; with several roots
+    each one that has selected files gets its own "label/" section.
+    """
+    rel_paths = {label: [] for label in roots}
+    for file_path in selected_files_paths:
+        rel_path = root_relative_path(file_path, roots)
+        if "" in roots:
+            rel_paths[""].append(rel_path)
+        else:
+            label, _, rest = rel_path.partition("/")
+            rel_paths[label].append(rest)
+
+    if "" in roots:
+        items, _ = _budget_tree(
+            _prepare_tree(build_selection_tree(roots[""], rel_paths[""])), budget)
+        return "\n".join(_format_tree_items(items))
+    sections = []
+    used = 0
+    for label, root in roots.items():
+        if not rel_paths[label] or used >= budget:
+            continue
+        items, lines = _budget_tree(_prepare_tree(build_selection_tree(root, rel_paths[label])),
+                                    budget - used - 1)
+        sections.append("\n".join([f"{label}/"] + _format_tree_items(items, prefix="    ")))
+        used += 1 + lines
+    return "\n".join(sections)
+
+
+# --- Helper format_size ---
+
+
+def format_size(num_bytes):
+    """Format a byte count as KB, or MB from 1 MB upwards."""
+    kb_size = num_bytes / 1024
+    mb_size = kb_size / 1024
+    return f"{mb_size:.2f} MB" if mb_size >= 1 else f"{kb_size:.1f} KB"
+
+
+def heat_color(num_bytes):
+    """Colour for a folder holding num_bytes of the selection (None below HEAT_COLORS)."""
+    for threshold, color in HEAT_COLORS:
+        if num_bytes >= threshold:
+            return color
+    return None
+
+
+def format_tokens(num_bytes):
+    """Estimate the tokens of num_bytes of text (see BYTES_PER_TOKEN), e.g. "~12k tokens"."""
+    tokens = num_bytes / BYTES_PER_TOKEN
+    if tokens >= 1e6:
+        return f"~{tokens / 1e6:.1f}M tokens"
+    if tokens >= 1e3:
+        return f"~{tokens / 1e3:.0f}k tokens"
+    return f"~{tokens:.0f} tokens"
+
+
+# --- Large-file policies ---
+
+
+def large_file_policy(file_path, size):
+    """Return the policy that applies to a file of this size, or None if it fits."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if SLIM_NOTEBOOKS and extension == ".ipynb":
+        return None  # Slimmed instead, see slim_notebook
+    if (OUTLINE_POLICY is not None and size > OUTLINE_POLICY["max_size"]
+            and extension not in LARGE_FILE_POLICIES
+            and get_language_from_extension(extension) in OUTLINE_LANGUAGES):
+        return OUTLINE_POLICY
+    policy = LARGE_FILE_POLICIES.get(extension, LARGE_FILE_POLICY)
+    if size > policy["max_size"]:
+        return policy
+    return None
+
+
+def plan_large_files(file_paths, exclude=None):
+    """Stat the files and list (path, size, policy) for those over their limit."""
+    plan = []
+    for file_path in file_paths:
+        if exclude and file_path in exclude:
+            continue
+        try:
+            size = stat_project_file(file_path).st_size
+        except OSError:
+            continue
+        policy = large_file_policy(file_path, size)
+        if policy is not None:
+            plan.append((file_path, size, policy))
+    return plan
+
+
+def describe_large_file_policy(policy):
+    if policy["mode"] == "outline":
+        return "imports and signatures only"
+    if policy["mode"] == "skip":
+        return f"skipped (over {format_size(policy['max_size'])})"
+    if policy["mode"] == "max_bytes":
+        return f"first {format_size(policy['max_bytes'])}"
+    if policy["tail_lines"]:
+        return f"first {policy['head_lines']} and last {policy['tail_lines']} lines"
+    return f"first {policy['head_lines']} lines"
+
+
+def _read_head(f, max_lines, max_bytes):
+    """Read whole lines from the start of a binary file, up to either limit."""
+    data = bytearray()
+    newlines = 0
+    while max_lines and newlines < max_lines and len(data) < max_bytes:
+        chunk = f.read(min(READ_CHUNK_SIZE, max_bytes - len(data)))
+        if not chunk:
+            break
+        newlines += chunk.count(b"\n")
+        data += chunk
+    if newlines >= max_lines:
+        # Cut right after the last wanted line
+        end = -1
+        for _ in range(max_lines):
+            end = data.index(b"\n", end + 1)
+        del data[end + 1:]
+    return bytes(data)
+
+
+def _read_tail(f, size, max_lines, min_offset, max_bytes):
+    """Read whole lines from the end of a binary file, never before min_offset."""
+    data = b""
+    position = size
+    floor = max(min_offset, size - max_bytes)
+    while max_lines and position > floor:
+        step = min(READ_CHUNK_SIZE, position - floor)
+        position -= step
+        f.seek(position)
+        data = f.read(step) + data
+        # One extra newline: the file usually ends with one
+        if data.count(b"\n") > max_lines:
+            break
+    lines = data.splitlines(keepends=True)
+    if position > min_offset and lines:
+        lines = lines[1:]  # First line is only partly read
+    return b"".join(lines[-max_lines:]) if max_lines else b""
+
+
+def read_large_file(file_path, size, policy):
+    """Read only the part of a file its policy keeps.
+
+    Returns ``(head, tail)`` decoded as text; tail is empty unless the policy
+    keeps the end of the file. At most about max_size bytes are read.
+    """
+    with open_project_file(file_path) as f:
+        if policy["mode"] == "max_bytes":
+            data = f.read(policy["max_bytes"])
+            cut = data.rfind(b"\n")
+            if cut > 0:
+                data = data[:cut + 1]
+            return data.decode("utf-8", errors="ignore"), ""
+
+        budget = policy["max_size"] // 2
+        head = _read_head(f, policy["head_lines"], budget)
+        tail = _read_tail(f, size, policy["tail_lines"], len(head), budget)
+    return head.decode("utf-8", errors="ignore"), tail.decode("utf-8", errors="ignore")
+
+
+def write_large_file(writer, file_path, relative_path, language, size, policy):
+    """Write the part of an oversized file its policy keeps, marking what was left out.
+
+    Returns the number of bytes kept.
+    """
+    if policy["mode"] == "skip":
+        writer.skipped_file(relative_path, f"{format_size(size)} is over the "
+                                           f"{format_size(policy['max_size'])} limit")
+        return 0
+
+    head, tail = read_large_file(file_path, size, policy)
+    kept = len(head.encode("utf-8")) + len(tail.encode("utf-8"))
+    writer.begin_file(relative_path, language,
+                      note=f"truncated: {describe_large_file_policy(policy)} "
+                           f"of {format_size(size)}")
+    writer.write_content(head.rstrip("\n"))
+    writer.write_content(f"\n\n... [{format_size(max(0, size - kept))} omitted] ...")
+    if tail:
+        writer.write_content("\n\n" + tail.rstrip("\n"))
+    writer.end_file()
+    return kept
+
+
+# --- Notebooks ---
+
+
+_JSON_STRUCTURE_RE = re.compile(r'["\[\]{}]')
+_JSON_SCALAR_END_RE = re.compile(r'[,:\]}\s]')
+
+
+class _JsonStream:
+    """Reads a JSON document from a text file one value at a time.
+
+    Values are found by scanning (strings quote to quote, brackets counted)
+    and only decoded once whole, so they can also be stepped over without
+    being decoded or held in memory (see skip).
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Read more text, at least as much as is buffered so a big value takes few reads."""
+        chunk = self.f.read(max(READ_CHUNK_SIZE, len(self.buffer) - self.pos))
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def peek(self):
+        """The next non-whitespace character, or "" at the end."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at character {self.pos}")
+        self.pos += 1
+
+    def _value_end(self, keep=True):
+        """Index in the buffer just past the value at pos, reading more as needed.
+
+        The scan carries on where it stopped after each read, so every
+        character is looked at once. Without keep, the text scanned past is
+        dropped before each read instead of being kept from the value's start.
+        """
+        self.peek()
+        i = self.pos
+        depth = 0
+        in_string = False
+        moved = False
+        while True:
+            buffer = self.buffer
+            end = len(buffer)
+            while i < end:
+                if in_string:
+                    quote = buffer.find('"', i)
+                    if quote < 0:
+                        # Backslashes at the end are settled once the next read is in
+                        scanned = i
+                        i = end
+                        while i > scanned and buffer[i - 1] == "\\":
+                            i -= 1
+                        break
+                    escapes = quote
+                    while escapes > i and buffer[escapes - 1] == "\\":
+                        escapes -= 1
+                    i = quote + 1
+                    if (quote - escapes) % 2:
+                        continue  # An escaped quote
+                    in_string = False
+                    if depth == 0:
+                        return i
+                    continue
+                if depth == 0 and buffer[i] not in '"[{':
+                    # A number, true, false or null
+                    match = _JSON_SCALAR_END_RE.search(buffer, i)
+                    if match is None:
+                        i = end
+                        break
+                    return match.start()
+                match = _JSON_STRUCTURE_RE.search(buffer, i)
+                if match is None:
+                    i = end
+                    break
+                i = match.end()
+                char = match.group()
+                if char == '"':
+                    in_string = True
+                elif char in "[{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return i
+            moved = moved or i > self.pos
+            if self.eof:
+                if depth or in_string or not moved:
+                    raise ValueError("notebook JSON ends early")
+                return i
+            if not keep:
+                self.pos = i
+            start = self.pos
+            self._fill()
+            i -= start
+
+    def value(self):
+        end = self._value_end()
+        value, stop = self.decoder.raw_decode(self.buffer, self.pos)
+        if stop != end:
+            raise ValueError(f"unexpected text at character {stop}")
+        self.pos = end
+        return value
+
+    def skip(self):
+        """Step over the next value without decoding it."""
+        self.pos = self._value_end(keep=False)
+
+    def members(self):
+        """Yield the keys of the object at pos; read or skip each value before the next."""
+        self.expect("{")
+        while self.peek() != "}":
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            key = self.value()
+            self.expect(":")
+            yield key
+        self.pos += 1
+
+    def elements(self):
+        """Yield once per element of the array at pos; read or skip each before the next."""
+        self.expect("[")
+        while self.peek() != "]":
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            yield
+        self.pos += 1
+
+
+def _notebook_text(value):
+    return "".join(value) if isinstance(value, list) else str(value or "")
+
+
+def _notebook_outputs(outputs, max_lines):
+    """The text of a code cell's outputs, cut to max_lines; rich outputs are named only."""
+    lines = []
+    for output in outputs:
+        output_type = output.get("output_type")
+        if output_type == "stream":
+            lines += _notebook_text(output.get("text")).splitlines()
+        elif output_type == "error":
+            lines.append(f"{output.get('ename', 'Error')}: {output.get('evalue', '')}")
+        else:
+            data = output.get("data") or {}
+            if "text/plain" in data:
+                lines += _notebook_text(data["text/plain"]).splitlines()
+            lines += [f"[{kind} output omitted]" for kind in data if kind != "text/plain"]
+    if len(lines) > max_lines:
+        lines = lines[:max_lines] + [f"... [{len(lines) - max_lines} more lines]"]
+    return lines
+
+
+def _read_notebook_output(stream):
+    """The parts of the output at stream's position that _notebook_outputs looks at.
+
+    Data other than text/plain (images, HTML, widget state) is stepped over
+    and only its kind is kept.
+    """
+    if stream.peek() != "{":
+        raise ValueError("notebook output is not an object")
+    output = {}
+    for key in stream.members():
+        if key == "data":
+            data = output["data"] = {}
+            for kind in stream.members():
+                if kind == "text/plain":
+                    data[kind] = stream.value()
+                else:
+                    stream.skip()
+                    data[kind] = None
+        elif key in ("output_type", "text", "ename", "evalue"):
+            output[key] = stream.value()
+        else:
+            stream.skip()
+    return output
+
+
+def _read_notebook_cell(stream, max_output_lines):
+    """``(cell_type, source, output_lines)`` of the cell at stream's position.
+
+    Metadata and attachments are stepped over, and outputs too when
+    max_output_lines is 0.
+    """
+    if stream.peek() != "{":
+        raise ValueError("notebook cell is not an object")
+    cell_type, source, outputs = "code", "", []
+    for key in stream.members():
+        if key == "cell_type":
+            cell_type = stream.value()
+        elif key == "source":
+            source = _notebook_text(stream.value())
+        elif key == "outputs" and max_output_lines > 0:
+            for _ in stream.elements():
+                outputs.append(_read_notebook_output(stream))
+        else:
+            stream.skip()
+    return cell_type, source, _notebook_outputs(outputs, max_output_lines) if outputs else []
+
+
+def slim_notebook(f, max_output_lines=None):
+    """Render the notebook read from text file f as its cell sources.
+
+    The JSON is read in one pass and only the parts kept are decoded;
+    rich outputs (base64 images included) are stepped over without being
+    decoded or held in memory whole. Returns ``(language, text)``:
+    code cells as they are, markdown cells as comments, with ``# %%``
+    markers between cells and up to max_output_lines
+    (NOTEBOOK_OUTPUT_MAX_LINES) of text output after each code cell.
+    Raises ValueError if f does not hold a notebook.
+    """
+    if max_output_lines is None:
+        max_output_lines = NOTEBOOK_OUTPUT_MAX_LINES
+    stream = _JsonStream(f)
+    cells = []
+    metadata = {}
+    for key in stream.members():
+        if key == "metadata":
+            value = stream.value()
+            if isinstance(value, dict):
+                metadata = value
+        elif key == "cells":
+            for _ in stream.elements():
+                cells.append(_read_notebook_cell(stream, max_output_lines))
+        else:
+            stream.skip()
+
+    language = ((metadata.get("kernelspec") or {}).get("language")
+                or (metadata.get("language_info") or {}).get("name") or "python").lower()
+    comment = "//" if language in ("javascript", "typescript", "java", "scala", "c", "cpp",
+                                   "c++", "csharp", "c#", "go", "rust", "kotlin") else "#"
+    blocks = []
+    for cell_type, source, outputs in cells:
+        if cell_type == "code":
+            lines = [f"{comment} %%", source.rstrip("\n")]
+            if outputs:
+                lines += [f"{comment} Out:"] + [f"{comment} {line}".rstrip() for line in outputs]
+        else:
+            lines = [f"{comment} %% [{cell_type}]"]
+            lines += [f"{comment} {line}".rstrip() for line in source.splitlines()]
+        blocks.append("\n".join(lines))
+    return language, "\n\n".join(blocks)
+
+
+def format_generated_savings(generated):
+    """Summarise left-out generated files, e.g. "3 generated files left out (1.20 MB)"."""
+    count = generated["files"]
+    return (f"{count} generated file{'s' if count != 1 else ''} left out "
+            f"({format_size(generated['bytes'])})")
+
+
+def format_notebook_savings(notebooks):
+    """Summarise stats["notebooks"], e.g. "2 notebooks slimmed from 3.10 MB to 12.0 KB"."""
+    count = notebooks["files"]
+    return (f"{count} notebook{'s' if count != 1 else ''} slimmed from "
+            f"{format_size(notebooks['raw_bytes'])} to {format_size(notebooks['bytes'])}")
+
+
+# --- Bundle formats ---
+
+
+class BundleWriter:
+    """Streams a bundle in one output format to sink, a callable taking text.
+
+    File contents arrive through write_content in chunks and are escaped
+    chunk by chunk, so a file is never copied whole.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def begin(self, directory_tree):
+        pass
+
+    def begin_file(self, relative_path, language, note=None):
+        pass
+
+    def write_content(self, text):
+        self.sink(text)
+
+    def end_file(self):
+        pass
+
+    def skipped_file(self, relative_path, reason):
+        pass
+
+    def end(self):
+        pass
+
+
+class MarkdownBundleWriter(BundleWriter):
+    """Directory tree, then a heading and fenced code block per file."""
+
+    def begin(self, directory_tree):
+        self.sink("PROJECT DIRECTORY STRUCTURE:\n")
+        self.sink(directory_tree)
+        self.sink("\n\n" + "=" * 20 + " FILE CONTENTS " + "=" * 20 + "\n\n")
+
+    def begin_file(self, relative_path, language, note=None):
+        title = f"{relative_path} ({note})" if note else relative_path
+        self.sink(f"## {title}\n\n```{language}\n")
+
+    def end_file(self):
+        self.sink("\n```\n\n")
+
+    def skipped_file(self, relative_path, reason):
+        self.sink(f"## {relative_path}\n\n_[Skipped: {reason}]_\n\n")
+
+
+# Control characters XML 1.0 cannot represent even when escaped
+_XML_INVALID_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+class XmlBundleWriter(BundleWriter):
+    """<file path="..."> elements inside a <project> root, contents XML-escaped."""
+
+    def begin(self, directory_tree):
+        self.sink("<project>\n<directory_structure>\n")
+        self.sink(_XML_INVALID_CHARS.sub("\ufffd", xml_escape(directory_tree)))
+        self.sink("\n</directory_structure>\n")
+
+    def begin_file(self, relative_path, language, note=None):
+        attributes = f"path={xml_quoteattr(relative_path)} language={xml_quoteattr(language)}"
+        if note:
+            attributes += f" note={xml_quoteattr(note)}"
+        self.sink(f"<file {attributes}>\n")
+
+    def write_content(self, text):
+        # Everything replaced is a single character, so escaping each chunk is safe
+        self.sink(_XML_INVALID_CHARS.sub("\ufffd", xml_escape(text)))
+
+    def end_file(self):
+        self.sink("\n</file>\n")
+
+    def skipped_file(self, relative_path, reason):
+        self.sink(f"<file path={xml_quoteattr(relative_path)} "
+                  f"skipped={xml_quoteattr(reason)} />\n")
+
+    def end(self):
+        self.sink("</project>\n")
+
+
+class JsonlBundleWriter(BundleWriter):
+    """One JSON object per line: the tree first, then one per file."""
+
+    def begin(self, directory_tree):
+        self.sink(json.dumps({"type": "tree", "text": directory_tree},
+                             ensure_ascii=False) + "\n")
+
+    def begin_file(self, relative_path, language, note=None):
+        header = {"type": "file", "path": relative_path, "language": language}
+        if note:
+            header["note"] = note
+        # Leave the object open so the content string can be streamed into it
+        self.sink(json.dumps(header, ensure_ascii=False)[:-1] + ', "content": "')
+
+    def write_content(self, text):
+        self.sink(json.dumps(text, ensure_ascii=False)[1:-1])
+
+    def end_file(self):
+        self.sink('"}\n')
+
+    def skipped_file(self, relative_path, reason):
+        self.sink(json.dumps({"type": "file", "path": relative_path, "skipped": reason},
+                             ensure_ascii=False) + "\n")
+
+
+class PlainBundleWriter(BundleWriter):
+    """The tree and the files concatenated, each after a "==> path <==" line."""
+
+    def begin(self, directory_tree):
+        self.sink(directory_tree)
+        self.sink("\n\n")
+
+    def begin_file(self, relative_path, language, note=None):
+        title = f"{relative_path} ({note})" if note else relative_path
+        self.sink(f"==> {title} <==\n")
+
+    def end_file(self):
+        self.sink("\n\n")
+
+    def skipped_file(self, relative_path, reason):
+        self.sink(f"==> {relative_path} (skipped: {reason}) <==\n\n")
+
+
+BUNDLE_FORMATS = {
+    "markdown": MarkdownBundleWriter,
+    "xml": XmlBundleWriter,
+    "jsonl": JsonlBundleWriter,
+    "plain": PlainBundleWriter,
+}
+
+
+# --- Secret redaction ---
+
+
+class SecretRedactor:
+    """Replaces the matches of REDACTION_RULES with [REDACTED:kind].
+
+    Each anchor is looked up once with plain substring search, which runs
+    at memory speed, and the regexes of the rules sharing it then only run
+    on the lines holding a hit (from the first hit onwards for (?s) rules,
+    which may span lines), so text without secrets costs a few scans.
+    All-lowercase anchors are looked up in the lower-cased text.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = []
+        self.block_rules = []
+        anchors = {}
+        for kind, rule_anchors, pattern in REDACTION_RULES if rules is None else rules:
+            regex = re.compile(pattern)
+            placeholder = f"[REDACTED:{kind}]"
+            if "secret" in regex.groupindex:
+                def replace(match, placeholder=placeholder):
+                    start, end = match.span("secret")
+                    offset = match.start()
+                    whole = match.group()
+                    return whole[:start - offset] + placeholder + whole[end - offset:]
+            else:
+                replace = placeholder
+            if regex.flags & re.DOTALL:
+                self.block_rules.append((kind, tuple(rule_anchors), regex, replace))
+                continue
+            index = len(self.rules)
+            self.rules.append((kind, regex, replace))
+            for anchor in rule_anchors:
+                anchors.setdefault(anchor, []).append(index)
+        # (anchor, rule indexes, looked up in the lower-cased text)
+        self.anchors = [(anchor, tuple(indexes), anchor.islower())
+                        for anchor, indexes in anchors.items()]
+
+    def redact(self, text, counts):
+        """Return text with secrets replaced, adding to counts ({kind: n})."""
+        for kind, anchors, regex, replace in self.block_rules:
+            hits = [index for index in map(text.find, anchors) if index >= 0]
+            if hits:
+                start = text.rfind("\n", 0, min(hits)) + 1
+                redacted, found = regex.subn(replace, text[start:])
+                if found:
+                    text = text[:start] + redacted
+                    counts[kind] = counts.get(kind, 0) + found
+        # Most text holds no anchor at all, so this loop is kept to a find per anchor
+        lowered = None
+        line_rules = None
+        for anchor, indexes, lower in self.anchors:
+            haystack = text
+            if lower:
+                if lowered is None:
+                    # U+0130 is the one character that grows when lower-cased
+                    lowered = text.lower() if text.isascii() else text.replace("\u0130", "I").lower()
+                haystack = lowered
+            index = haystack.find(anchor)
+            if index < 0:
+                continue
+            if line_rules is None:
+                line_rules = {}
+            while index >= 0:
+                start = haystack.rfind("\n", 0, index) + 1
+                end = haystack.find("\n", index)
+                if end < 0:
+                    end = len(haystack)
+                line_rules.setdefault((start, end), set()).update(indexes)
+                index = haystack.find(anchor, end)
+        if not line_rules:
+            return text
+        pieces = []
+        pos = 0
+        for start, end in sorted(line_rules):
+            line = text[start:end]
+            changed = False
+            for index in sorted(line_rules[start, end]):
+                kind, regex, replace = self.rules[index]
+                line, found = regex.subn(replace, line)
+                if found:
+                    counts[kind] = counts.get(kind, 0) + found
+                    changed = True
+            if changed:
+                pieces += (text[pos:start], line)
+                pos = end
+        return "".join(pieces) + text[pos:] if pieces else text
+
+
+class RedactingWriter(BundleWriter):
+    """Wraps another BundleWriter and redacts file contents on their way to it.
+
+    Contents are passed on in whole lines, so a secret split across two
+    chunks is still seen in one piece; an unfinished private key block is
+    held back until its END line. Files under READ_CHUNK_SIZE are held back
+    and scanned together, saving the fixed cost of a scan per file (only
+    batches with a hit are scanned again file by file).
+    ``counts`` maps a relative path to the {kind: n} redacted in that file.
+    """
+
+    def __init__(self, writer, redactor=None):
+        super().__init__(writer.sink)
+        self.writer = writer
+        self.redactor = redactor or SecretRedactor()
+        self.counts = {}
+        self._file = None  # (relative_path, language, note) of the file being written
+        self._streaming = False  # Whether its header went out and its content is being streamed
+        self._file_counts = {}
+        self._carry = ""
+        self._batch = []  # (relative_path, language, note, text) of whole files held back
+        self._batch_size = 0
+
+    def begin(self, directory_tree):
+        self.writer.begin(directory_tree)
+
+    def begin_file(self, relative_path, language, note=None):
+        self._file = (relative_path, language, note)
+        self._streaming = False
+        self._file_counts = {}
+        self._carry = ""
+
+    def write_content(self, text):
+        text = self._carry + text
+        if not self._streaming:
+            if len(text) < READ_CHUNK_SIZE:
+                self._carry = text
+                return
+            # Too big to hold back: pass on what is held, then stream this file
+            self._flush_batch()
+            self.writer.begin_file(*self._file)
+            self._streaming = True
+        cut = text.rfind("\n") + 1
+        if cut == 0 and len(text) < REDACTION_MAX_CARRY:
+            self._carry = text
+            return
+        if cut == 0:
+            cut = len(text)  # One very long line (minified code): give up on whole lines
+        key_start = text.rfind("-----BEGIN", 0, cut)
+        if (key_start >= 0 and text.find("-----END", key_start, cut) < 0
+                and cut - key_start < REDACTION_MAX_CARRY):
+            cut = key_start
+        self._carry = text[cut:]
+        if cut:
+            self.writer.write_content(self.redactor.redact(text[:cut], self._file_counts))
+
+    def end_file(self):
+        text, self._carry = self._carry, ""
+        if not self._streaming:
+            self._batch.append(self._file + (text,))
+            self._batch_size += len(text)
+            if self._batch_size >= READ_CHUNK_SIZE:
+                self._flush_batch()
+            return
+        if text:
+            self.writer.write_content(self.redactor.redact(text, self._file_counts))
+        self._count(self._file[0], self._file_counts)
+        self.writer.end_file()
+
+    def _count(self, relative_path, file_counts):
+        if file_counts:
+            counts = self.counts.setdefault(relative_path, {})
+            for kind, count in file_counts.items():
+                counts[kind] = counts.get(kind, 0) + count
+
+    def _flush_batch(self):
+        batch, self._batch, self._batch_size = self._batch, [], 0
+        if not batch:
+            return
+        found = {}
+        # Secrets do not span files, so a clean batch means every file in it is clean
+        self.redactor.redact("\n".join(entry[3] for entry in batch), found)
+        for relative_path, language, note, text in batch:
+            file_counts = {}
+            if found:
+                text = self.redactor.redact(text, file_counts)
+            self.writer.begin_file(relative_path, language, note)
+            if text:
+                self.writer.write_content(text)
+            self.writer.end_file()
+            self._count(relative_path, file_counts)
+
+    def skipped_file(self, relative_path, reason):
+        self._flush_batch()
+        self.writer.skipped_file(relative_path, reason)
+
+    def end(self):
+        self._flush_batch()
+        self.writer.end()
+
+
+def format_redactions(counts):
+    """Summarise RedactingWriter.counts, e.g. "3 secrets redacted in 2 files"."""
+    total = sum(sum(kinds.values()) for kinds in counts.values())
+    return (f"{total} secret{'s' if total != 1 else ''} redacted in "
+            f"{len(counts)} file{'s' if len(counts) != 1 else ''}")
+
+
+def redaction_report(counts):
+    """One line per file of RedactingWriter.counts, e.g. ".env: 2 env-secret"."""
+    return [f"{relative_path}: " + ", ".join(f"{count} {kind}" for kind, count in sorted(kinds.items()))
+            for relative_path, kinds in sorted(counts.items())]
+
+
+# --- Bundle generation ---
+
+
+def write_bundle(base_dir, selected_files_paths, writer, progress_callback=None,
+                 cancel_event=None, symbol_selection=None, roots=None, content_cache=None,
+                 directory_tree=None, tree_mode="full", redact=False):
+    """Stream the bundle for the selected files through writer.
+
+    Returns stats holding the number of files and bytes written, the read
+    errors, whether the run was cancelled and how many files the size
+    policies outlined, truncated or skipped.
+    ``progress_callback(files_done, files_total, bytes_done, bytes_total)`` is
+    throttled to one call per PROGRESS_UPDATE_INTERVAL seconds.
+    ``symbol_selection`` maps a file path to the ``(kind, name)`` definitions
+    to emit instead of the whole file. Files over their LARGE_FILE_POLICIES
+    limit are skipped or partially read and marked in the output; the ones
+    to outline are parsed in worker processes while the rest is written
+    (see OutlineJobs).
+    ``roots`` ({label: dir}, see label_project_roots) bundles several projects
+    at once, with every path prefixed by its root's label.
+    ``content_cache`` (a ContentCache) serves unchanged files from memory and
+    ``directory_tree`` replaces the tree rendered from disk. ``tree_mode``
+    "selected" renders only the part of the tree around the selected files
+    (see TREE_MODES). With ``redact``, secrets in file contents are replaced
+    (see RedactingWriter) and stats["redactions"] maps each affected path to
+    its {kind: count}.
+    Notebooks are written as their cell sources (see slim_notebook), counted
+    in stats["notebooks"] with their size as JSON (raw_bytes).
+    """
+    roots = roots or {"": Path(base_dir)}
+    stats = {"files": 0, "bytes": 0, "errors": [], "cancelled": False,
+             "truncated": 0, "skipped": 0, "outlined": 0, "redactions": {},
+             "notebooks": {"files": 0, "raw_bytes": 0, "bytes": 0}}
+    if redact:
+        writer = RedactingWriter(writer)
+        stats["redactions"] = writer.counts
+
+    # Stat sizes up front so progress can be reported against a known total
+    file_stats = []
+    for file_path in selected_files_paths:
+        try:
+            file_stats.append(stat_project_file(file_path))
+        except OSError:
+            file_stats.append(None)
+    sizes = [st.st_size if st is not None else 0 for st in file_stats]
+    bytes_total = sum(sizes)
+
+    def open_text(index):
+        if content_cache is None:
+            return open_project_text(selected_files_paths[index])
+        return content_cache.open_text(selected_files_paths[index], file_stats[index])
+    bytes_done = 0
+    last_report = 0.0
+
+    def report(files_done, current_bytes, force=False):
+        nonlocal last_report
+        if progress_callback is None:
+            return
+        now = time.time()
+        if force or now - last_report >= PROGRESS_UPDATE_INTERVAL:
+            last_report = now
+            progress_callback(files_done, len(selected_files_paths),
+                              min(current_bytes, bytes_total), bytes_total)
+
+    report(0, 0, force=True)
+
+    outline_jobs = OutlineJobs([
+        file_path for file_path, size in zip(selected_files_paths, sizes)
+        if not (symbol_selection and file_path in symbol_selection)
+        and (large_file_policy(file_path, size) or {}).get("mode") == "outline"])
+    try:
+        # Generate directory tree with ALL non-ignored files, not just selected types
+        if directory_tree is None:
+            with TRACER.span("render_tree"):
+                if tree_mode == "selected":
+                    directory_tree = get_selection_tree_string(roots, selected_files_paths)
+                elif "" in roots:
+                    directory_tree = render_root_tree(roots[""])
+                else:
+                    directory_tree = "\n".join(
+                        f"{label}/\n" + render_root_tree(root, prefix="    ")
+                        for label, root in roots.items())
+        writer.begin(directory_tree)
+
+        for index, file_path in enumerate(selected_files_paths):
+            if cancel_event is not None and cancel_event.is_set():
+                stats["cancelled"] = True
+                break
+            try:
+                file_path_obj = Path(file_path)
+                relative_path = root_relative_path(file_path, roots)
+                language = get_language_from_extension(file_path_obj.suffix)
+
+                # Symbol selections need the whole file to parse, and are small anyway
+                wanted_symbols = symbol_selection.get(
+                    file_path) if symbol_selection else None
+                policy = None if wanted_symbols else large_file_policy(
+                    file_path, sizes[index])
+                outline = None
+                if policy is not None and policy["mode"] == "outline":
+                    with TRACER.span("outline"):
+                        outline = outline_jobs.get(file_path, cancel_event)
+                    if cancel_event is not None and cancel_event.is_set():
+                        stats["cancelled"] = True
+                        break
+                    if outline is None:
+                        # Did not parse: fall back to the default policy
+                        policy = LARGE_FILE_POLICY if sizes[index] > LARGE_FILE_POLICY["max_size"] else None
+                notebook = None
+                if SLIM_NOTEBOOKS and policy is None and not wanted_symbols \
+                        and file_path_obj.suffix.lower() == ".ipynb":
+                    try:
+                        with TRACER.span("slim_notebook"):
+                            with open_text(index) as f:
+                                notebook = slim_notebook(f)
+                    except ValueError as e:
+                        print(f"Bundling {file_path} as is, not a notebook: {e}", file=sys.stderr)
+                if notebook is not None:
+                    language, content = notebook
+                    kept = len(content.encode("utf-8"))
+                    writer.begin_file(relative_path, language,
+                                      note=f"notebook sources, {format_size(sizes[index])} as JSON")
+                    writer.write_content(content)
+                    writer.end_file()
+                    stats["files"] += 1
+                    stats["bytes"] += kept
+                    stats["notebooks"]["files"] += 1
+                    stats["notebooks"]["raw_bytes"] += sizes[index]
+                    stats["notebooks"]["bytes"] += kept
+                elif policy is not None and policy["mode"] == "outline":
+                    writer.begin_file(relative_path, language,
+                                      note=f"outline: {describe_large_file_policy(policy)} "
+                                           f"of {format_size(sizes[index])}")
+                    writer.write_content(outline)
+                    writer.end_file()
+                    stats["outlined"] += 1
+                    stats["files"] += 1
+                    stats["bytes"] += len(outline.encode("utf-8"))
+                elif policy is not None:
+                    with TRACER.span("read_partial") as span:
+                        kept = write_large_file(
+                            writer, file_path, relative_path, language, sizes[index], policy)
+                        span.add("bytes", kept)
+                    if policy["mode"] == "skip":
+                        stats["skipped"] += 1
+                    else:
+                        stats["truncated"] += 1
+                        stats["files"] += 1
+                        stats["bytes"] += kept
+                elif wanted_symbols:
+                    with TRACER.span("read"):
+                        with open_text(index) as f:
+                            content = f.read()
+                    with TRACER.span("render_file"):
+                        stats["bytes"] += write_symbol_sections(
+                            writer, relative_path, content, language, wanted_symbols)
+                    stats["files"] += 1
+                else:
+                    read_so_far = 0
+                    with TRACER.span("read") as span:
+                        writer.begin_file(relative_path, language)
+                        with open_text(index) as f:
+                            while True:
+                                if cancel_event is not None and cancel_event.is_set():
+                                    stats["cancelled"] = True
+                                    break
+                                chunk = f.read(READ_CHUNK_SIZE)
+                                if not chunk:
+                                    break
+                                writer.write_content(chunk)
+                                # Bytes, like the stat sizes progress is measured against
+                                chunk_bytes = len(chunk.encode("utf-8"))
+                                read_so_far += chunk_bytes
+                                stats["bytes"] += chunk_bytes
+                                report(index, bytes_done + read_so_far)
+                        writer.end_file()
+                        span.add("bytes", read_so_far)
+                    if stats["cancelled"]:
+                        break
+                    stats["files"] += 1
+            except Exception as e:
+                error_msg = f"Error reading {file_path}: {e}"
+                stats["errors"].append(error_msg)
+                print(error_msg, file=sys.stderr)
+            bytes_done += sizes[index]
+            report(index + 1, bytes_done)
+
+        writer.end()
+    finally:
+        outline_jobs.close()
+    return stats
+
+
+def generate_bundle(base_dir, selected_files_paths, progress_callback=None, cancel_event=None,
+                    symbol_selection=None, output_format="markdown", roots=None,
+                    tree_mode="full", redact=False):
+    """Build the bundle in memory (for the clipboard).
+
+    Returns ``(combined_text, stats)``; see write_bundle for the arguments.
+    """
+    parts = []
+    stats = write_bundle(base_dir, selected_files_paths, BUNDLE_FORMATS[output_format](parts.append),
+                         progress_callback, cancel_event, symbol_selection, roots,
+                         tree_mode=tree_mode, redact=redact)
+    with TRACER.span("render_join", files=stats["files"]):
+        combined_text = "".join(parts)
+    return combined_text, stats
+
+
+# --- Clipboard helpers ---
+
+def find_clipboard_helper():
+    """Return the command of a clipboard helper that reads stdin, or None for Tk.
+
+    $CODECLIP_CLIPBOARD overrides the search; set it empty to always use Tk.
+    """
+    override = os.environ.get(CLIPBOARD_ENV_VAR)
+    if override is not None:
+        return shlex.split(override) or None
+    for display_var, command in CLIPBOARD_HELPERS:
+        if display_var and not os.environ.get(display_var):
+            continue
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+class ClipboardPipe:
+    """Stream text into a clipboard helper process through its stdin.
+
+    The helper owns the clipboard afterwards (wl-copy and xclip fork to keep
+    serving it), so the bundle never has to sit in this process or in Tk.
+    """
+
+    def __init__(self, command):
+        self.command = command
+        self.error = None
+        self._stderr = tempfile.TemporaryFile()
+        # stderr goes to a file: the forked helper keeps it open, so a pipe would never hit EOF
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                        stdout=subprocess.DEVNULL, stderr=self._stderr)
+
+    def write(self, text):
+        if self.error is not None:
+            return
+        try:
+            self.process.stdin.write(text.encode("utf-8"))
+        except OSError as e:
+            self.error = e
+
+    def close(self):
+        """Hand the clipboard over; raises OSError if the helper failed."""
+        try:
+            try:
+                self.process.stdin.close()
+            except OSError as e:
+                self.error = self.error or e
+            try:
+                returncode = self.process.wait(CLIPBOARD_HELPER_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+                raise OSError(f"{self.command[0]} did not finish within "
+                              f"{CLIPBOARD_HELPER_TIMEOUT}s")
+            if returncode:
+                self._stderr.seek(0)
+                message = self._stderr.read().decode("utf-8", "replace").strip()
+                raise OSError(f"{self.command[0]} exited with status {returncode}"
+                              + (f": {message}" if message else ""))
+            if self.error is not None:
+                raise self.error
+        finally:
+            self._stderr.close()
+
+    def abort(self):
+        """Kill the helper so a partial bundle never reaches the clipboard."""
+        self.process.kill()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.wait()
+        self._stderr.close()
+
+
+def copy_bundle(command, base_dir, selected_files_paths, progress_callback=None,
+                cancel_event=None, symbol_selection=None, output_format="markdown",
+                roots=None, tree_mode="full", redact=False):
+    """Stream the bundle straight into the clipboard helper ``command``.
+
+    Returns the write_bundle stats (see generate_bundle for the arguments).
+    A cancelled bundle is discarded; OSError means nothing was copied.
+    """
+    pipe = ClipboardPipe(command)
+    try:
+        stats = write_bundle(base_dir, selected_files_paths,
+                             BUNDLE_FORMATS[output_format](pipe.write), progress_callback,
+                             cancel_event, symbol_selection, roots, tree_mode=tree_mode,
+                             redact=redact)
+    except BaseException:
+        pipe.abort()
+        raise
+    if stats["cancelled"]:
+        pipe.abort()
+    else:
+        with TRACER.span("clipboard_helper", bytes=stats["bytes"]):
+            pipe.close()
+    return stats
+
+
+def iter_project_files(base_dir, tracked_only=False):
+    """Yield every non-ignored file under base_dir, in sorted order.
+
+    With tracked_only, a git repository yields only its tracked files. An
+    archive yields paths inside it (see open_project_file).
+    """
+    if is_archive_path(base_dir):
+        for rel_path in sorted(open_archive(base_dir).members):
+            if not _is_listed_path_ignored(rel_path):
+                yield os.path.join(base_dir, *rel_path.split("/"))
+        return
+    if tracked_only:
+        rel_paths = list_git_files(base_dir)
+        if rel_paths is not None:
+            for rel_path in sorted(rel_paths):
+                if not _is_listed_path_ignored(rel_path):
+                    yield os.path.join(base_dir, *rel_path.split("/"))
+            return
+    guard = WalkGuard(base_dir)
+    for root, dirs, files in os.walk(base_dir, followlinks=True):
+        dirs[:] = [d for d in sorted(dirs, key=str.lower)
+                   if not is_ignored_dir(d)
+                   and not path_contains_ignored_dir(os.path.join(root, d))
+                   and guard.enter(os.path.join(root, d))]
+        for name in sorted(files):
+            if not is_ignored_file(name):
+                yield os.path.join(root, name)
+
+
+def select_profile_files(entries, profile=None):
+    """Return the file paths of ``(tree_path, file_path)`` entries a selection
+    profile picks (every file if it is empty or None)."""
+    profile = profile or {}
+    matches = compile_selection_profile(profile)
+    extensions = {normalize_extension(ext) for ext in profile.get("extensions", [])}
+    return [file_path for rel_path, file_path in entries
+            if (not extensions or os.path.splitext(rel_path)[1].lower() in extensions)
+            and matches(rel_path)]
+
+
+def export_bundle(project_dirs, output_path, output_format="markdown", profile=None,
+                  tracked_only=False, tree_mode="full", clipboard_helper=None, redact=False,
+                  include_generated=False):
+    """Write a bundle of one or more projects to a file ("-" for stdout)
+    without opening the window.
+
+    Files are chosen with a selection profile (every file if None), matched
+    against root-prefixed paths when there are several projects, and limited
+    to git-tracked files with tracked_only. With clipboard_helper (a command,
+    see find_clipboard_helper) the bundle is piped into it instead of
+    output_path. ``redact`` replaces secrets (see write_bundle). Generated
+    files are left out unless include_generated. Returns the write_bundle
+    stats, with stats["generated"] counting the files left out and their bytes.
+    """
+    roots = label_project_roots([Path(d).resolve() for d in project_dirs])
+    selected_files_paths = select_profile_files(
+        ((root_relative_path(file_path, roots), file_path)
+         for root in roots.values() for file_path in iter_project_files(root, tracked_only)),
+        profile)
+    generated = []
+    if not include_generated:
+        selected_files_paths, generated = split_generated_files(selected_files_paths)
+
+    base_dir = next(iter(roots.values()))
+    if clipboard_helper:
+        stats = copy_bundle(clipboard_helper, base_dir, selected_files_paths,
+                            output_format=output_format, roots=roots, tree_mode=tree_mode,
+                            redact=redact)
+    elif output_path == "-":
+        stats = write_bundle(base_dir, selected_files_paths,
+                             BUNDLE_FORMATS[output_format](sys.stdout.write), roots=roots,
+                             tree_mode=tree_mode, redact=redact)
+    else:
+        with open(output_path, "w", encoding="utf-8") as f:
+            stats = write_bundle(base_dir, selected_files_paths,
+                                 BUNDLE_FORMATS[output_format](f.write), roots=roots,
+                                 tree_mode=tree_mode, redact=redact)
+    stats["generated"] = {"files": len(generated), "bytes": sum(size for _, _, size in generated)}
+    return stats
+
+
+# --- Local daemon ---
+
+
+class ContentCache:
+    """Decoded text of recently bundled files, reused while size and mtime hold.
+
+    Bounded to max_bytes, dropping the least recently used files first.
+    """
+
+    def __init__(self, max_bytes=DAEMON_CACHE_MAX_BYTES, max_file_bytes=DAEMON_CACHE_MAX_FILE_BYTES):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.entries = OrderedDict()  # File path -> ((size, mtime_ns), text)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def open_text(self, file_path, st):
+        """Open a file as text, from memory if it is unchanged since it was cached.
+
+        st is the file's stat result (None if it failed).
+        """
+        if st is None or st.st_size > self.max_file_bytes:
+            return open_project_text(file_path)
+        key = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            entry = self.entries.get(file_path)
+            if entry is not None and entry[0] == key:
+                self.entries.move_to_end(file_path)
+                self.hits += 1
+                return io.StringIO(entry[1])
+            self.misses += 1
+        with open_project_text(file_path) as f:
+            text = f.read()
+        with self._lock:
+            old = self.entries.pop(file_path, None)
+            if old is not None:
+                self.total_bytes -= old[0][0]
+            self.entries[file_path] = (key, text)
+            self.total_bytes += st.st_size
+            while self.total_bytes > self.max_bytes:
+                _, (old_key, _) = self.entries.popitem(last=False)
+                self.total_bytes -= old_key[0]
+        return io.StringIO(text)
+
+    def stats(self):
+        with self._lock:
+            return {"files": len(self.entries), "bytes": self.total_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+
+class ProjectSnapshot:
+    """Scanned state of one or more project roots, kept current by polling.
+
+    Every non-ignored file is listed up front. The watcher stats the listed
+    directories (plus the git index with tracked_only) and rescans when one
+    of them changes; edits inside files are caught by the content cache,
+    which checks each file's size and mtime when it is bundled.
+    """
+
+    def __init__(self, project_dirs, tracked_only=False):
+        self.roots = label_project_roots([Path(d).resolve() for d in project_dirs])
+        self.tracked_only = tracked_only
+        self.content_cache = ContentCache()
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.refresh()
+
+    def _list_root(self, root):
+        """Return ``(files, folders, skipped)`` of a root as "/"-separated relative
+        paths, skipped mapping folders the walk guard refused to the reason."""
+        if is_archive_path(root) or (self.tracked_only and find_git_dir(root) is not None):
+            cut = len(str(root)) + 1
+            files = [file_path[cut:].replace(os.sep, "/")
+                     for file_path in iter_project_files(root, self.tracked_only)]
+            return files, sorted({rel_path.rpartition("/")[0] for rel_path in files} - {""}), {}
+        files = []
+        folders = []
+        guard = WalkGuard(root)
+        for directory, dirs, names in os.walk(root, followlinks=True):
+            rel_dir = os.path.relpath(directory, root).replace(os.sep, "/")
+            rel_dir = "" if rel_dir == "." else rel_dir + "/"
+            dirs[:] = [d for d in sorted(dirs, key=str.lower)
+                       if not is_ignored_dir(d)
+                       and not path_contains_ignored_dir(os.path.join(directory, d))
+                       and guard.enter(os.path.join(directory, d))]
+            folders.extend(rel_dir + d for d in dirs)
+            files.extend(rel_dir + name for name in sorted(names) if not is_ignored_file(name))
+        cut = len(str(root)) + 1
+        skipped = {path[cut:].replace(os.sep, "/"): reason
+                   for path, reason in guard.skipped.items()}
+        return files, folders, skipped
+
+    def _watched_paths(self, root, folders):
+        if is_archive_path(root):
+            return [str(root)]
+        paths = [str(root)] + [os.path.join(root, *folder.split("/")) for folder in folders]
+        if self.tracked_only:
+            git_dir = find_git_dir(root)
+            if git_dir is not None:
+                paths.append(str(git_dir / "index"))
+        return paths
+
+    @staticmethod
+    def _mtimes(paths):
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def refresh(self):
+        """Rescan every root and swap the new state in."""
+        with self._refresh_lock, TRACER.span("daemon_scan") as span:
+            started = time.time()
+            entries = []
+            watched = []
+            extension_counts = Counter()
+            folder_tree = FolderNode()
+            tree_parts = []
+            for label, root in self.roots.items():
+                files, folders, skipped = self._list_root(root)
+                counts, _, tree = build_tree_from_paths(files, folders)
+                for rel_path, reason in skipped.items():
+                    node = tree
+                    *parents, name = rel_path.split("/")
+                    for part in parents:
+                        node = node.subfolders.setdefault(part, FolderNode())
+                    if node.skipped is None:
+                        node.skipped = {}
+                    node.skipped[name] = reason
+                extension_counts.update(counts)
+                if label:
+                    folder_tree.subfolders[label] = tree
+                    tree_parts.append(f"{label}/\n" + format_folder_tree(tree, prefix="    "))
+                else:
+                    folder_tree = tree
+                    tree_parts.append(format_folder_tree(tree))
+                entries.extend((f"{label}/{rel_path}" if label else rel_path,
+                                os.path.join(root, *rel_path.split("/"))) for rel_path in files)
+                watched.extend(self._watched_paths(root, folders))
+            watched = self._mtimes(watched)
+            span.add("files", len(entries))
+            with self._lock:
+                self.entries = entries
+                self.extension_counts = extension_counts
+                self.folder_tree = folder_tree
+                self.tree_text = "\n".join(tree_parts)
+                self.watched = watched
+                self.generation += 1
+                self.scanned_at = time.time()
+                self.scan_seconds = self.scanned_at - started
+
+    def changed(self):
+        """Whether any watched directory changed since the last scan."""
+        with self._lock:
+            watched = self.watched
+        return self._mtimes(watched) != watched
+
+    def watch(self, stop_event, interval=DAEMON_POLL_INTERVAL):
+        """Rescan after changes until stop_event is set."""
+        while not stop_event.wait(interval):
+            try:
+                if self.changed():
+                    self.refresh()
+            except Exception as e:
+                print(f"Rescan failed: {e}", file=sys.stderr)
+
+    def stats(self):
+        with self._lock:
+            return {"roots": {label: str(root) for label, root in self.roots.items()},
+                    "files": len(self.entries),
+                    "extensions": dict(self.extension_counts.most_common()),
+                    "generation": self.generation,
+                    "scanned_at": self.scanned_at,
+                    "scan_seconds": round(self.scan_seconds, 3),
+                    "watched_paths": len(self.watched),
+                    "content_cache": self.content_cache.stats()}
+
+    def bundle(self, request):
+        """Render a bundle for a request dict and return ``(text, stats)``.
+
+        The request may name a saved "profile", add "paths", "include",
+        "exclude" and "extensions" lists on top of it (see
+        compile_selection_profile), pick an output "format" and "tree"
+        mode, turn secret redaction off with "redact": false and keep
+        generated files with "generated": true.
+        """
+        output_format = request.get("format") or "markdown"
+        if output_format not in BUNDLE_FORMATS:
+            raise ValueError(f"unknown format {output_format!r}")
+        tree_mode = request.get("tree") or "full"
+        if tree_mode not in TREE_MODES:
+            raise ValueError(f"unknown tree mode {tree_mode!r}")
+        base_dir = next(iter(self.roots.values()))
+        profile = {}
+        if request.get("profile"):
+            profile = load_selection_profiles(base_dir).get(request["profile"])
+            if profile is None:
+                raise ValueError(f"no profile named {request['profile']!r}")
+        profile = extend_selection_profile(profile, request)
+        with self._lock:
+            entries, tree_text = self.entries, self.tree_text
+        selected_files_paths = select_profile_files(entries, profile)
+        generated = []
+        if not request.get("generated", INCLUDE_GENERATED_FILES):
+            selected_files_paths, generated = split_generated_files(selected_files_paths)
+        parts = []
+        stats = write_bundle(base_dir, selected_files_paths,
+                             BUNDLE_FORMATS[output_format](parts.append), roots=self.roots,
+                             content_cache=self.content_cache, tree_mode=tree_mode,
+                             directory_tree=tree_text if tree_mode == "full" else None,
+                             redact=request.get("redact", REDACT_SECRETS))
+        stats["generated"] = {"files": len(generated),
+                              "bytes": sum(size for _, _, size in generated)}
+        return "".join(parts), stats
+
+
+def daemon_token_path(port):
+    return Path(os.path.expanduser(DAEMON_TOKEN_FILE.format(port=port)))
+
+
+def write_daemon_token(port):
+    """Create a fresh token for a daemon run in a file only the owner can read."""
+    token = secrets.token_urlsafe(32)
+    path = daemon_token_path(port)
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    # Never write through a file (or link) left behind by someone else
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600),
+                   "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+class _DaemonRequestHandler(http.server.BaseHTTPRequestHandler):
+    """GET /tree (?format=json), GET /stats and POST /bundle on a ProjectSnapshot.
+
+    Requests must name the daemon's own loopback address in their Host
+    header, which stops web pages from reaching it through DNS rebinding,
+    and carry the run's token (see write_daemon_token), which stops other
+    local users.
+    """
+
+    server_version = "codeclip"
+
+    def _authorized(self):
+        port = self.server.server_address[1]
+        if self.headers.get("Host") not in (f"{DAEMON_HOST}:{port}", f"localhost:{port}"):
+            self.send_error(403, "Unexpected Host header")
+            return False
+        scheme, _, token = (self.headers.get("Authorization") or "").partition(" ")
+        if scheme != "Bearer" or not hmac.compare_digest(
+                token.encode("utf-8"), self.server.token.encode("utf-8")):
+            self.send_error(401, "Missing or wrong token",
+                            f"Send the token from {daemon_token_path(port)} as "
+                            "'Authorization: Bearer <token>'.")
+            return False
+        return True
+
+    def _send(self, body, content_type, headers=()):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, value):
+        self._send(json.dumps(value).encode("utf-8"), "application/json")
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        url = urllib.parse.urlsplit(self.path)
+        snapshot = self.server.snapshot
+        with TRACER.span("daemon_request", path=url.path):
+            if url.path == "/tree":
+                if urllib.parse.parse_qs(url.query).get("format") == ["json"]:
+                    self._send_json(snapshot.folder_tree.to_dict())
+                else:
+                    self._send(snapshot.tree_text.encode("utf-8"), "text/plain; charset=utf-8")
+            elif url.path == "/stats":
+                self._send_json(snapshot.stats())
+            else:
+                self.send_error(404, "Use /tree, /stats or /bundle")
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if urllib.parse.urlsplit(self.path).path != "/bundle":
+            self.send_error(404, "Use /tree, /stats or /bundle")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("the request body must be a JSON object")
+            with TRACER.span("daemon_request", path="/bundle"):
+                text, stats = self.server.snapshot.bundle(request)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        self._send(text.encode("utf-8"), "text/plain; charset=utf-8", [
+            ("X-Codeclip-Files", str(stats["files"])),
+            ("X-Codeclip-Bytes", str(stats["bytes"])),
+            ("X-Codeclip-Errors", str(len(stats["errors"]))),
+            ("X-Codeclip-Redacted", str(sum(sum(kinds.values())
+                                            for kinds in stats["redactions"].values()))),
+            ("X-Codeclip-Generated-Skipped", str(stats["generated"]["files"])),
+        ])
+
+
+def serve_projects(project_dirs, port=DAEMON_PORT, tracked_only=False,
+                   poll_interval=DAEMON_POLL_INTERVAL):
+    """Serve warm snapshots of the projects on localhost until interrupted."""
+    started = time.time()
+    snapshot = ProjectSnapshot(project_dirs, tracked_only)
+    server = http.server.ThreadingHTTPServer((DAEMON_HOST, port), _DaemonRequestHandler)
+    server.daemon_threads = True
+    server.snapshot = snapshot
+    port = server.server_address[1]
+    server.token = write_daemon_token(port)
+    stop_event = threading.Event()
+    threading.Thread(target=snapshot.watch, args=(stop_event, poll_interval), daemon=True).start()
+    print(f"Serving {len(snapshot.entries)} files (scanned in {time.time() - started:.2f}s) "
+          f"on http://{DAEMON_HOST}:{port}, token in {daemon_token_path(port)}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        server.server_close()
+        try:
+            daemon_token_path(port).unlink()
+        except OSError:
+            pass
+    return 0
+
+
+def daemon_request(endpoint, port=DAEMON_PORT, selection=None, output_format="markdown",
+                   tree_mode="full", timeout=60, redact=REDACT_SECRETS,
+                   include_generated=INCLUDE_GENERATED_FILES, token=None):
+    """Call a running daemon's "tree", "stats" or "bundle" endpoint and return the body.
+
+    The token defaults to the one the daemon on port wrote (see write_daemon_token).
+    """
+    if token is None:
+        token = daemon_token_path(port).read_text(encoding="utf-8").strip()
+    headers = {"Authorization": f"Bearer {token}"}
+    body = None
+    if endpoint == "bundle":
+        body = json.dumps(dict(selection or {}, format=output_format,
+                               tree=tree_mode, redact=redact,
+                               generated=include_generated)).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+    request = urllib.request.Request(f"http://{DAEMON_HOST}:{port}/{endpoint}",
+                                     data=body, headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read().decode("utf-8")
+
+
+def main(argv=None):
+    global FOLLOW_SYMLINKS, ONE_FILESYSTEM
+    parser = argparse.ArgumentParser(
+        description="Copy selected project files to the clipboard for AI chatbots.")
+    parser.add_argument(
+        "--trace", metavar="FILE", default=os.environ.get(TRACE_ENV_VAR),
+        help=f"record stage timings as a Chrome trace (also enabled by ${TRACE_ENV_VAR})")
+    parser.add_argument(
+        "--format", choices=list(BUNDLE_FORMATS), default="markdown",
+        help="bundle layout (default: markdown)")
+    parser.add_argument(
+        "--output", metavar="FILE",
+        help="write the bundle to FILE ('-' for stdout) without opening the window")
+    parser.add_argument(
+        "--copy", action="store_true",
+        help="copy the bundle to the clipboard through wl-copy, xclip, xsel or pbcopy "
+             f"(or ${CLIPBOARD_ENV_VAR}) without opening the window")
+    parser.add_argument(
+        "--project", metavar="DIR", action="append",
+        help="project to export with --output; repeat to bundle several (default: .)")
+    parser.add_argument(
+        "--tracked-only", action="store_true",
+        help="list git repositories from their index: only tracked files are shown")
+    parser.add_argument(
+        "--profile", metavar="NAME", help="saved selection profile to export with --output")
+    parser.add_argument(
+        "--include", metavar="GLOB", action="append",
+        help="only export files matching GLOB with --output (repeatable)")
+    parser.add_argument(
+        "--exclude", metavar="GLOB", action="append",
+        help="leave out files matching GLOB with --output (repeatable)")
+    parser.add_argument(
+        "--tree", choices=list(TREE_MODES), default=TREE_MODE,
+        help="directory tree in the bundle header: the whole project, or only "
+             f"around the selected files (default: {TREE_MODE})")
+    parser.add_argument(
+        "--no-redact", action="store_true",
+        help="copy file contents verbatim instead of replacing API keys, passwords "
+             "and private keys with [REDACTED:kind]")
+    parser.add_argument(
+        "--include-generated", action="store_true",
+        help="bundle lockfiles, minified files, source maps and generated code "
+             "too (see GENERATED_FILE_PATTERNS)")
+    parser.add_argument(
+        "--no-follow-symlinks", action="store_true",
+        help="list symlinked folders as skipped instead of walking into them")
+    parser.add_argument(
+        "--one-file-system", action="store_true",
+        help="do not walk into folders on other filesystems (mount points)")
+    parser.add_argument(
+        "--serve", action="store_true",
+        help="keep the projects scanned and serve trees and bundles on localhost")
+    parser.add_argument(
+        "--client", choices=["tree", "stats", "bundle"],
+        help="ask a running --serve daemon instead of scanning (uses --profile, "
+             "--include, --exclude, --format and --output)")
+    parser.add_argument(
+        "--port", type=int, default=DAEMON_PORT,
+        help=f"daemon port for --serve and --client (default: {DAEMON_PORT})")
+    parser.add_argument(
+        "--poll-interval", type=float, default=DAEMON_POLL_INTERVAL, metavar="SECONDS",
+        help="seconds between the --serve daemon's checks for changes; each check "
+             f"stats every watched folder (default: {DAEMON_POLL_INTERVAL})")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        TRACER.enable(args.trace)
+        atexit.register(TRACER.finish)
+    if args.no_follow_symlinks:
+        FOLLOW_SYMLINKS = False
+    if args.one_file_system:
+        ONE_FILESYSTEM = True
+
+    redact = REDACT_SECRETS and not args.no_redact
+    include_generated = INCLUDE_GENERATED_FILES or args.include_generated
+
+    if args.serve:
+        if args.poll_interval <= 0:
+            parser.error("--poll-interval must be positive")
+        return serve_projects(args.project or ["."], args.port, args.tracked_only,
+                              args.poll_interval)
+
+    if args.client:
+        selection = {"profile": args.profile, "include": args.include, "exclude": args.exclude}
+        try:
+            body = daemon_request(args.client, args.port, selection, args.format, args.tree,
+                                  redact=redact, include_generated=include_generated)
+        except urllib.error.HTTPError as e:
+            print(f"Daemon error: {e.code} {e.reason}", file=sys.stderr)
+            return 1
+        except OSError as e:
+            print(f"No daemon on port {args.port} ({e}); start one with --serve.",
+                  file=sys.stderr)
+            return 1
+        if args.output and args.output != "-":
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(body)
+        else:
+            sys.stdout.write(body)
+        return 0
+
+    clipboard_helper = None
+    if args.copy:
+        clipboard_helper = find_clipboard_helper()
+        if not clipboard_helper:
+            parser.error("--copy needs wl-copy, xclip, xsel or pbcopy on PATH "
+                         f"(or a command in ${CLIPBOARD_ENV_VAR})")
+
+    if args.output or args.copy:
+        project_dirs = args.project or ["."]
+        profile = {}
+        if args.profile:
+            # Profiles are saved in the first (primary) project
+            profile = load_selection_profiles(project_dirs[0]).get(args.profile)
+            if profile is None:
+                parser.error(f"no profile named {args.profile!r} in {project_dirs[0]}")
+        profile = extend_selection_profile(
+            profile, {"include": args.include, "exclude": args.exclude})
+        start_time = time.time()
+        try:
+            stats = export_bundle(project_dirs, args.output, args.format, profile,
+                                  args.tracked_only, args.tree, clipboard_helper, redact,
+                                  include_generated)
+        except OSError as e:
+            if not clipboard_helper:
+                raise
+            print(f"Clipboard helper {clipboard_helper[0]} failed: {e}", file=sys.stderr)
+            return 1
+        print(f"{'Copied' if clipboard_helper else 'Wrote'} {stats['files']} files ({format_size(stats['bytes'])}) "
+              f"in {time.time() - start_time:.2f}s.", file=sys.stderr)
+        if stats["notebooks"]["files"]:
+            print(format_notebook_savings(stats["notebooks"]) + ".", file=sys.stderr)
+        if stats["generated"]["files"]:
+            print(format_generated_savings(stats["generated"]) + " (--include-generated keeps them).",
+                  file=sys.stderr)
+        if stats["redactions"]:
+            print(format_redactions(stats["redactions"]) + ":", file=sys.stderr)
+            for line in redaction_report(stats["redactions"]):
+                print("  " + line, file=sys.stderr)
+        return 1 if stats["errors"] else 0
+
+    app = App(output_format=args.format, tracked_only=args.tracked_only, tree_mode=args.tree,
+              redact=redact, include_generated=include_generated)
     app.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
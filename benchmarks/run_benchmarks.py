@@ -0,0 +1,555 @@
+"""Synthetic-repo benchmarks for Code Clip.
+
+Generates synthetic project trees of a configurable shape and times the
+scanning, tree building, tree rendering, selection propagation and bundle
+assembly code paths without opening a window. Results are written as JSON so
+two runs can be compared with ``--compare``.
+
+Examples:
+    python benchmarks/run_benchmarks.py --files 1000,10000 --shape mixed
+    python benchmarks/run_benchmarks.py --files 100000 --output after.json
+    python benchmarks/run_benchmarks.py --select-all 1000,10000,100000
+    python benchmarks/run_benchmarks.py --files 100000 --git
+    python benchmarks/run_benchmarks.py --memory 100000,1000000
+    python benchmarks/run_benchmarks.py --compare before.json after.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+APP_SCRIPT = ROOT_DIR / ".codebase-to-text.py"
+
+SHAPES = ("wide", "deep", "mixed")
+FILE_EXTENSIONS = (".py", ".js", ".md", ".json", ".txt", ".css")
+IGNORED_DIR_NAMES = ("node_modules", "__pycache__", ".git", "venv")
+GENERATED_MARKER = ".codeclip-bench-complete"
+
+
+def load_app_module():
+    """Import the application script, whose file name is not importable."""
+    spec = importlib.util.spec_from_file_location("codeclip", APP_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so process pool workers can find its functions by name
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- Synthetic trees ---
+
+
+def _file_body(index, file_size):
+    line = f"value_{index} = {index}  # synthetic benchmark content\n"
+    return (line * (file_size // len(line) + 1))[:file_size]
+
+
+def _directory_layout(shape, dir_count):
+    """Yield relative directory paths for the requested shape."""
+    if shape == "wide":
+        # Two levels, as many siblings as needed
+        per_level = max(1, int(dir_count ** 0.5))
+        for i in range(dir_count):
+            yield Path(f"pkg_{i // per_level}") / f"mod_{i % per_level}"
+    elif shape == "deep":
+        # A handful of long chains
+        chain_length = 12
+        for i in range(dir_count):
+            chain = i % max(1, dir_count // chain_length)
+            depth = i // max(1, dir_count // chain_length)
+            parts = [f"chain_{chain}"] + [f"level_{d}" for d in range(depth)]
+            yield Path(*parts)
+    else:
+        # Balanced tree with fan-out 8
+        for i in range(dir_count):
+            parts = []
+            n = i
+            while True:
+                parts.append(f"dir_{n % 8}")
+                n //= 8
+                if n == 0:
+                    break
+            yield Path(*reversed(parts))
+
+
+def generate_synthetic_tree(root, file_count, shape="mixed", files_per_dir=20,
+                            large_dirs=2, ignored_ratio=0.1, file_size=512,
+                            max_files_per_dir_scan=100, git=False):
+    """Create a synthetic project below root and return it.
+
+    ``large_dirs`` directories receive several times ``max_files_per_dir_scan``
+    files and ``ignored_ratio`` of all files go into ignored directories.
+    With ``git``, the tree is also a git repository whose index holds the
+    project files, plus as many untracked build outputs under dist/.
+    Generation is skipped when root already holds a complete tree.
+    """
+    root = Path(root)
+    if (root / GENERATED_MARKER).exists():
+        return root
+    root.mkdir(parents=True, exist_ok=True)
+
+    ignored_files = int(file_count * ignored_ratio)
+    large_dir_files = min(large_dirs * max_files_per_dir_scan * 3,
+                          max(0, file_count - ignored_files))
+    regular_files = max(0, file_count - ignored_files - large_dir_files)
+    dir_count = max(1, regular_files // files_per_dir)
+
+    written = 0
+    for dir_index, rel_dir in enumerate(_directory_layout(shape, dir_count)):
+        directory = root / rel_dir
+        directory.mkdir(parents=True, exist_ok=True)
+        count = files_per_dir if dir_index < dir_count - 1 else regular_files - written
+        for i in range(count):
+            ext = FILE_EXTENSIONS[(written + i) % len(FILE_EXTENSIONS)]
+            (directory / f"file_{i}{ext}").write_text(
+                _file_body(written + i, file_size))
+        written += count
+
+    if large_dirs and large_dir_files:
+        per_large_dir = large_dir_files // large_dirs
+        for d in range(large_dirs):
+            directory = root / f"large_{d}"
+            directory.mkdir(exist_ok=True)
+            for i in range(per_large_dir):
+                ext = FILE_EXTENSIONS[i % len(FILE_EXTENSIONS)]
+                (directory / f"item_{i:07d}{ext}").write_text(
+                    _file_body(i, file_size))
+
+    # A fake .git directory would clash with the real one
+    ignored_names = [name for name in IGNORED_DIR_NAMES if not (git and name == ".git")]
+    for i in range(ignored_files):
+        ignored_name = ignored_names[i % len(ignored_names)]
+        directory = root / ignored_name / f"dep_{i // files_per_dir}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"dep_{i}.js").write_text(_file_body(i, file_size))
+
+    if git:
+        for i in range(ignored_files):
+            directory = root / "dist" / f"chunk_{i // files_per_dir}"
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"bundle_{i}.js").write_text(_file_body(i, file_size))
+        (root / ".gitignore").write_text(
+            "\n".join(["dist/", GENERATED_MARKER] + ignored_names) + "\n")
+        subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+        subprocess.run(["git", "add", "-A"], cwd=root, check=True)
+
+    (root / GENERATED_MARKER).write_text(str(file_count))
+    return root
+
+
+# --- Headless selection harness ---
+
+
+class CountingLabel:
+    """Stands in for a tree row label: each configure costs one Tcl round-trip."""
+
+    configure_calls = 0
+
+    def __init__(self, master):
+        self.master = master
+
+    def winfo_exists(self):
+        return True
+
+    def configure(self, **kwargs):
+        CountingLabel.configure_calls += 1
+        self.master.call("set", "::codeclip_bench_image", str(kwargs.get("image")))
+
+
+def build_selection_harness(app_module, folder_tree, master, with_labels=False):
+    """Mirror the bookkeeping of App.create_folder_ui without creating widgets.
+
+    The returned object borrows the App selection methods, so the benchmark
+    measures the same propagation code the UI runs. With with_labels, every
+    row gets a CountingLabel so row image refreshes are counted and timed;
+    idle callbacks queue up until run_idle() is called.
+    """
+    App = app_module.App
+
+    class SelectionHarness:
+        _propagate_folder_selection_down = App._propagate_folder_selection_down
+        _update_parent_folder_state_up = App._update_parent_folder_state_up
+        _recalculate_folder_state = App._recalculate_folder_state
+        update_folder_image = App.update_folder_image
+        update_file_image = App.update_file_image
+        on_folder_label_click = App.on_folder_label_click
+        on_file_label_click = App.on_file_label_click
+        select_all_folders = App.select_all_folders
+        deselect_all_folders = App.deselect_all_folders
+        update_file_type_counts = App.update_file_type_counts
+        _apply_profile = App._apply_profile
+        _recalculate_all_folder_states = App._recalculate_all_folder_states
+        _selected_symbols = App._selected_symbols
+        _paint_folder_row = App._paint_folder_row
+        _paint_file_row = App._paint_file_row
+        _schedule_row_flush = App._schedule_row_flush
+        flush_row_images = App.flush_row_images
+        _is_folder_content_shown = App._is_folder_content_shown
+        _requeue_hidden_rows = App._requeue_hidden_rows
+        _settle_selection_heat = App._settle_selection_heat
+
+        def after_idle(self, callback):
+            self.idle_callbacks.append(callback)
+            return len(self.idle_callbacks)
+
+        def run_idle(self):
+            while self.idle_callbacks:
+                self.idle_callbacks.pop(0)()
+
+    harness = SelectionHarness()
+    harness.folder_vars = {}
+    harness.folder_labels = {}
+    harness.file_vars = {}
+    harness.file_labels = {}
+    harness.folder_children = {}
+    harness.folder_parent = {}
+    harness.file_type_checkboxes = {}
+    harness.file_type_vars = {}
+    harness.symbol_vars = {}
+    harness.folder_states = {}
+    harness.dirty_rows = set()
+    harness.hidden_dirty_rows = {}
+    harness.row_flush_id = None
+    harness.idle_callbacks = []
+    harness.checked_image = "checked"
+    harness.unchecked_image = "unchecked"
+    harness.indeterminate_image = "indeterminate"
+    harness.limited_extensions = set()
+    harness.selection_heat = app_module.SelectionHeat(harness.folder_parent)
+    harness.selection_summary_label = CountingLabel(master)
+    harness.include_generated_var = tkinter.BooleanVar(
+        master=master, value=app_module.INCLUDE_GENERATED_FILES)
+
+    def add_node(tree_node, parent_rel_path):
+        for folder, sub_tree_node in sorted(tree_node.subfolders.items()):
+            folder_rel_path = parent_rel_path + os.sep + folder if parent_rel_path else folder
+            harness.folder_children.setdefault(folder_rel_path, [])
+            harness.folder_parent[folder_rel_path] = parent_rel_path
+            harness.folder_children.setdefault(
+                parent_rel_path, []).append(folder_rel_path)
+            harness.folder_vars[folder_rel_path] = tkinter.IntVar(
+                master=master, value=0)
+            if with_labels:
+                harness.folder_labels[folder_rel_path] = CountingLabel(master)
+            add_node(sub_tree_node, folder_rel_path)
+        if tree_node.files:
+            files = harness.file_vars.setdefault(parent_rel_path, {})
+            labels = harness.file_labels.setdefault(parent_rel_path, {})
+            harness.selection_heat.add_files(
+                parent_rel_path, tree_node.files, tree_node.sizes or [0] * len(tree_node.files),
+                tree_node.generated)
+            for file in tree_node.files:
+                files[file] = tkinter.BooleanVar(master=master, value=False)
+                if with_labels:
+                    labels[file] = CountingLabel(master)
+
+    add_node(folder_tree, "")
+    return harness
+
+
+def collect_tree_files(base_dir, folder_tree, rel_path=""):
+    """Return absolute paths of every file in folder_tree."""
+    paths = [str(Path(base_dir) / rel_path / f) for f in folder_tree.files]
+    for folder, sub_tree in folder_tree.subfolders.items():
+        sub_rel = str(Path(rel_path) / folder) if rel_path else folder
+        paths.extend(collect_tree_files(base_dir, sub_tree, sub_rel))
+    return paths
+
+
+# --- Timing ---
+
+
+def time_call(func, repeat):
+    """Run func repeat times and return timing statistics in seconds."""
+    runs = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    return {
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "runs": runs,
+    }, result
+
+
+def run_suite(app_module, project_dir, repeat):
+    """Time every benchmarked stage against one synthetic project."""
+    results = {}
+    CountingLabel.configure_calls = 0
+
+    results["scan_file_extensions"], counts = time_call(
+        lambda: app_module.scan_file_extensions(project_dir), repeat)
+    results["build_folder_tree"], folder_tree = time_call(
+        lambda: app_module.build_folder_tree(project_dir), repeat)
+    results["get_tree_filtered_string"], tree_text = time_call(
+        lambda: app_module.get_tree_filtered_string(
+            project_dir, allowed_extensions=None), repeat)
+
+    # Tracked-only listing from the git index against walking the disk
+    if (Path(project_dir) / ".git" / "index").exists():
+        results["walked_root"], _ = time_call(
+            lambda: app_module.scan_project_root(project_dir, tracked_only=False), repeat)
+        results["git_index_root"], _ = time_call(
+            lambda: app_module.scan_project_root(project_dir, tracked_only=True), repeat)
+
+    master = tkinter.Tcl()
+    harness = build_selection_harness(app_module, folder_tree, master)
+    results["select_all_folders"], _ = time_call(
+        lambda: (harness.deselect_all_folders(), harness.select_all_folders(),
+                 harness.run_idle()), repeat)
+    top_level = harness.folder_children.get("", [])
+    if top_level:
+        results["folder_click_propagation"], _ = time_call(
+            lambda: harness.on_folder_label_click(top_level[0]), repeat)
+
+    # Alternate between two profiles so every run changes about half the files
+    profiles = [{"include": ["*.py"], "exclude": ["**/d1*/**"]}, {"include": ["*.md", "*.txt"]}]
+    results["apply_profile"], _ = time_call(
+        lambda: [harness._apply_profile(profile) for profile in profiles], repeat)
+
+    selected = sorted(collect_tree_files(project_dir, folder_tree))
+    results["bundle_assembly"], bundle = time_call(
+        lambda: app_module.generate_bundle(project_dir, selected), repeat)
+    results["bundle_assembly_redacted"], _ = time_call(
+        lambda: app_module.generate_bundle(project_dir, selected, redact=True), repeat)
+
+    results["_counts"] = {
+        "extensions": len(counts),
+        "tree_lines": tree_text.count("\n") + 1 if tree_text else 0,
+        "folders": len(harness.folder_vars),
+        "selectable_files": len(selected),
+        "bundle_bytes": bundle[1]["bytes"],
+    }
+    return results
+
+
+def synthetic_folder_tree(app_module, file_count, files_per_dir=20, fanout=8):
+    """Build a build_folder_tree-style FolderNode tree in memory, without touching the disk."""
+    root = app_module.FolderNode()
+    level = [root]
+    remaining = file_count
+    while remaining > 0:
+        next_level = []
+        for node in level:
+            for index in range(fanout):
+                if remaining <= 0:
+                    break
+                count = min(files_per_dir, remaining)
+                remaining -= count
+                child = app_module.FolderNode(tuple(
+                    f"file_{i}{FILE_EXTENSIONS[i % len(FILE_EXTENSIONS)]}" for i in range(count)))
+                node.subfolders[f"dir_{len(next_level)}_{index}"] = child
+                next_level.append(child)
+        level = next_level
+    return root
+
+
+def synthetic_rel_paths(file_count, files_per_dir=20, fanout=8):
+    """"/"-separated file paths laid out like synthetic_folder_tree."""
+    paths = []
+    level = [""]
+    while len(paths) < file_count:
+        next_level = []
+        for parent in level:
+            for index in range(fanout):
+                if len(paths) >= file_count:
+                    break
+                folder = f"{parent}dir_{len(next_level)}_{index}/"
+                count = min(files_per_dir, file_count - len(paths))
+                paths.extend(f"{folder}file_{i}{FILE_EXTENSIONS[i % len(FILE_EXTENSIONS)]}"
+                             for i in range(count))
+                next_level.append(folder)
+        level = next_level
+    return paths
+
+
+def run_memory_suite(app_module, sizes):
+    """Measure the memory held by the folder tree built for in-memory paths.
+
+    Paths are decoded from bytes first, as they are when read from a git
+    index or an archive, so equal names start out as separate strings.
+    """
+    results = []
+    for file_count in sizes:
+        encoded = [path.encode() for path in synthetic_rel_paths(file_count)]
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        rel_paths = [path.decode() for path in encoded]
+        start = time.perf_counter()
+        tree = app_module.build_tree_from_paths(rel_paths)
+        elapsed = time.perf_counter() - start
+        del rel_paths
+        retained = tracemalloc.get_traced_memory()[0] - before
+        peak = tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        del tree
+        results.append({"files": file_count, "tree_bytes": retained,
+                        "peak_bytes": peak, "seconds": elapsed})
+        print(f"  tree of {file_count} files: {retained / 1e6:.1f} MB held, "
+              f"{peak / 1e6:.1f} MB peak, built in {elapsed:.2f}s", file=sys.stderr)
+    return results
+
+
+def run_select_all_suite(app_module, sizes, repeat):
+    """Time Select All plus the row image refresh against tree size.
+
+    Runs once with every folder collapsed (the state after loading a project)
+    and once fully expanded, the worst case for repainting.
+    """
+    results = []
+    master = tkinter.Tcl()
+    for file_count in sizes:
+        harness = build_selection_harness(
+            app_module, synthetic_folder_tree(app_module, file_count), master, with_labels=True)
+        for expanded in (False, True):
+            harness.folder_states = dict.fromkeys(harness.folder_vars, expanded)
+            harness.deselect_all_folders()
+            harness.run_idle()
+            CountingLabel.configure_calls = 0
+
+            def select_all_and_refresh():
+                harness.deselect_all_folders()
+                harness.select_all_folders()
+                harness.run_idle()
+
+            stats, _ = time_call(select_all_and_refresh, repeat)
+            stats["rows_painted_per_run"] = CountingLabel.configure_calls // repeat
+            results.append({"files": file_count, "folders": len(harness.folder_vars),
+                            "expanded": expanded, "select_all": stats})
+            print(f"  select all, {file_count} files, "
+                  f"{'expanded' if expanded else 'collapsed'}: median {stats['median']:.4f}s, "
+                  f"{stats['rows_painted_per_run']} rows painted", file=sys.stderr)
+    return results
+
+
+# --- Comparison ---
+
+
+def compare_results(before_path, after_path):
+    """Print per-benchmark median ratios between two result files."""
+    before = json.loads(Path(before_path).read_text())
+    after = json.loads(Path(after_path).read_text())
+
+    def keyed(data):
+        return {(r["shape"], r["files"]): r["benchmarks"] for r in data["results"]}
+
+    before_runs, after_runs = keyed(before), keyed(after)
+    print(f"{'shape':<7} {'files':>9}  {'benchmark':<26} {'before':>10} {'after':>10} {'ratio':>7}")
+    for key in sorted(set(before_runs) & set(after_runs)):
+        for name, stats in sorted(after_runs[key].items()):
+            if name.startswith("_") or name not in before_runs[key]:
+                continue
+            old = before_runs[key][name]["median"]
+            new = stats["median"]
+            ratio = new / old if old else float("inf")
+            print(f"{key[0]:<7} {key[1]:>9}  {name:<26} {old:>9.4f}s {new:>9.4f}s {ratio:>6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", default="1000,10000",
+                        help="comma separated file counts, e.g. 1000,100000,1000000")
+    parser.add_argument("--shape", default="mixed", choices=SHAPES + ("all",))
+    parser.add_argument("--files-per-dir", type=int, default=20)
+    parser.add_argument("--large-dirs", type=int, default=2,
+                        help="directories holding more than MAX_FILES_PER_DIR_SCAN files")
+    parser.add_argument("--ignored-ratio", type=float, default=0.1,
+                        help="fraction of files placed in ignored directories")
+    parser.add_argument("--file-size", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=None,
+                        help="where synthetic trees are generated and reused")
+    parser.add_argument("--output", default=None,
+                        help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two result files and exit")
+    parser.add_argument("--git", action="store_true",
+                        help="make the trees git repositories (with untracked build "
+                             "output) and time the git index listing against the walker")
+    parser.add_argument("--select-all", metavar="SIZES",
+                        help="only time Select All and its row refresh against "
+                             "in-memory trees of these comma separated file counts")
+    parser.add_argument("--memory", metavar="SIZES",
+                        help="only measure the memory held by folder trees of these "
+                             "comma separated file counts")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare_results(*args.compare)
+        return 0
+
+    app_module = load_app_module()
+    if args.memory:
+        sizes = [int(value) for value in args.memory.split(",") if value]
+        text = json.dumps({"memory": run_memory_suite(app_module, sizes)}, indent=2)
+        if args.output:
+            Path(args.output).write_text(text)
+        else:
+            print(text)
+        return 0
+    if args.select_all:
+        sizes = [int(value) for value in args.select_all.split(",") if value]
+        text = json.dumps({"select_all": run_select_all_suite(
+            app_module, sizes, args.repeat)}, indent=2)
+        if args.output:
+            Path(args.output).write_text(text)
+        else:
+            print(text)
+        return 0
+
+    workdir = Path(args.workdir) if args.workdir else Path(
+        tempfile.gettempdir()) / "codeclip-bench"
+    shapes = SHAPES if args.shape == "all" else (args.shape,)
+    sizes = [int(value) for value in args.files.split(",") if value]
+
+    output = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+            "max_files_per_dir_scan": app_module.MAX_FILES_PER_DIR_SCAN,
+        },
+        "results": [],
+    }
+    for shape in shapes:
+        for file_count in sizes:
+            project_dir = workdir / \
+                f"{shape}-{file_count}-{args.files_per_dir}-{args.large_dirs}"
+            if args.git:
+                project_dir = project_dir.with_name(project_dir.name + "-git")
+            print(f"Preparing {shape} tree with {file_count} files in {project_dir}",
+                  file=sys.stderr)
+            generate_synthetic_tree(
+                project_dir, file_count, shape, args.files_per_dir, args.large_dirs,
+                args.ignored_ratio, args.file_size, app_module.MAX_FILES_PER_DIR_SCAN,
+                git=args.git)
+            benchmarks = run_suite(app_module, project_dir, args.repeat)
+            output["results"].append(
+                {"shape": shape, "files": file_count, "benchmarks": benchmarks})
+            for name, stats in benchmarks.items():
+                if not name.startswith("_"):
+                    print(f"  {name:<26} median {stats['median']:.4f}s", file=sys.stderr)
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
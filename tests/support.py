@@ -0,0 +1,41 @@
+"""Shared helpers for the tests: the application module and a temp-dir test case.
+
+The tests cover the parts of .codebase-to-text.py that run without a
+window. Run them with ``python -m unittest discover tests`` (or pytest).
+"""
+import importlib.util
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+APP_SCRIPT = ROOT_DIR / ".codebase-to-text.py"
+
+
+def load_app_module():
+    """Import the application script, whose file name is not importable."""
+    if "codeclip" in sys.modules:
+        return sys.modules["codeclip"]
+    spec = importlib.util.spec_from_file_location("codeclip", APP_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so process pool workers can find its functions by name
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+app = load_app_module()
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="codeclip-test-"))
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def write(self, rel_path, text=""):
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        return path
@@ -0,0 +1,36 @@
+"""Tests for the markdown, xml, jsonl and plain bundle formats."""
+import json
+
+from support import TempDirTestCase, app
+
+
+class BundleWriterTest(TempDirTestCase):
+    def bundle(self, output_format):
+        self.write("a.py", "print('<&>')\n")
+        self.write("b.md", 'say "hi"\n')
+        text, stats = app.generate_bundle(
+            self.root, [str(self.root / "a.py"), str(self.root / "b.md")],
+            output_format=output_format)
+        self.assertEqual(stats["files"], 2)
+        return text
+
+    def test_markdown(self):
+        text = self.bundle("markdown")
+        self.assertIn("## a.py\n\n```python\nprint('<&>')\n\n```\n", text)
+        self.assertIn("## b.md\n\n```markdown\n", text)
+
+    def test_xml(self):
+        import xml.etree.ElementTree as ElementTree
+        root = ElementTree.fromstring(self.bundle("xml"))
+        files = root.findall("file")
+        self.assertEqual([f.get("path") for f in files], ["a.py", "b.md"])
+        self.assertEqual(files[0].text.strip(), "print('<&>')")
+
+    def test_jsonl(self):
+        records = [json.loads(line) for line in self.bundle("jsonl").splitlines()]
+        self.assertEqual([r["type"] for r in records], ["tree", "file", "file"])
+        self.assertEqual(records[2], {"type": "file", "path": "b.md", "language": "markdown",
+                                      "content": 'say "hi"\n'})
+
+    def test_plain(self):
+        self.assertIn("==> a.py <==\nprint('<&>')\n", self.bundle("plain"))
@@ -0,0 +1,87 @@
+"""Tests for streaming bundles into a clipboard helper ($CODECLIP_CLIPBOARD)."""
+import contextlib
+import io
+import os
+import shlex
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from support import TempDirTestCase, app
+
+
+@unittest.skipUnless(os.name == "posix", "the stub helpers are shell scripts")
+class ClipboardHelperTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = self.root / "project"
+        self.clipboard = self.root / "clipboard.txt"
+        self.paths = [str(self.write("project/a.py", "print('a')\n")),
+                      str(self.write("project/b.txt", "b" * (3 * app.READ_CHUNK_SIZE)))]
+
+    def helper(self, script):
+        """Point $CODECLIP_CLIPBOARD at a shell script and return the command found."""
+        path = self.write("helper.sh", "#!/bin/sh\n" + script + "\n")
+        path.chmod(0o755)
+        command = f"{shlex.quote(str(path))} {shlex.quote(str(self.clipboard))}"
+        with mock.patch.dict(os.environ, {app.CLIPBOARD_ENV_VAR: command}):
+            return app.find_clipboard_helper()
+
+    def copying_helper(self):
+        # Like a real clipboard, only take the text over once stdin is closed
+        return self.helper('cat > "$1.part" && mv "$1.part" "$1"')
+
+    def test_bundle_is_streamed_to_the_helper(self):
+        stats = app.copy_bundle(self.copying_helper(), self.project, self.paths)
+        expected, _ = app.generate_bundle(self.project, self.paths)
+        self.assertEqual(self.clipboard.read_bytes(), expected.encode("utf-8"))
+        self.assertEqual(stats["files"], 2)
+
+    def test_failing_helper(self):
+        helper = self.helper('cat > /dev/null; echo "no display" >&2; exit 1')
+        with self.assertRaisesRegex(OSError, "exited with status 1: no display"):
+            app.copy_bundle(helper, self.project, self.paths)
+
+    def test_helper_closing_stdin_early(self):
+        # Exits without reading: the bundle is bigger than a pipe buffer, so writing fails
+        with self.assertRaises(OSError):
+            app.copy_bundle(self.helper("exit 0"), self.project, self.paths)
+
+    def test_cancel_copies_nothing(self):
+        interval = app.PROGRESS_UPDATE_INTERVAL
+        app.PROGRESS_UPDATE_INTERVAL = 0
+        self.addCleanup(setattr, app, "PROGRESS_UPDATE_INTERVAL", interval)
+        cancel_event = threading.Event()
+
+        def on_progress(files_done, files_total, bytes_done, bytes_total):
+            if files_done:
+                cancel_event.set()
+
+        stats = app.copy_bundle(self.copying_helper(), self.project, self.paths,
+                                on_progress, cancel_event)
+        self.assertTrue(stats["cancelled"])
+        self.assertFalse(self.clipboard.exists())
+
+    def test_command_line_reports_a_failing_helper(self):
+        helper = self.helper("cat > /dev/null; exit 3")
+        stderr = io.StringIO()
+        with mock.patch.dict(os.environ, {app.CLIPBOARD_ENV_VAR: shlex.join(helper)}), \
+                contextlib.redirect_stderr(stderr):
+            self.assertEqual(app.main(["--copy", "--project", str(self.project)]), 1)
+        self.assertIn("exited with status 3", stderr.getvalue())
+
+    def test_window_falls_back_to_tk(self):
+        window = SimpleNamespace(current_dir=self.project, after=lambda delay, callback: callback(),
+                                 _report_progress=mock.Mock(), _update_after_processing=mock.Mock())
+        with mock.patch.dict(os.environ, {app.CLIPBOARD_ENV_VAR: shlex.join(self.helper("exit 1"))}), \
+                contextlib.redirect_stdout(io.StringIO()):
+            app.App._process_thread(window, self.paths, {"": self.project}, None, "markdown",
+                                    "full", False, threading.Event())
+        combined_text, status = window._update_after_processing.call_args[0]
+        self.assertIn("print('a')", combined_text)
+        self.assertTrue(status.startswith("Copied 2 files"), status)
+
+    def test_empty_override_uses_tk(self):
+        with mock.patch.dict(os.environ, {app.CLIPBOARD_ENV_VAR: ""}):
+            self.assertIsNone(app.find_clipboard_helper())
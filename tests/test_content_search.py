@@ -0,0 +1,26 @@
+"""Tests for the process pool content search."""
+import threading
+import time
+
+from support import TempDirTestCase, app
+
+
+class ContentSearchTest(TempDirTestCase):
+    def test_matching_paths(self):
+        paths = [str(self.write(f"f{index}.py", f"value = {index}\n")) for index in range(5)]
+        paths.append(str(self.write("empty.py")))
+        paths.append(str(self.root / "missing.py"))
+        batches = list(app.search_files_by_content(r"^value = [13]$", paths))
+        self.assertEqual(sum(files for files, _ in batches), len(paths))
+        self.assertEqual(sorted(path for _, matches in batches for path in matches),
+                         [paths[1], paths[3]])
+
+    def test_cancel_does_not_wait_for_running_batches(self):
+        # Backtracks for a couple of seconds in its worker
+        paths = [str(self.write("slow.txt", "a" * 24))]
+        cancel_event = threading.Event()
+        threading.Timer(0.3, cancel_event.set).start()
+        started = time.perf_counter()
+        batches = list(app.search_files_by_content(r"(a+)+b", paths, cancel_event))
+        self.assertEqual(batches, [])
+        self.assertLess(time.perf_counter() - started, 1.0)
@@ -0,0 +1,111 @@
+"""Tests for the --serve daemon's HTTP endpoints."""
+import http.client
+import http.server
+import json
+import os
+import stat
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+from support import TempDirTestCase, app
+
+
+class DaemonTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("src/app.py", "API = 'x'\n")
+        self.write("src/util.py", "def helper():\n    return 1\n")
+        self.write("docs/notes.md", "# Notes\n")
+        self.write("package-lock.json", '{"lockfileVersion": 3}\n')
+        server = http.server.ThreadingHTTPServer((app.DAEMON_HOST, 0), app._DaemonRequestHandler)
+        server.daemon_threads = True
+        server.snapshot = app.ProjectSnapshot([self.root])
+        server.token = "test-token"
+        self.port = server.server_address[1]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+    def post_bundle(self, request, headers=None):
+        if headers is None:
+            headers = {"Authorization": "Bearer test-token"}
+        return urllib.request.urlopen(urllib.request.Request(
+            f"http://{app.DAEMON_HOST}:{self.port}/bundle",
+            data=json.dumps(request).encode("utf-8"), headers=headers), timeout=10)
+
+    def test_bundle(self):
+        with self.post_bundle({"include": ["src/**/*.py"], "format": "jsonl"}) as response:
+            lines = response.read().decode("utf-8").splitlines()
+            self.assertEqual(response.headers["X-Codeclip-Files"], "2")
+            self.assertEqual(response.headers["X-Codeclip-Errors"], "0")
+        paths = [json.loads(line).get("path") for line in lines]
+        self.assertEqual([path for path in paths if path], ["src/app.py", "src/util.py"])
+
+    def test_bundle_through_the_client(self):
+        text = app.daemon_request("bundle", self.port, {"include": ["docs/*.md"]},
+                                  tree_mode="selected", token="test-token")
+        self.assertIn("## docs/notes.md\n", text)
+        self.assertNotIn("src/app.py", text)
+        stats = json.loads(app.daemon_request("stats", self.port, token="test-token"))
+        self.assertEqual(stats["files"], 4)
+
+    def test_generated_files_are_left_out_unless_asked(self):
+        with self.post_bundle({"paths": ["package-lock.json", "src/app.py"]}) as response:
+            self.assertEqual(response.headers["X-Codeclip-Files"], "1")
+            self.assertEqual(response.headers["X-Codeclip-Generated-Skipped"], "1")
+        with self.post_bundle({"paths": ["package-lock.json"], "generated": True}) as response:
+            self.assertIn("lockfileVersion", response.read().decode("utf-8"))
+
+    def test_bad_requests(self):
+        for request in ({"format": "pdf"}, {"tree": "none"}, {"profile": "missing"}, []):
+            with self.subTest(request=request):
+                with self.assertRaises(urllib.error.HTTPError) as caught:
+                    self.post_bundle(request)
+                self.assertEqual(caught.exception.code, 400)
+                caught.exception.close()
+
+    def test_token_is_required(self):
+        for headers in ({}, {"Authorization": "Bearer wrong"}, {"Authorization": "test-token"}):
+            with self.subTest(headers=headers):
+                with self.assertRaises(urllib.error.HTTPError) as caught:
+                    self.post_bundle({}, headers)
+                self.assertEqual(caught.exception.code, 401)
+                caught.exception.close()
+
+    def test_foreign_host_is_refused(self):
+        for host in (f"localhost:{self.port}", "evil.example:80", f"127.0.0.1:{self.port + 1}"):
+            with self.subTest(host=host):
+                connection = http.client.HTTPConnection(app.DAEMON_HOST, self.port, timeout=10)
+                self.addCleanup(connection.close)
+                connection.request("GET", "/stats", headers={
+                    "Host": host, "Authorization": "Bearer test-token"})
+                response = connection.getresponse()
+                response.read()
+                self.assertEqual(response.status, 200 if host.startswith("localhost") else 403)
+
+
+class DaemonTokenTest(TempDirTestCase):
+    def test_token_file(self):
+        token_file = str(self.root / "state" / "daemon-{port}.token")
+        with mock.patch.object(app, "DAEMON_TOKEN_FILE", token_file):
+            path = app.daemon_token_path(7000)
+            path.parent.mkdir()
+            path.write_text("stale", encoding="utf-8")
+            token = app.write_daemon_token(7000)
+            self.assertEqual(path.read_text(encoding="utf-8"), token)
+            self.assertNotEqual(token, app.write_daemon_token(7000))
+        if os.name == "posix":
+            self.assertEqual(stat.S_IMODE(path.stat().st_mode), 0o600)
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "symlinks are not supported")
+    def test_token_is_not_written_through_a_link(self):
+        target = self.write("target.txt", "keep")
+        token_file = str(self.root / "daemon-{port}.token")
+        os.symlink(target, self.root / "daemon-7000.token")
+        with mock.patch.object(app, "DAEMON_TOKEN_FILE", token_file):
+            app.write_daemon_token(7000)
+        self.assertEqual(target.read_text(encoding="utf-8"), "keep")
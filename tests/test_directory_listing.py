@@ -0,0 +1,48 @@
+"""Tests for the directory dialog's listing and its shared cache."""
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from support import TempDirTestCase, app
+
+Dialog = app.DirectorySelectionDialog
+
+
+class ListingCacheTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        saved = Dialog._listing_cache.copy()
+        Dialog._listing_cache.clear()
+        self.addCleanup(Dialog._listing_cache.update, saved)
+        self.addCleanup(Dialog._listing_cache.clear)
+        self.dialog = SimpleNamespace(after=mock.Mock())
+
+    def test_list_directory(self):
+        self.write("src/a.py")
+        self.write("node_modules/x.js")
+        self.write("README.md")
+        listing = app.list_directory(self.root)
+        self.assertEqual(listing["dirs"], ["src"])
+        self.assertEqual(listing["file_count"], 1)
+
+    def test_workers_fill_a_bounded_cache(self):
+        folders = [self.root / f"d{index:03}" for index in range(app.DIALOG_LISTING_CACHE_SIZE + 20)]
+        for folder in folders:
+            folder.mkdir()
+        workers = [threading.Thread(target=Dialog._list_directory_worker,
+                                    args=(self.dialog, 1, folder)) for folder in folders]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(5)
+        self.assertEqual(len(Dialog._listing_cache), app.DIALOG_LISTING_CACHE_SIZE)
+        self.assertEqual(self.dialog.after.call_count, len(folders))
+
+    def test_cached_listing_is_dropped_when_the_folder_changes(self):
+        folder = self.root / "project"
+        folder.mkdir()
+        Dialog._list_directory_worker(self.dialog, 1, folder)
+        self.assertEqual(Dialog._get_cached_listing(self.dialog, folder)["dirs"], [])
+        (folder / "new").mkdir()
+        Dialog._listing_cache[str(folder)]["mtime_ns"] -= 1
+        self.assertIsNone(Dialog._get_cached_listing(self.dialog, folder))
@@ -0,0 +1,42 @@
+"""Tests for telling lockfiles, minified bundles and generated code apart."""
+from support import TempDirTestCase, app
+
+
+class GeneratedFileTest(TempDirTestCase):
+    def test_names(self):
+        cases = {
+            "package-lock.json": "lockfile", "Cargo.lock": "lockfile", "go.sum": "lockfile",
+            "app.min.js": "minified", "vendor-min.js": "minified", "site.MIN.CSS": "minified",
+            "app.js.map": "source map", "user_pb2.py": "generated", "api.pb.go": "generated",
+            "model.g.dart": "generated", "Form1.Designer.cs": "generated",
+            "app.js": None, "lock.json": None, "my-package-lock.json": None,
+            "mint.js": None, "go.summary": None, "map": None, "README": None,
+        }
+        for name, reason in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(app.generated_name_reason(name), reason)
+                self.assertEqual(app.classify_generated_file(name, 10), reason)
+
+    def test_contents_of_big_files(self):
+        size = app.GENERATED_SNIFF_MIN_SIZE
+        marked = self.write("schema.py", "# Code generated by sqlc. DO NOT EDIT.\n" + "x = 1\n" * size)
+        minified = self.write("bundle.js", "var a=1;" * size)
+        late_marker = self.write("late.py", "x = 1\n" * size + "# @generated\n")
+        plain = self.write("plain.py", "x = 1\n" * size)
+        small = self.write("small.py", "# @generated\n")
+        self.assertEqual(app.classify_generated_file("schema.py", size, str(marked)), "generated")
+        self.assertEqual(app.classify_generated_file("bundle.js", size, str(minified)), "minified")
+        self.assertIsNone(app.classify_generated_file("late.py", size, str(late_marker)))
+        self.assertIsNone(app.classify_generated_file("plain.py", size, str(plain)))
+        # Below GENERATED_SNIFF_MIN_SIZE only the name counts
+        self.assertIsNone(app.classify_generated_file("small.py", 13, str(small)))
+        self.assertIsNone(app.classify_generated_file("schema.py", size, str(self.root / "gone.py")))
+
+    def test_split(self):
+        lock = self.write("package-lock.json", "{}")
+        source = self.write("index.js", "export {};\n")
+        minified = self.write("dist/app.js", "f();" * app.GENERATED_SNIFF_MIN_SIZE)
+        kept, generated = app.split_generated_files([str(lock), str(source), str(minified)])
+        self.assertEqual(kept, [str(source)])
+        self.assertEqual(generated, [(str(lock), "lockfile", 2),
+                                     (str(minified), "minified", 4 * app.GENERATED_SNIFF_MIN_SIZE)])
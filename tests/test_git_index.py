@@ -0,0 +1,70 @@
+"""Tests for listing tracked files straight from the git index."""
+import shutil
+import subprocess
+import unittest
+
+from support import TempDirTestCase, app
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class GitIndexTest(TempDirTestCase):
+    FILES = ["README.md", "src/app.py", "src/pkg/__init__.py", "src/pkg/util.py", "docs/guide.md"]
+
+    def setUp(self):
+        super().setUp()
+        self.git("init", "-q")
+        for rel_path in self.FILES:
+            self.write(rel_path, f"# {rel_path}\n")
+        self.git("add", *self.FILES)
+
+    def git(self, *args):
+        subprocess.run(["git", "-C", str(self.root), *args], check=True,
+                       capture_output=True)
+
+    def read_index(self, version):
+        self.git("update-index", "--index-version", str(version))
+        with open(self.root / ".git" / "index", "rb") as f:
+            self.assertEqual(int.from_bytes(f.read(8)[4:], "big"), version)
+        sizes = {}
+        return app.read_git_index(self.root / ".git" / "index", sizes), sizes
+
+    def test_versions_2_and_4(self):
+        for version in (2, 4):
+            with self.subTest(version=version):
+                paths, sizes = self.read_index(version)
+                self.assertEqual(paths, sorted(self.FILES))
+                self.assertEqual(sizes["src/app.py"], len("# src/app.py\n"))
+
+    def test_version_3_with_extended_flags(self):
+        # Intent-to-add entries carry extended flags, which need version 3
+        self.write("notes.txt", "later\n")
+        self.git("add", "-N", "notes.txt")
+        paths, _ = self.read_index(3)
+        self.assertEqual(paths, sorted(self.FILES + ["notes.txt"]))
+
+    def test_list_git_files(self):
+        self.assertEqual(sorted(app.list_git_files(self.root)), sorted(self.FILES))
+        self.assertIsNone(app.list_git_files(self.root / "src"))
+
+    def test_tracked_only_does_not_read_files(self):
+        self.write("src/big.py", "# @generated\n" + "x = 1\n" * 4000)
+        self.write("src/api_pb2.py", "x = 1\n")
+        self.git("add", "src/big.py", "src/api_pb2.py")
+        real_open = app.open_project_file
+        opened = []
+
+        def open_project_file(file_path):
+            opened.append(file_path)
+            return real_open(file_path)
+        app.open_project_file = open_project_file
+        self.addCleanup(setattr, app, "open_project_file", real_open)
+        _, _, tree = app.scan_project_root(self.root, tracked_only=True)
+        self.assertEqual(opened, [])
+        self.assertEqual(tree.subfolders["src"].generated, {"api_pb2.py": "generated"})
+        # Content markers are still found when bundling
+        kept, generated = app.split_generated_files([str(self.root / "src" / "big.py")])
+        self.assertEqual((kept, [reason for _, reason, _ in generated]), ([], ["generated"]))
+
+    def test_not_an_index(self):
+        path = self.write("index", "not an index")
+        self.assertIsNone(app.read_git_index(path))
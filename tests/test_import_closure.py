@@ -0,0 +1,17 @@
+"""Tests for selecting a module together with the project modules it imports."""
+from support import TempDirTestCase, app
+
+
+class ImportClosureTest(TempDirTestCase):
+    def test_follows_absolute_and_relative_imports(self):
+        self.write("main.py", "import pkg.a\n")
+        self.write("pkg/__init__.py", "")
+        self.write("pkg/a.py", "from . import b\n")
+        self.write("pkg/b.py", "from .c import thing\nimport os\n")
+        self.write("pkg/c.py", "thing = 1\n")
+        self.write("unused.py", "")
+        cache = app.ImportGraphCache(self.root)
+        self.assertEqual(app.python_import_closure(self.root, ["main.py"], None, cache),
+                         {"main.py", "pkg/a.py", "pkg/b.py", "pkg/c.py"})
+        self.assertEqual(app.python_import_closure(self.root, ["main.py"], 1, cache),
+                         {"main.py", "pkg/a.py"})
@@ -0,0 +1,68 @@
+"""Tests for the size policies that shorten or skip large files."""
+from unittest import mock
+
+from support import TempDirTestCase, app
+
+
+def numbered_lines(count, width=10):
+    return "".join(f"line {index:0{width}}\n" for index in range(1, count + 1))
+
+
+class LargeFilePolicyTest(TempDirTestCase):
+    def bundle(self, *paths):
+        return app.generate_bundle(self.root, [str(path) for path in paths], tree_mode="selected")
+
+    def test_head_tail_keeps_both_ends(self):
+        # .log keeps the first 20 and last 200 lines once over 64 KB
+        text = numbered_lines(5000)
+        path = self.write("server.log", text)
+        bundle, stats = self.bundle(path)
+        kept = text.splitlines(keepends=True)
+        head, tail = "".join(kept[:20]), "".join(kept[-200:])
+        omitted = app.format_size(len(text) - len(head) - len(tail))
+        self.assertIn(f"## server.log (truncated: first 20 and last 200 lines of "
+                      f"{app.format_size(len(text))})\n\n```\n", bundle)
+        self.assertIn(f"{head.rstrip()}\n\n... [{omitted} omitted] ...\n\n{tail.rstrip()}\n```",
+                      bundle)
+        self.assertNotIn("line 0000000021\n", bundle)
+        self.assertEqual((stats["truncated"], stats["files"]), (1, 1))
+        self.assertEqual(stats["bytes"], len(head) + len(tail))
+
+    def test_head_only(self):
+        text = numbered_lines(5000)
+        path = self.write("data.csv", text)
+        bundle, _ = self.bundle(path)
+        self.assertIn("(truncated: first 50 lines of", bundle)
+        self.assertIn("line 0000000050\n\n... [", bundle)
+        self.assertIn("omitted] ...\n```", bundle)
+        self.assertNotIn("line 0000000051", bundle)
+
+    def test_max_bytes_cuts_at_a_line_end(self):
+        text = numbered_lines(20_000)
+        path = self.write("dump.sql", text)
+        bundle, stats = self.bundle(path)
+        self.assertIn("(truncated: first 64.0 KB of", bundle)
+        line_length = len("line 0000000001\n")
+        kept_lines = 64 * 1024 // line_length
+        self.assertIn(f"line {kept_lines:010}\n\n... [", bundle)
+        self.assertNotIn(f"line {kept_lines + 1:010}", bundle)
+        self.assertEqual(stats["bytes"], kept_lines * line_length)
+
+    def test_skip_leaves_a_marker(self):
+        policies = dict(app.LARGE_FILE_POLICIES, **{".bin": {"max_size": 1024, "mode": "skip"}})
+        path = self.write("blob.bin", "x" * 2048)
+        small = self.write("small.bin", "tiny")
+        with mock.patch.object(app, "LARGE_FILE_POLICIES", policies):
+            bundle, stats = self.bundle(path, small)
+        self.assertIn("## blob.bin\n\n_[Skipped: 2.0 KB is over the 1.0 KB limit]_\n\n", bundle)
+        self.assertNotIn("xxxx", bundle)
+        self.assertIn("tiny", bundle)
+        self.assertEqual((stats["skipped"], stats["files"]), (1, 1))
+
+    def test_plan_lists_only_files_over_their_limit(self):
+        log = self.write("server.log", numbered_lines(5000))
+        self.write("small.log", "ok\n")
+        plan = app.plan_large_files([str(log), str(self.root / "small.log"),
+                                     str(self.root / "missing.log")])
+        self.assertEqual([(path, policy) for path, _, policy in plan],
+                         [(str(log), app.LARGE_FILE_POLICIES[".log"])])
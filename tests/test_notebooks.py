@@ -0,0 +1,87 @@
+"""Tests for bundling Jupyter notebooks as their cell sources."""
+import io
+import json
+import unittest
+
+from support import app
+
+
+def _notebook(cells, **metadata):
+    return json.dumps({"cells": cells, "metadata": metadata, "nbformat": 4, "nbformat_minor": 5},
+                      indent=1)
+
+
+class NotebookTest(unittest.TestCase):
+    def test_sources_and_text_outputs(self):
+        notebook = _notebook([
+            {"cell_type": "markdown", "source": ["# Title\n", "Some text"]},
+            {"cell_type": "code", "source": "x = 1\nprint(x)", "outputs": [
+                {"output_type": "stream", "name": "stdout", "text": ["1\n"]},
+                {"output_type": "display_data",
+                 "data": {"image/png": "iVBOR" * 1000, "text/plain": ["<Figure>"]}},
+            ]},
+        ], kernelspec={"language": "python"})
+        language, text = app.slim_notebook(io.StringIO(notebook))
+        self.assertEqual(language, "python")
+        self.assertEqual(text, "# %% [markdown]\n# # Title\n# Some text\n\n"
+                               "# %%\nx = 1\nprint(x)\n# Out:\n# 1\n# <Figure>\n"
+                               "# [image/png output omitted]")
+
+    def test_output_lines_are_capped(self):
+        notebook = _notebook([{"cell_type": "code", "source": "loop()", "outputs": [
+            {"output_type": "stream", "text": "".join(f"{i}\n" for i in range(50))}]}])
+        _, text = app.slim_notebook(io.StringIO(notebook), max_output_lines=3)
+        self.assertTrue(text.endswith("# 0\n# 1\n# 2\n# ... [47 more lines]"))
+
+    def test_comment_style_follows_language(self):
+        notebook = _notebook([{"cell_type": "markdown", "source": "note"}],
+                             language_info={"name": "javascript"})
+        self.assertEqual(app.slim_notebook(io.StringIO(notebook)),
+                         ("javascript", "// %% [markdown]\n// note"))
+
+    def test_small_reads(self):
+        # Values straddling many buffer refills decode the same
+        notebook = _notebook([{"cell_type": "code", "source": "y = 2", "outputs": [
+            {"output_type": "display_data", "data": {"image/png": "A" * 200_000}}]}])
+
+        class SmallReads(io.StringIO):
+            def read(self, n=-1):
+                return super().read(min(n, 1000) if n >= 0 else 1000)
+
+        self.assertEqual(app.slim_notebook(SmallReads(notebook))[1],
+                         "# %%\ny = 2\n# Out:\n# [image/png output omitted]")
+
+    def test_rich_outputs_are_skipped_undecoded(self):
+        def notebook(image_size):
+            text = _notebook([{"cell_type": "code", "source": "plot()", "metadata": {"a": [1, {}]},
+                               "outputs": [{"output_type": "display_data", "metadata": {},
+                                            "data": {"image/png": "@" * image_size,
+                                                     "image/svg+xml": ['<svg a="1">', "]}"],
+                                                     "text/plain": ["<Figure>"]}}]}])
+            # Escapes json would reject show the skipped values are never decoded
+            return text.replace("@" * 10, '\\q\\"').replace('a=\\"1', 'a=\\"\\q')
+        expected = ("# %%\nplot()\n# Out:\n# <Figure>\n# [image/png output omitted]\n"
+                    "# [image/svg+xml output omitted]")
+        requested = []
+
+        class Reads(io.StringIO):
+            def read(self, n=-1):
+                requested.append(n)
+                return super().read(n)
+
+        self.assertEqual(app.slim_notebook(Reads(notebook(2_000_000)))[1], expected)
+        # Scanned past in fixed-size reads rather than buffered whole
+        self.assertEqual(max(requested), app.READ_CHUNK_SIZE)
+
+        class TinyReads(io.StringIO):
+            def read(self, n=-1):
+                return super().read(3)
+
+        # Escapes and quotes split between reads
+        self.assertEqual(app.slim_notebook(TinyReads(notebook(1000)))[1], expected)
+
+    def test_not_a_notebook(self):
+        for text in ("[1, 2]", '{"cells": [1]}', '{"cells": [{"source": "x"'):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    app.slim_notebook(io.StringIO(text))
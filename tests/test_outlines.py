@@ -0,0 +1,139 @@
+"""Tests for the outlines of oversized Python and C-like source files."""
+import ast
+import os
+import tarfile
+import threading
+import unittest
+
+from support import TempDirTestCase, app
+
+
+class PythonOutlineTest(unittest.TestCase):
+    def test_signatures_docstrings_and_imports(self):
+        source = ('"""Module doc.\n\nMore."""\n'
+                  "import os\n"
+                  "from typing import (\n    Any,\n)\n\n"
+                  "@decorator\n"
+                  "def top(a, b=1):\n"
+                  '    """Add things."""\n'
+                  "    return a + b\n\n"
+                  "class Thing(Base):\n"
+                  '    """A thing."""\n'
+                  "    def method(self):\n"
+                  "        return 1\n")
+        self.assertEqual(app.outline_source(source, "python"),
+                         '"""Module doc."""\n'
+                         "import os\n"
+                         "from typing import (\n    Any,\n)\n\n"
+                         "@decorator\n"
+                         "def top(a, b=1):\n"
+                         '    """Add things."""\n'
+                         "    ...\n\n"
+                         "class Thing(Base):\n"
+                         '    """A thing."""\n'
+                         "    def method(self):\n"
+                         "        ...")
+
+    def test_signature_over_several_lines_with_body_on_its_last(self):
+        source = ("def f(a,\n"
+                  "      b): return a + b\n"
+                  "@cache(\n"
+                  "    {'key': lambda: 1},\n"
+                  ")\n"
+                  "def g(x: dict = {'a': 1}) -> 'é':  # note: colons\n"
+                  "    return x\n")
+        outline = app.outline_source(source, "python")
+        self.assertEqual(outline, "def f(a,\n"
+                                  "      b): ...\n\n"
+                                  "@cache(\n"
+                                  "    {'key': lambda: 1},\n"
+                                  ")\n"
+                                  "def g(x: dict = {'a': 1}) -> 'é':  # note: colons\n"
+                                  "    ...")
+        ast.parse(outline)
+
+    def test_guarded_imports(self):
+        source = ("try:\n"
+                  "    import numpy as np\n"
+                  "except ImportError:  # optional\n"
+                  "    np = None\n"
+                  "if sys.version_info >= (3, 11):\n"
+                  "    import tomllib\n"
+                  "else:\n"
+                  "    try: import tomli as tomllib\n"
+                  "    except ImportError: tomllib = None\n"
+                  "if DEBUG:\n"
+                  "    print('no imports here')\n")
+        outline = app.outline_source(source, "python")
+        self.assertEqual(outline, "try:\n"
+                                  "    import numpy as np\n"
+                                  "except ImportError:  # optional\n"
+                                  "    ...\n"
+                                  "if sys.version_info >= (3, 11):\n"
+                                  "    import tomllib\n"
+                                  "else:\n"
+                                  "    try: import tomli as tomllib\n"
+                                  "    except ImportError: ...")
+        ast.parse(outline)
+
+    def test_syntax_error(self):
+        with self.assertRaises(SyntaxError):
+            app.outline_source("def broken(:\n", "python")
+
+
+class OutlineBundleTest(TempDirTestCase):
+    def big_module(self, index):
+        return "".join(f"def f{index}_{i}(x):\n    return x + {i}\n\n" for i in range(4000))
+
+    def test_archive_members_are_outlined(self):
+        for index in range(3):
+            self.write(f"proj/m{index}.py", self.big_module(index))
+        archive_path = self.root / "proj.tar.gz"
+        with tarfile.open(archive_path, "w:gz") as archive:
+            archive.add(self.root / "proj", arcname="proj")
+        archive = app.open_archive(archive_path)
+        paths = [os.path.join(archive.path, *name.split("/")) for name in sorted(archive.members)]
+        for _ in range(2):
+            text, stats = app.generate_bundle(archive.path, paths, tree_mode="selected")
+            self.assertEqual((stats["outlined"], stats["truncated"], stats["errors"]), (3, 0, []))
+            self.assertIn("def f2_3999(x):\n    ...", text)
+
+    def test_cancel_between_outlines(self):
+        paths = [str(self.write(f"m{index}.py", self.big_module(index))) for index in range(3)]
+        cancel_event = threading.Event()
+
+        def progress(files_done, *args):
+            if files_done == 1:
+                cancel_event.set()
+        text, stats = app.generate_bundle(self.root, paths, tree_mode="selected",
+                                          progress_callback=progress, cancel_event=cancel_event)
+        self.assertTrue(stats["cancelled"])
+        self.assertEqual(stats["outlined"], 1)
+
+
+class CLikeOutlineTest(unittest.TestCase):
+    def test_function_bodies_are_elided(self):
+        source = ("#include <stdio.h>\n"
+                  "struct point { int x; int y; };\n"
+                  "int add(int a, int b) {\n"
+                  "    if (a) { return a + b; }\n"
+                  '    return printf("}");\n'
+                  "}\n")
+        self.assertEqual(app.outline_source(source, "c"),
+                         "#include <stdio.h>\n"
+                         "struct point { int x; int y; };\n"
+                         "int add(int a, int b) { ... }\n")
+
+    def test_class_members_are_kept(self):
+        source = ("class Greeter {\n"
+                  "    greet(name: string): string {\n"
+                  "        return `hi ${name}`;\n"
+                  "    }\n"
+                  "}\n")
+        self.assertEqual(app.outline_source(source, "typescript"),
+                         "class Greeter {\n    greet(name: string): string { ... }\n}\n")
+
+    def test_rust_lifetimes_are_not_strings(self):
+        source = "impl<'a> Parser<'a> {\n    fn next(&mut self) -> &'a str {\n        self.rest\n    }\n}\n"
+        self.assertEqual(app.outline_source(source, "rust"),
+                         "impl<'a> Parser<'a> {\n    fn next(&mut self) -> &'a str { ... }\n}\n")
@@ -0,0 +1,55 @@
+"""Tests for the fuzzy file finder's PathIndex."""
+import unittest
+
+from support import app
+
+PATHS = [
+    "src/payments/refund_service.py",
+    "src/payments/refund.py",
+    "docs/refunds/overview.md",
+    "src/prefund/helpers.py",
+    "tests/test_payments.py",
+]
+
+
+class PathIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = app.PathIndex(PATHS)
+
+    def test_basename_hits_rank_first(self):
+        self.assertEqual(self.index.search("refund"), [
+            "src/payments/refund.py",
+            "src/payments/refund_service.py",
+            "docs/refunds/overview.md",
+            "src/prefund/helpers.py",
+        ])
+
+    def test_query_is_case_and_space_insensitive(self):
+        self.assertEqual(self.index.search("Refund Service"), ["src/payments/refund_service.py"])
+        self.assertEqual(self.index.search("   "), [])
+
+    def test_subsequence_fallback(self):
+        self.assertEqual(self.index.search("pmtrfs"), ["src/payments/refund_service.py"])
+        self.assertEqual(self.index.search("pyrfnd"), ["src/payments/refund.py",
+                                                       "src/payments/refund_service.py"])
+        # Shorter than a trigram goes straight to the subsequence scan
+        self.assertEqual(self.index.search("ov"), ["docs/refunds/overview.md"])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search("refund", limit=2)), 2)
+
+    def test_add_and_remove(self):
+        self.index.remove("src/payments/refund.py")
+        self.index.remove("not/indexed.py")
+        self.assertNotIn("src/payments/refund.py", self.index.search("refund"))
+        self.assertNotIn("src/payments/refund.py", self.index.search("pmtrf"))
+        self.assertEqual(len(self.index), 4)
+
+        self.index.add("lib/refund.py")
+        self.index.add("lib/refund.py")
+        self.assertEqual(self.index.search("refund")[0], "lib/refund.py")
+        self.assertEqual(self.index.search("lbrf"), ["lib/refund.py"])
+        self.assertEqual(sorted(self.index), sorted(PATHS[:1] + PATHS[2:] + ["lib/refund.py"]))
+
+        self.index.add("src/payments/refund.py")
+        self.assertIn("src/payments/refund.py", self.index.search("refund"))
@@ -0,0 +1,34 @@
+"""Tests for selection profile globs, paths and extensions."""
+import unittest
+
+from support import app
+
+
+class SelectionProfileTest(unittest.TestCase):
+    def matches(self, profile, paths):
+        predicate = app.compile_selection_profile(profile)
+        return [path for path in paths if predicate(path)]
+
+    def test_include_and_exclude(self):
+        paths = ["app.py", "src/app.py", "src/deep/mod.py", "src/deep/mod_test.py",
+                 "docs/index.md", "tests/test_app.py"]
+        profile = {"include": ["src/**/*.py", "*.md"], "exclude": ["*_test.py"]}
+        self.assertEqual(self.matches(profile, paths),
+                         ["src/app.py", "src/deep/mod.py", "docs/index.md"])
+
+    def test_star_stays_in_one_folder(self):
+        paths = ["src/a.py", "src/sub/b.py"]
+        self.assertEqual(self.matches({"include": ["src/*.py"]}, paths), ["src/a.py"])
+        self.assertEqual(self.matches({"include": ["src/**"]}, paths), paths)
+
+    def test_character_classes_and_folders(self):
+        paths = ["a1.py", "b2.py", "lib/x.py", "lib/sub/y.py"]
+        self.assertEqual(self.matches({"include": ["[a]?.py"]}, paths), ["a1.py"])
+        # A pattern naming a folder selects everything below it
+        self.assertEqual(self.matches({"include": ["lib"]}, paths), ["lib/x.py", "lib/sub/y.py"])
+
+    def test_paths_and_exclude_only(self):
+        paths = ["a.py", "pkg/b.py", "pkg/c.py", "vendor/d.py"]
+        self.assertEqual(self.matches({"paths": ["pkg", "a.py"], "exclude": ["pkg/c.py"]}, paths),
+                         ["a.py", "pkg/b.py"])
+        self.assertEqual(self.matches({"exclude": ["vendor/"]}, paths), paths[:3])
@@ -0,0 +1,79 @@
+"""Tests for bundle progress reporting, cancellation and the overlap guard."""
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from support import TempDirTestCase, app
+
+
+class ProgressTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        interval = app.PROGRESS_UPDATE_INTERVAL
+        app.PROGRESS_UPDATE_INTERVAL = 0
+        self.addCleanup(setattr, app, "PROGRESS_UPDATE_INTERVAL", interval)
+
+    def test_progress_counts_bytes(self):
+        # Two bytes per character: counting characters would stop at half the total
+        paths = [str(self.write("a.txt", "é" * 100_000)), str(self.write("b.txt", "x" * 10))]
+        calls = []
+        _, stats = app.generate_bundle(self.root, paths, lambda *args: calls.append(args))
+        self.assertEqual(calls[0], (0, 2, 0, 200_010))
+        self.assertEqual(calls[-1], (2, 2, 200_010, 200_010))
+        self.assertIn((0, 2, 2 * app.READ_CHUNK_SIZE, 200_010), calls)
+        self.assertEqual([call[2] for call in calls], sorted(call[2] for call in calls))
+        self.assertEqual(stats["bytes"], 200_010)
+
+    def test_cancel_stops_between_chunks(self):
+        paths = [str(self.write("big.txt", "x" * (4 * app.READ_CHUNK_SIZE))),
+                 str(self.write("next.txt", "after"))]
+        cancel_event = threading.Event()
+
+        def on_progress(files_done, files_total, bytes_done, bytes_total):
+            if bytes_done:
+                cancel_event.set()
+
+        text, stats = app.generate_bundle(self.root, paths, on_progress, cancel_event)
+        self.assertTrue(stats["cancelled"])
+        self.assertEqual(stats["files"], 0)
+        self.assertEqual(stats["bytes"], app.READ_CHUNK_SIZE)
+        self.assertNotIn("after", text)
+
+    def test_cancel_before_start_reads_nothing(self):
+        paths = [str(self.write("a.py", "print(1)"))]
+        cancel_event = threading.Event()
+        cancel_event.set()
+        text, stats = app.generate_bundle(self.root, paths, cancel_event=cancel_event)
+        self.assertTrue(stats["cancelled"])
+        self.assertEqual(stats["files"], 0)
+        self.assertNotIn("print(1)", text)
+
+
+class OverlapGuardTest(unittest.TestCase):
+    def test_second_run_is_refused_while_busy(self):
+        running = threading.Event()
+        release = threading.Event()
+        window = SimpleNamespace(processing_thread=None, update_status=mock.Mock(),
+                                 process_btn=mock.Mock(), cancel_btn=mock.Mock(),
+                                 update_idletasks=mock.Mock())
+        window.is_busy = lambda: app.App.is_busy(window)
+
+        def task(cancel_event):
+            running.set()
+            release.wait(5)
+
+        app.App._begin_background_task(window, task, ())
+        self.addCleanup(release.set)
+        running.wait(5)
+        self.assertTrue(window.is_busy())
+        window.process_btn.configure.assert_called_with(state="disabled")
+        app.App.process_folders(window)
+        window.update_status.assert_called_once()
+        self.assertIn("Already busy", window.update_status.call_args[0][0])
+
+        app.App.cancel_processing(window)
+        self.assertTrue(window.cancel_event.is_set())
+        release.set()
+        window.processing_thread.join(5)
+        self.assertFalse(window.is_busy())
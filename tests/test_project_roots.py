@@ -0,0 +1,47 @@
+"""Tests for bundling several project roots at once."""
+from pathlib import Path
+
+from support import TempDirTestCase, app
+
+
+class ProjectRootsTest(TempDirTestCase):
+    def test_labels(self):
+        self.assertEqual(app.label_project_roots(["/work/api"]), {"": Path("/work/api")})
+        self.assertEqual(app.label_project_roots(["/work/api", "/old/api", "/work/web", "/again/api"]),
+                         {"api": Path("/work/api"), "api-2": Path("/old/api"),
+                          "web": Path("/work/web"), "api-3": Path("/again/api")})
+
+    def test_relative_paths_are_prefixed(self):
+        roots = {"api": self.root / "api", "vendor": self.root / "api" / "vendor"}
+        self.assertEqual(app.root_relative_path(self.root / "api" / "src" / "a.py", roots), "api/src/a.py")
+        # A root nested in another claims its own files
+        self.assertEqual(app.root_relative_path(self.root / "api" / "vendor" / "b.py", roots),
+                         "vendor/b.py")
+        self.assertEqual(app.root_relative_path(self.root / "api" / "a.py", {"": self.root / "api"}),
+                         "a.py")
+        with self.assertRaises(ValueError):
+            app.root_relative_path(self.root / "elsewhere.py", roots)
+
+    def test_bundle_prefixes_every_path(self):
+        api = self.write("api/src/main.py", "print('api')\n")
+        web = self.write("web/index.js", "console.log('web')\n")
+        self.write("web/skipped.js", "")
+        roots = app.label_project_roots([self.root / "api", self.root / "web"])
+        text, stats = app.generate_bundle(self.root, [str(api), str(web)], roots=roots)
+        self.assertEqual(stats["files"], 2)
+        self.assertIn("## api/src/main.py\n", text)
+        self.assertIn("## web/index.js\n", text)
+        self.assertIn("api/\n    └── src/\n        └── main.py\n"
+                      "web/\n    ├── index.js\n    └── skipped.js", text)
+
+        jsonl, _ = app.generate_bundle(self.root, [str(web)], roots=roots, output_format="jsonl")
+        self.assertIn('"path": "web/index.js"', jsonl)
+
+    def test_scan_nests_each_root_under_its_label(self):
+        self.write("api/a.py")
+        self.write("web/b.js")
+        roots = app.label_project_roots([self.root / "api", self.root / "web"])
+        counts, _, tree = app.scan_project_roots(roots)
+        self.assertEqual(dict(counts), {".py": 1, ".js": 1})
+        self.assertEqual(list(tree.subfolders), ["api", "web"])
+        self.assertEqual(list(tree.subfolders["web"].files), ["b.js"])
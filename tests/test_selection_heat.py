@@ -0,0 +1,92 @@
+"""Tests for the incremental selection totals behind the size heat map."""
+import random
+import unittest
+from collections import Counter
+
+from support import app
+
+FOLDER_PARENT = {"src": "", "src/pkg": "src", "docs": ""}
+FILES = {
+    "": {"README": 10, "setup.py": 20},
+    "src": {"main.py": 100, "style.css": 40},
+    "src/pkg": {"core.py": 300, "core.min.js": 500, "data.JSON": 70},
+    "docs": {"guide.md": 60, "package-lock.json": 900},
+}
+GENERATED = {"src/pkg": {"core.min.js": "minified"}, "docs": {"package-lock.json": "lockfile"}}
+
+
+def make_heat():
+    heat = app.SelectionHeat(FOLDER_PARENT)
+    for folder, files in FILES.items():
+        heat.add_files(folder, list(files), list(files.values()), GENERATED.get(folder))
+    return heat
+
+
+def expected_totals(heat):
+    """Recompute the folder totals from scratch."""
+    folder_bytes, folder_files = Counter(), Counter()
+    for folder, file in heat.ticked:
+        ext = app.file_extension(file)
+        if not ext or ext in heat.excluded_exts:
+            continue
+        if (folder, file) in heat.generated and not heat.include_generated:
+            continue
+        size = FILES[folder][file]
+        while True:
+            folder_bytes[folder] += size
+            folder_files[folder] += 1
+            if folder == "":
+                break
+            folder = FOLDER_PARENT[folder]
+    return +folder_bytes, +folder_files
+
+
+class SelectionHeatTest(unittest.TestCase):
+    def test_totals_roll_up_the_folder_chain(self):
+        heat = make_heat()
+        for folder, files in FILES.items():
+            for file in files:
+                heat.update(folder, file, True)
+        changed = heat.settle()
+        self.assertEqual(changed, {"src", "src/pkg", "docs"})
+        # README has no extension and the generated files are left out
+        self.assertEqual(heat.folder_bytes[""], 20 + 100 + 40 + 300 + 70 + 60)
+        self.assertEqual(heat.folder_files["src"], 4)
+        self.assertEqual(heat.folder_bytes["src/pkg"], 370)
+        self.assertEqual((heat.generated_files, heat.generated_bytes), (2, 1400))
+        self.assertEqual(heat.ext_files[".json"], 2)
+        self.assertEqual(heat.ext_bytes[".js"], 500)
+
+    def test_extensions_and_generated_files(self):
+        heat = make_heat()
+        heat.update("src/pkg", "core.py", True)
+        heat.update("src/pkg", "core.min.js", True)
+        heat.settle()
+        self.assertEqual(heat.folder_bytes["src"], 300)
+        heat.set_generated(True)
+        heat.settle()
+        self.assertEqual(heat.folder_bytes["src"], 800)
+        heat.set_extension(".py", False)
+        heat.set_extension(".py", False)
+        self.assertEqual(heat.settle(), {"src", "src/pkg"})
+        self.assertEqual(heat.folder_bytes[""], 500)
+        self.assertEqual(heat.ext_bytes[".py"], 300)
+        heat.update("src/pkg", "core.py", True)
+        self.assertEqual(heat.settle(), set())
+
+    def test_random_changes_match_a_full_recount(self):
+        rng = random.Random(46)
+        heat = make_heat()
+        keys = [(folder, file) for folder, files in FILES.items() for file in files]
+        extensions = sorted({app.file_extension(file) for _, file in keys} - {""})
+        for _ in range(500):
+            action = rng.random()
+            if action < 0.7:
+                heat.update(*rng.choice(keys), rng.random() < 0.6)
+            elif action < 0.9:
+                heat.set_extension(rng.choice(extensions), rng.random() < 0.5)
+            else:
+                heat.set_generated(rng.random() < 0.5)
+            if rng.random() < 0.3:
+                heat.settle()
+                self.assertEqual((+heat.folder_bytes, +heat.folder_files), expected_totals(heat))
@@ -0,0 +1,19 @@
+"""Tests for the directory tree pruned to the selection."""
+from support import TempDirTestCase, app
+
+
+class SelectionTreeTest(TempDirTestCase):
+    def test_budget_keeps_the_selected_files(self):
+        for i in range(20):
+            self.write(f"pkg/mod_{i:02}.py")
+        self.write("pkg/sub/deep.py")
+        self.write("other/x.py")
+        selected = [str(self.root / "pkg" / "mod_05.py"), str(self.root / "pkg" / "sub" / "deep.py")]
+        text = app.get_selection_tree_string({"": self.root}, selected, budget=6)
+        self.assertEqual(text, "├── other/\n"
+                               "└── pkg/\n"
+                               "    ├── sub/\n"
+                               "    │   └── deep.py\n"
+                               "    ├── mod_05.py\n"
+                               "    └── ... (0 dirs, 19 files) ...")
+        self.assertLessEqual(len(text.splitlines()), 6)
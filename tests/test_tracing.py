@@ -0,0 +1,24 @@
+"""Tests for the --trace stage tracer."""
+import contextlib
+import io
+import json
+
+from support import TempDirTestCase, app
+
+
+class TracerTest(TempDirTestCase):
+    def test_finish_keeps_stdout_free(self):
+        tracer = app.Tracer()
+        # Set by hand: enable() also wraps the module's ignore matchers
+        tracer.enabled = True
+        tracer.output_path = self.root / "trace.json"
+        with tracer.span("scan", files=3):
+            pass
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            tracer.finish()
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIn("Trace written to", stderr.getvalue())
+        self.assertIn("files=3", stderr.getvalue())
+        trace = json.loads(tracer.output_path.read_text(encoding="utf-8"))
+        self.assertEqual([event["name"] for event in trace["traceEvents"]], ["scan"])
@@ -0,0 +1,81 @@
+"""Tests for the guard against symlink loops, repeated folders and mounts."""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from support import TempDirTestCase, app
+
+
+@unittest.skipUnless(hasattr(os, "symlink"), "symlinks are not supported")
+class WalkGuardTest(TempDirTestCase):
+    def test_symlink_loop_is_entered_once(self):
+        self.write("a/file.py")
+        os.symlink(self.root / "a", self.root / "a" / "loop")
+        os.symlink(self.root, self.root / "a" / "up")
+        tree = app.build_folder_tree(self.root, max_depth=10)
+        self.assertEqual(list(tree.subfolders), ["a"])
+        self.assertEqual(tree.subfolders["a"].skipped,
+                         {"loop": "already listed", "up": "link to a parent folder"})
+        self.assertEqual(app.scan_file_extensions(self.root), {".py": 1})
+        text = app.get_tree_filtered_string(self.root, allowed_extensions=None)
+        self.assertEqual(text, "└── a/\n"
+                               "    ├── loop/ (skipped: already listed)\n"
+                               "    ├── up/ (skipped: link to a parent folder)\n"
+                               "    └── file.py")
+
+    def test_real_folder_wins_over_a_link_to_it(self):
+        # "alink" sorts first, yet every walker lists the files under "zreal"
+        self.write("zreal/a.py")
+        os.symlink(self.root / "zreal", self.root / "alink")
+        tree = app.build_folder_tree(self.root, max_depth=10)
+        self.assertEqual(list(tree.subfolders), ["zreal"])
+        self.assertEqual(tree.skipped, {"alink": "already listed"})
+        self.assertEqual(app.get_tree_filtered_string(self.root, allowed_extensions=None),
+                         "├── alink/ (skipped: already listed)\n"
+                         "└── zreal/\n"
+                         "    └── a.py")
+        self.assertEqual(list(app.iter_project_files(self.root)), [str(self.root / "zreal" / "a.py")])
+        snapshot = app.ProjectSnapshot([self.root])
+        self.assertEqual(snapshot._list_root(self.root),
+                         (["zreal/a.py"], ["zreal"], {"alink": "already listed"}))
+
+    def test_links_to_an_outside_folder_agree(self):
+        outside = Path(tempfile.mkdtemp(prefix="codeclip-outside-"))
+        self.addCleanup(shutil.rmtree, outside, ignore_errors=True)
+        (outside / "shared.py").write_text("")
+        self.write("b/keep.py")
+        self.write("C/keep.py")
+        os.symlink(outside, self.root / "b" / "link")
+        os.symlink(outside, self.root / "C" / "link")
+        tree = app.build_folder_tree(self.root, max_depth=10)
+        self.assertEqual(list(tree.subfolders["b"].subfolders), ["link"])
+        self.assertEqual(tree.subfolders["C"].skipped, {"link": "already listed"})
+        self.assertEqual(app.get_tree_filtered_string(self.root, allowed_extensions=None),
+                         "├── b/\n"
+                         "│   ├── link/\n"
+                         "│   │   └── shared.py\n"
+                         "│   └── keep.py\n"
+                         "└── C/\n"
+                         "    ├── link/ (skipped: already listed)\n"
+                         "    └── keep.py")
+        self.assertIn(str(self.root / "b" / "link" / "shared.py"), list(app.iter_project_files(self.root)))
+
+    def test_symlinks_not_followed(self):
+        self.write("real/file.py")
+        os.symlink(self.root / "real", self.root / "link")
+        guard = app.WalkGuard(self.root, follow_symlinks=False)
+        self.assertTrue(guard.enter(self.root / "real"))
+        self.assertFalse(guard.enter(self.root / "link"))
+        self.assertEqual(guard.skipped, {str(self.root / "link"): "symlink not followed"})
+
+    def test_snapshot_keeps_skips_under_folders_without_files(self):
+        class Snapshot(app.ProjectSnapshot):
+            def _list_root(self, root):
+                return ["a.py"], [], {"sub/deep/link": "symlink loop"}
+
+        snapshot = Snapshot([self.root])
+        deep = snapshot.folder_tree.subfolders["sub"].subfolders["deep"]
+        self.assertEqual(deep.skipped, {"link": "symlink loop"})
+        self.assertIn("link/ (skipped: symlink loop)", snapshot.tree_text)